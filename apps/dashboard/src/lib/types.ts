@@ -64,10 +64,12 @@ export interface ColdCall extends RecordModel {
 }
 
 export interface CallTranscript extends RecordModel {
-  call: string;
+  call?: string;
+  call_log?: string;
   transcript: string;
   expand?: {
     call?: ColdCall;
+    call_log?: CallLog;
   };
 }
 
@@ -164,6 +166,7 @@ export interface Note extends RecordModel {
 export interface PhoneNumber extends RecordModel {
   company: string;
   phone_number: string;
+  phone_normalized?: string; // E.164, set by the transcriber
   label?: string;
   location_name?: string;
   location_address?: string;
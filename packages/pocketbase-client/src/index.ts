@@ -81,7 +81,8 @@ export interface ColdCall extends RecordModel {
 }
 
 export interface CallTranscript extends RecordModel {
-    call: string; // Relation to cold_calls
+    call?: string; // Relation to cold_calls (legacy workflow)
+    call_log?: string; // Relation to call_logs
     transcript: string;
     expand?: {
         call?: ColdCall;
@@ -335,6 +336,16 @@ export class CRMPocketBase {
         }
     }
 
+    async getTranscriptForCallLog(callLogId: string): Promise<CallTranscript | null> {
+        try {
+            return await this.pb.collection(COLLECTIONS.CALL_TRANSCRIPTS).getFirstListItem<CallTranscript>(
+                `call_log = "${callLogId}"`
+            );
+        } catch {
+            return null;
+        }
+    }
+
     async createTranscript(data: Partial<CallTranscript>): Promise<CallTranscript> {
         return await this.pb.collection(COLLECTIONS.CALL_TRANSCRIPTS).create<CallTranscript>(data);
     }
@@ -5,10 +5,17 @@ Shared SDK wrapper for Python applications (transcriber, insta-outreach-agent).
 Uses httpx for HTTP requests to PocketBase API.
 """
 
+import base64
+import hashlib
+import json
 import os
 import re
+import secrets
+import string
+import threading
+import time
 import httpx
-from typing import Optional, Dict, List, Any, TypedDict
+from typing import Optional, Dict, List, Any, Callable, TypedDict
 from datetime import datetime
 
 
@@ -91,7 +98,8 @@ class ColdCall(TypedDict, total=False):
 
 class CallTranscript(TypedDict, total=False):
     id: str
-    call: str  # Relation ID to cold_calls
+    call: str  # Relation ID to cold_calls (legacy workflow)
+    call_log: str  # Relation ID to call_logs
     transcript: str
     created: str
 
@@ -163,6 +171,7 @@ class PhoneNumber(TypedDict, total=False):
     id: str
     company: str  # Relation ID
     phone_number: str
+    phone_normalized: Optional[str]  # E.164, see normalize_phone()
     label: Optional[str]
     location_name: Optional[str]
     location_address: Optional[str]
@@ -243,6 +252,79 @@ class Recording(TypedDict, total=False):
     updated: str
 
 
+# ============================================================================
+# Phone Numbers
+# ============================================================================
+
+# Country code assumed for numbers written without one (NANP by default)
+DEFAULT_COUNTRY_CODE = os.getenv('PHONE_DEFAULT_COUNTRY_CODE', '1')
+
+_EXTENSION_RE = re.compile(r'\s*(?:ext\.?|extension|x|#)\s*\d+\s*$', re.IGNORECASE)
+
+
+def normalize_phone(phone: Optional[str], default_country_code: Optional[str] = None) -> Optional[str]:
+    """
+    Canonical E.164 form of a phone number ("+13105550101"), or None.
+
+    Punctuation, spaces and extensions are dropped. Numbers without a "+" or
+    "00" prefix are read as national numbers of default_country_code
+    (PHONE_DEFAULT_COUNTRY_CODE, default 1). Returns None when the result
+    can't be a full number (too short or longer than 15 digits).
+    """
+    if not phone:
+        return None
+    country_code = default_country_code or DEFAULT_COUNTRY_CODE
+    phone = _EXTENSION_RE.sub('', phone.strip())
+    digits = re.sub(r'\D', '', phone)
+
+    if phone.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif country_code == '1':
+        # NANP: 10-digit national numbers, or 11 digits with the leading 1
+        if len(digits) == 10:
+            digits = '1' + digits
+        elif not (len(digits) == 11 and digits.startswith('1')):
+            return None
+    else:
+        # Drop the national trunk prefix (e.g. 020... -> +4420...)
+        digits = country_code + digits.lstrip('0')
+
+    if not 8 <= len(digits) <= 15:
+        return None
+    return '+' + digits
+
+
+RECORD_ID_ALPHABET = string.ascii_lowercase + string.digits
+RECORD_ID_LENGTH = 15
+
+
+def generate_record_id() -> str:
+    """
+    New random record ID in PocketBase's default format (15 chars of [a-z0-9]).
+
+    Choosing IDs client-side lets one batch request create records that
+    reference each other.
+    """
+    return ''.join(secrets.choice(RECORD_ID_ALPHABET) for _ in range(RECORD_ID_LENGTH))
+
+
+def record_id_for(key: str) -> str:
+    """
+    Record ID derived from an idempotency key (same format as generate_record_id).
+
+    Creating a record under this ID twice fails instead of making a duplicate,
+    so a retried save can tell that an earlier attempt already went through.
+    """
+    value = int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16)
+    chars = []
+    for _ in range(RECORD_ID_LENGTH):
+        value, index = divmod(value, len(RECORD_ID_ALPHABET))
+        chars.append(RECORD_ID_ALPHABET[index])
+    return ''.join(chars)
+
+
 # ============================================================================
 # Collection Names
 # ============================================================================
@@ -270,6 +352,46 @@ COLLECTIONS = {
 }
 
 
+# ============================================================================
+# File Uploads
+# ============================================================================
+
+# Attempts at a file upload before giving up (each one starts from the beginning)
+UPLOAD_ATTEMPTS = 3
+
+
+class _ProgressReader:
+    """
+    Binary file wrapper that reports how much of it has been read.
+
+    httpx streams multipart file fields from the file object in 64 KB reads
+    (and rewinds it before every send), so wrapping the open file is enough to
+    follow an upload without loading it into memory.
+    """
+
+    def __init__(self, file, total: int, callback: Callable[[int, int], None]):
+        self._file = file
+        self._total = total
+        self._callback = callback
+        self._sent = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(size)
+        if chunk:
+            self._sent += len(chunk)
+            self._callback(self._sent, self._total)
+        return chunk
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        position = self._file.seek(offset, whence)
+        self._sent = position
+        return position
+
+    def __getattr__(self, name):
+        # fileno/tell/name: lets httpx size the upload without reading it
+        return getattr(self._file, name)
+
+
 # ============================================================================
 # PocketBase Client
 # ============================================================================
@@ -279,11 +401,21 @@ class CRMPocketBase:
     PocketBase client for CRM-Tableturnerr Python applications.
     """
 
-    def __init__(self, url: Optional[str] = None):
+    def __init__(self, url: Optional[str] = None, max_connections: int = 10):
         self.url = url or os.getenv('POCKETBASE_URL', 'http://localhost:8090')
         self.token: Optional[str] = None
         self.user: Optional[User] = None
-        self._client = httpx.Client(timeout=30.0)
+        # Connections are kept alive and reused across requests (and threads)
+        self._client = httpx.Client(
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0,
+            ),
+        )
+        self._admin_credentials: Optional[tuple] = None
+        self._auth_lock = threading.Lock()
 
     def _headers(self) -> Dict[str, str]:
         """Get request headers with auth token if available."""
@@ -292,43 +424,41 @@ class CRMPocketBase:
             headers['Authorization'] = self.token
         return headers
 
+    def _request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Send a request, re-authenticating once if an admin token was rejected."""
+        def send() -> httpx.Response:
+            headers = self._headers()
+            if 'files' in kwargs:
+                # httpx sets the multipart Content-Type (with its boundary)
+                del headers['Content-Type']
+            return self._client.request(method, f"{self.url}/api{endpoint}", headers=headers, **kwargs)
+
+        sent_token = self.token
+        response = send()
+        if response.status_code == 401 and sent_token and self._admin_credentials:
+            with self._auth_lock:
+                # Another thread may already have refreshed it
+                if self.token == sent_token:
+                    self.auth_as_admin(*self._admin_credentials)
+            response = send()
+        response.raise_for_status()
+        return response
+
     def _get(self, endpoint: str, params: Optional[Dict] = None) -> Any:
         """Make GET request to PocketBase API."""
-        response = self._client.get(
-            f"{self.url}/api{endpoint}",
-            headers=self._headers(),
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._request('GET', endpoint, params=params).json()
 
     def _post(self, endpoint: str, data: Dict) -> Any:
         """Make POST request to PocketBase API."""
-        response = self._client.post(
-            f"{self.url}/api{endpoint}",
-            headers=self._headers(),
-            json=data
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._request('POST', endpoint, json=data).json()
 
     def _patch(self, endpoint: str, data: Dict) -> Any:
         """Make PATCH request to PocketBase API."""
-        response = self._client.patch(
-            f"{self.url}/api{endpoint}",
-            headers=self._headers(),
-            json=data
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._request('PATCH', endpoint, json=data).json()
 
     def _delete(self, endpoint: str) -> bool:
         """Make DELETE request to PocketBase API."""
-        response = self._client.delete(
-            f"{self.url}/api{endpoint}",
-            headers=self._headers()
-        )
-        response.raise_for_status()
+        self._request('DELETE', endpoint)
         return True
 
     # -------------------------------------------------------------------------
@@ -336,12 +466,22 @@ class CRMPocketBase:
     # -------------------------------------------------------------------------
 
     def auth_as_admin(self, email: str, password: str) -> None:
-        """Authenticate as admin for server-side operations."""
-        result = self._post('/admins/auth-with-password', {
-            'identity': email,
-            'password': password
-        })
-        self.token = result['token']
+        """Authenticate as admin for server-side operations.
+
+        The credentials are kept so an expired token is renewed automatically.
+        """
+        # Superusers since PocketBase 0.23, admins before
+        for endpoint in ('/collections/_superusers/auth-with-password', '/admins/auth-with-password'):
+            response = self._client.post(
+                f"{self.url}/api{endpoint}",
+                headers={'Content-Type': 'application/json'},
+                json={'identity': email, 'password': password},
+            )
+            if response.status_code != 404:
+                break
+        response.raise_for_status()
+        self.token = response.json()['token']
+        self._admin_credentials = (email, password)
 
     def auth_with_password(self, email: str, password: str) -> User:
         """Authenticate user with email/password."""
@@ -357,12 +497,81 @@ class CRMPocketBase:
         """Clear authentication."""
         self.token = None
         self.user = None
+        self._admin_credentials = None
 
     @property
     def is_authenticated(self) -> bool:
         """Check if client is authenticated."""
         return self.token is not None
 
+    @property
+    def token_expires_at(self) -> Optional[float]:
+        """Expiry of the current token (Unix time), read from its JWT payload."""
+        if not self.token:
+            return None
+        try:
+            payload = self.token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    def token_expires_within(self, seconds: float) -> bool:
+        """True if there is no token or it expires in the next `seconds`."""
+        if not self.token:
+            return True
+        expires_at = self.token_expires_at
+        # Tokens we can't read are trusted until the server rejects them
+        return expires_at is not None and expires_at - time.time() < seconds
+
+    def ensure_admin_auth(self, email: str, password: str, margin: float = 300.0) -> None:
+        """Authenticate as admin unless the current token is valid for another `margin` seconds."""
+        with self._auth_lock:
+            if self.token_expires_within(margin) or self._admin_credentials != (email, password):
+                self.auth_as_admin(email, password)
+
+    def get_all_records(self, collection: str, fields: Optional[str] = None,
+                        per_page: int = 500) -> List[Dict]:
+        """Every record in a collection, fetched in large pages."""
+        records = []
+        page = 1
+        while True:
+            params = {'page': page, 'perPage': per_page, 'skipTotal': 1}
+            if fields:
+                params['fields'] = fields
+            items = self._get(f'/collections/{collection}/records', params).get('items', [])
+            records.extend(items)
+            if len(items) < per_page:
+                return records
+            page += 1
+
+    # -------------------------------------------------------------------------
+    # Batch
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def batch_create(collection: str, data: Dict) -> Dict:
+        """Create request for batch()."""
+        return {'method': 'POST', 'url': f'/api/collections/{collection}/records', 'body': data}
+
+    @staticmethod
+    def batch_update(collection: str, id: str, data: Dict) -> Dict:
+        """Update request for batch()."""
+        return {'method': 'PATCH', 'url': f'/api/collections/{collection}/records/{id}', 'body': data}
+
+    def batch(self, requests: List[Dict]) -> List[Dict]:
+        """
+        Run several create/update requests in one transaction (PocketBase 0.23+).
+
+        Either every request succeeds or none of them is applied. Requires
+        "Enable batch API" in the PocketBase settings.
+
+        Returns:
+            The resulting records, in request order.
+        """
+        results = self._post('/batch', {'requests': requests})
+        return [result.get('body') for result in results]
+
     # -------------------------------------------------------------------------
     # Companies
     # -------------------------------------------------------------------------
@@ -380,7 +589,20 @@ class CRMPocketBase:
         return self._get(f'/collections/{COLLECTIONS["COMPANIES"]}/records/{id}')
 
     def find_company_by_phone(self, phone: str) -> Optional[Company]:
-        """Find company by phone number."""
+        """Find company by phone number.
+
+        Tries an exact match on any of its normalised phone_numbers records
+        first, then falls back to searching the company's free-text phone field.
+        """
+        normalized = normalize_phone(phone)
+        if normalized:
+            result = self._get(f'/collections/{COLLECTIONS["COMPANIES"]}/records', {
+                'filter': f'phone_numbers_via_company.phone_normalized ?= "{normalized}"'
+            })
+            items = result.get('items', [])
+            if items:
+                return items[0]
+
         safe_phone = sanitize_filter_value(phone)
         result = self._get(f'/collections/{COLLECTIONS["COMPANIES"]}/records', {
             'filter': f'phone_numbers ~ "{safe_phone}"'
@@ -388,6 +610,46 @@ class CRMPocketBase:
         items = result.get('items', [])
         return items[0] if items else None
 
+    def find_company_and_phone_number(self, phone: str, text_fallback: bool = True) -> tuple:
+        """
+        Find the company and phone_numbers record for a phone number in one request.
+
+        Matches the normalised number exactly against the company's
+        phone_numbers records (an indexed lookup). If that finds nothing and
+        text_fallback is set, the free-text phone fields are searched as well,
+        for records saved before numbers were normalised.
+
+        Returns:
+            (Company or None, PhoneNumber or None)
+        """
+        normalized = normalize_phone(phone)
+        digits = re.sub(r'\D', '', phone)
+        filters = []
+        # A company can have several phone_numbers records: ?= / ?~ match any of them
+        if normalized:
+            filters.append(f'phone_numbers_via_company.phone_normalized ?= "{normalized}"')
+        if text_fallback or not normalized:
+            safe_phone = sanitize_filter_value(digits or phone)
+            filters.append(f'phone_numbers ~ "{safe_phone}" || '
+                           f'phone_numbers_via_company.phone_number ?~ "{safe_phone}"')
+
+        for filter_str in filters:
+            result = self._get(f'/collections/{COLLECTIONS["COMPANIES"]}/records', {
+                'filter': filter_str,
+                'expand': 'phone_numbers_via_company',
+            })
+            items = result.get('items', [])
+            for company in items:
+                records = company.pop('expand', {}).get('phone_numbers_via_company', [])
+                for record in records:
+                    if normalized and record.get('phone_normalized') == normalized:
+                        return company, record
+                    if digits and digits in re.sub(r'\D', '', record.get('phone_number', '')):
+                        return company, record
+            if items:
+                return items[0], None
+        return None, None
+
     def create_company(self, data: Dict) -> Company:
         """Create new company."""
         return self._post(f'/collections/{COLLECTIONS["COMPANIES"]}/records', data)
@@ -436,6 +698,15 @@ class CRMPocketBase:
         items = result.get('items', [])
         return items[0] if items else None
 
+    def get_transcript_for_call_log(self, call_log_id: str) -> Optional[CallTranscript]:
+        """Get transcript for a specific call log."""
+        safe_call_log_id = sanitize_filter_value(call_log_id)
+        result = self._get(f'/collections/{COLLECTIONS["CALL_TRANSCRIPTS"]}/records', {
+            'filter': f'call_log = "{safe_call_log_id}"'
+        })
+        items = result.get('items', [])
+        return items[0] if items else None
+
     def create_transcript(self, data: Dict) -> CallTranscript:
         """Create new transcript."""
         return self._post(f'/collections/{COLLECTIONS["CALL_TRANSCRIPTS"]}/records', data)
@@ -579,7 +850,16 @@ class CRMPocketBase:
         return result.get('items', [])
 
     def find_phone_number(self, phone: str) -> Optional[PhoneNumber]:
-        """Find phone number record by phone number."""
+        """Find phone number record by phone number (exact E.164 match first)."""
+        normalized = normalize_phone(phone)
+        if normalized:
+            result = self._get(f'/collections/{COLLECTIONS["PHONE_NUMBERS"]}/records', {
+                'filter': f'phone_normalized = "{normalized}"'
+            })
+            items = result.get('items', [])
+            if items:
+                return items[0]
+
         safe_phone = sanitize_filter_value(phone)
         result = self._get(f'/collections/{COLLECTIONS["PHONE_NUMBERS"]}/records', {
             'filter': f'phone_number ~ "{safe_phone}"'
@@ -690,10 +970,86 @@ class CRMPocketBase:
         result = self._get(f'/collections/{COLLECTIONS["RECORDINGS"]}/records', params)
         return result.get('items', [])
 
+    def get_recording(self, id: str, expand: Optional[str] = None) -> Recording:
+        """Get recording by ID."""
+        params = {}
+        if expand:
+            params['expand'] = expand
+        return self._get(f'/collections/{COLLECTIONS["RECORDINGS"]}/records/{id}', params)
+
     def update_recording(self, id: str, data: Dict) -> Recording:
         """Update recording."""
         return self._patch(f'/collections/{COLLECTIONS["RECORDINGS"]}/records/{id}', data)
 
+    def upload_recording(
+        self,
+        file_path: str,
+        data: Optional[Dict] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        attempts: int = UPLOAD_ATTEMPTS,
+    ) -> Recording:
+        """
+        Create a recording record with its audio file.
+
+        The file is streamed from disk as multipart form data, so even large
+        recordings are never held in memory. PocketBase can't resume a partial
+        upload, so a failed attempt (connection error, 5xx or 429) is retried
+        from the start after a short backoff.
+
+        Args:
+            file_path: Audio file to attach
+            data: Other recording fields (call_log, company, phone_number, ...).
+                With an 'id', a retry after an upload that actually went
+                through returns the existing record instead of failing.
+            on_progress: Called with (bytes_sent, total_bytes) as the file is sent
+            attempts: Upload attempts before giving up
+
+        Returns:
+            Recording: The created record
+        """
+        data = data or {}
+        # Multipart fields are plain strings
+        form = {
+            key: (str(value).lower() if isinstance(value, bool) else str(value))
+            for key, value in data.items() if value is not None
+        }
+        total = os.path.getsize(file_path)
+        filename = os.path.basename(file_path)
+        endpoint = f'/collections/{COLLECTIONS["RECORDINGS"]}/records'
+
+        for attempt in range(1, attempts + 1):
+            try:
+                with open(file_path, 'rb') as f:
+                    file = _ProgressReader(f, total, on_progress) if on_progress else f
+                    return self._request('POST', endpoint, data=form, files={'file': (filename, file)}).json()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                if status is not None and attempt > 1 and data.get('id'):
+                    # The previous attempt may have been stored before the connection dropped
+                    try:
+                        return self.get_recording(data['id'])
+                    except httpx.HTTPStatusError:
+                        pass
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == attempts:
+                    raise
+                time.sleep(2 ** (attempt - 1))
+
+    # -------------------------------------------------------------------------
+    # Server Administration (superuser only)
+    # -------------------------------------------------------------------------
+
+    def import_collections(self, collections: List[Dict], delete_missing: bool = False) -> None:
+        """Create or update collections from an exported schema (pb_schema_exported.json)."""
+        self._request('PUT', '/collections/import', json={
+            'collections': collections,
+            'deleteMissing': delete_missing,
+        })
+
+    def update_settings(self, data: Dict) -> Dict:
+        """Update application settings (e.g. {'batch': {'enabled': True}})."""
+        return self._patch('/settings', data)
+
     # -------------------------------------------------------------------------
     # Cleanup
     # -------------------------------------------------------------------------
@@ -709,6 +1065,145 @@ class CRMPocketBase:
         self.close()
 
 
+# ============================================================================
+# Phone Index
+# ============================================================================
+
+class PhoneIndex:
+    """
+    In-memory map from normalised phone number to company and phone record.
+
+    warm() loads every phone_numbers record and company phone field in a few
+    bulk requests; after that, caller-ID matching is a dictionary lookup.
+    Records saved through this process are added with add(). The index is
+    reloaded once it is older than max_age seconds, to pick up changes made
+    elsewhere. Only one thread reloads at a time; meanwhile the others keep
+    using the expired map, or wait if there is none (or it was invalidated).
+    """
+
+    PHONE_FIELDS = 'id,company,phone_number,phone_normalized,receptionist_name'
+    COMPANY_FIELDS = 'id,company_name,owner_name,phone_numbers'
+
+    def __init__(self, client: CRMPocketBase, max_age: float = 900.0):
+        self.client = client
+        self.max_age = max_age
+        self._companies: Dict[str, Company] = {}
+        self._phones: Dict[str, tuple] = {}  # E.164 -> (company id, PhoneNumber or None)
+        self._loaded_at: Optional[float] = None
+        self._stale = False  # Set by invalidate()
+        self._reloading = False
+        self._pending: List[tuple] = []  # add() calls made during a reload
+        self._lock = threading.Lock()
+        self._reloaded = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return len(self._phones)
+
+    @staticmethod
+    def _company_numbers(company: Company) -> List[str]:
+        """Normalised numbers in a company's free-text phone field."""
+        numbers = []
+        for raw in re.split(r'[,;/\n]', company.get('phone_numbers') or ''):
+            normalized = normalize_phone(raw)
+            if normalized:
+                numbers.append(normalized)
+        return numbers
+
+    @property
+    def is_warm(self) -> bool:
+        """True if the index is loaded, not invalidated and not older than max_age."""
+        return (self._loaded_at is not None and not self._stale
+                and time.monotonic() - self._loaded_at < self.max_age)
+
+    def warm(self) -> 'PhoneIndex':
+        """(Re)load the index from PocketBase, or wait for a reload already running."""
+        with self._lock:
+            if self._reloading:
+                while self._reloading:
+                    self._reloaded.wait()
+                return self
+            self._reloading = True
+            self._pending = []
+
+        company_map = phone_map = None
+        try:
+            companies = self.client.get_all_records(COLLECTIONS['COMPANIES'], self.COMPANY_FIELDS)
+            phones = self.client.get_all_records(COLLECTIONS['PHONE_NUMBERS'], self.PHONE_FIELDS)
+
+            company_map = {company['id']: company for company in companies}
+            phone_map = {}
+            # Free-text company numbers first, so phone records take precedence
+            for company in companies:
+                for normalized in self._company_numbers(company):
+                    phone_map.setdefault(normalized, (company['id'], None))
+            for record in phones:
+                normalized = record.get('phone_normalized') or normalize_phone(record.get('phone_number'))
+                if normalized and record.get('company') in company_map:
+                    phone_map[normalized] = (record['company'], record)
+        finally:
+            with self._lock:
+                if phone_map is not None:
+                    # Records added while the bulk requests ran may be missing from them
+                    for company, record in self._pending:
+                        self._insert(company_map, phone_map, company, record)
+                    self._companies = company_map
+                    self._phones = phone_map
+                    self._loaded_at = time.monotonic()
+                    self._stale = False
+                self._reloading = False
+                self._pending = []
+                self._reloaded.notify_all()
+        return self
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup."""
+        with self._lock:
+            self._stale = True
+
+    def lookup(self, phone: str) -> Optional[tuple]:
+        """
+        Company and phone record for a phone number.
+
+        Returns:
+            (Company, PhoneNumber or None), or None if the number is unknown
+            or can't be normalised
+        """
+        if not self.is_warm:
+            with self._lock:
+                # An expired map is good enough while another thread reloads
+                use_old = self._reloading and self._loaded_at is not None and not self._stale
+            if not use_old:
+                self.warm()
+        normalized = normalize_phone(phone)
+        if not normalized:
+            return None
+        with self._lock:
+            entry = self._phones.get(normalized)
+            if entry is None:
+                return None
+            company_id, record = entry
+            company = self._companies.get(company_id)
+            return (company, record) if company else None
+
+    def add(self, company: Company, record: Optional[PhoneNumber] = None) -> None:
+        """Record a company / phone number written by this process."""
+        with self._lock:
+            self._insert(self._companies, self._phones, company, record)
+            if self._reloading:
+                self._pending.append((company, record))
+
+    @classmethod
+    def _insert(cls, companies: Dict[str, Company], phones: Dict[str, tuple],
+                company: Company, record: Optional[PhoneNumber]) -> None:
+        companies[company['id']] = company
+        for normalized in cls._company_numbers(company):
+            phones.setdefault(normalized, (company['id'], None))
+        if record:
+            normalized = record.get('phone_normalized') or normalize_phone(record.get('phone_number'))
+            if normalized:
+                phones[normalized] = (company['id'], record)
+
+
 # ============================================================================
 # Convenience function
 # ============================================================================
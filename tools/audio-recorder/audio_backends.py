@@ -0,0 +1,480 @@
+"""
+Audio Backends
+
+Device enumeration and capture streams behind one small interface, so the
+recorder and auto-record listener can run against real hardware
+(sounddevice / soundcard), replayed WAV files or generated signals.
+
+Every backend exposes:
+    query_devices(device=None)  -> list of device dicts, or one dict by index
+    open_input(device, channels, samplerate, blocksize) -> stream
+
+Device dicts carry at least 'name' and 'max_input_channels' (the sounddevice
+shape). Streams are context managers with read(frames) returning
+(float32 array of shape (frames, channels), overflowed).
+
+For hot-plug support a backend may also implement device_signature(), a cheap
+token that changes when devices are added or removed, and rescan(), which makes
+the next query_devices() see the new device list.
+
+CaptureHub sits on top of a backend and shares one open stream per device
+between any number of consumers (recorder, level meters, beep detector).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.io.wavfile as wav
+from scipy.signal import resample_poly
+
+try:
+    import sounddevice as sd
+except ImportError:
+    sd = None
+
+try:
+    import soundcard as sc
+except (ImportError, OSError):
+    sc = None
+
+
+class AudioBackend:
+    """Base class for audio input backends."""
+
+    name = "base"
+
+    def query_devices(self, device: int = None):
+        """Return all devices, or a single device dict when an index is given."""
+        devices = self._devices()
+        if device is None:
+            return devices
+        return devices[device]
+
+    def _devices(self) -> list[dict]:
+        raise NotImplementedError
+
+    def open_input(self, device: int, channels: int, samplerate: int, blocksize: int):
+        """Open an input stream on a device."""
+        raise NotImplementedError
+
+    def device_signature(self):
+        """Cheap token that changes on device add/remove, or None if unsupported."""
+        return None
+
+    def rescan(self) -> bool:
+        """Reload the device list. Returns False if it can't be done right now."""
+        return True
+
+
+class _TrackedStream:
+    """Wraps a stream to count how many are open on a backend."""
+
+    def __init__(self, stream, backend):
+        self._stream = stream
+        self._backend = backend
+
+    def __enter__(self):
+        self._stream.__enter__()
+        with self._backend._lock:
+            self._backend._open_streams += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            return self._stream.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            with self._backend._lock:
+                self._backend._open_streams -= 1
+
+    def read(self, frames: int):
+        return self._stream.read(frames)
+
+
+class SoundDeviceBackend(AudioBackend):
+    """PortAudio devices through the sounddevice package."""
+
+    name = "sounddevice"
+
+    def __init__(self):
+        if sd is None:
+            raise RuntimeError("sounddevice is not installed")
+        self._lock = threading.Lock()
+        self._open_streams = 0
+
+    def query_devices(self, device: int = None):
+        if device is None:
+            return list(sd.query_devices())
+        return sd.query_devices(device)
+
+    def open_input(self, device: int, channels: int, samplerate: int, blocksize: int):
+        return _TrackedStream(sd.InputStream(
+            device=device,
+            samplerate=samplerate,
+            channels=channels,
+            dtype='float32',
+            blocksize=blocksize
+        ), self)
+
+    def device_signature(self):
+        # waveIn/waveOut device counts are a cheap hot-plug indicator on Windows
+        if sys.platform != "win32":
+            return None
+        try:
+            import ctypes
+            winmm = ctypes.windll.winmm
+            return (winmm.waveInGetNumDevs(), winmm.waveOutGetNumDevs())
+        except Exception:
+            return None
+
+    def rescan(self) -> bool:
+        # PortAudio only enumerates devices at initialisation, and
+        # re-initialising would kill open streams
+        with self._lock:
+            if self._open_streams:
+                return False
+            sd._terminate()
+            sd._initialize()
+        return True
+
+
+class _SoundCardStream:
+    """Adapts a soundcard recorder to the read() stream interface."""
+
+    def __init__(self, recorder):
+        self._recorder = recorder
+
+    def __enter__(self):
+        self._recorder.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._recorder.__exit__(exc_type, exc_val, exc_tb)
+
+    def read(self, frames: int):
+        data = self._recorder.record(numframes=frames)
+        return data.astype(np.float32, copy=False), False
+
+
+class SoundCardBackend(AudioBackend):
+    """WASAPI / PulseAudio / CoreAudio devices through the soundcard package.
+
+    Loopback capture works without Stereo Mix: soundcard exposes every
+    speaker as a loopback "microphone", which is named with a "(Loopback)"
+    suffix so the recorder's keyword classification picks it up.
+    """
+
+    name = "soundcard"
+
+    def __init__(self):
+        if sc is None:
+            raise RuntimeError("soundcard is not installed")
+
+    def _mics(self):
+        return sc.all_microphones(include_loopback=True)
+
+    def _devices(self) -> list[dict]:
+        devices = []
+        for mic in self._mics():
+            name = mic.name
+            if getattr(mic, 'isloopback', False):
+                name = f"{name} (Loopback)"
+            devices.append({'name': name, 'max_input_channels': mic.channels})
+        return devices
+
+    def open_input(self, device: int, channels: int, samplerate: int, blocksize: int):
+        mic = self._mics()[device]
+        return _SoundCardStream(
+            mic.recorder(samplerate=samplerate, channels=channels, blocksize=blocksize)
+        )
+
+
+class _GeneratedStream:
+    """Stream that produces blocks from a generator, optionally paced to real time."""
+
+    def __init__(self, generate, channels: int, samplerate: int, realtime: bool):
+        self._generate = generate  # (start_frame, frames) -> mono float32
+        self.channels = channels
+        self.samplerate = samplerate
+        self.realtime = realtime
+        self._position = 0
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def read(self, frames: int):
+        mono = self._generate(self._position, frames)
+        self._position += frames
+
+        if self.realtime:
+            # Block like a device would until this chunk has "arrived"
+            due = self._started + self._position / self.samplerate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        data = np.repeat(mono[:, None], self.channels, axis=1) if self.channels > 1 else mono[:, None]
+        return data.astype(np.float32, copy=False), False
+
+
+class FileReplayBackend(AudioBackend):
+    """Replays WAV files as input devices.
+
+    Takes a mapping of device name to WAV path, e.g.
+    {"Microphone": "mic.wav", "Stereo Mix": "desk.wav"}. Device names go
+    through the same keyword classification as real devices. After the end
+    of a file the stream loops, or returns silence when loop=False.
+    """
+
+    name = "replay"
+
+    def __init__(self, files: dict, realtime: bool = True, loop: bool = False):
+        self.files = {name: Path(path) for name, path in files.items()}
+        self.realtime = realtime
+        self.loop = loop
+        self._audio = {}
+
+    def _devices(self) -> list[dict]:
+        return [{'name': name, 'max_input_channels': 1} for name in self.files]
+
+    def _load(self, name: str, samplerate: int) -> np.ndarray:
+        key = (name, samplerate)
+        if key not in self._audio:
+            rate, audio = wav.read(str(self.files[name]))
+            if audio.dtype == np.int16:
+                audio = audio.astype(np.float32) / 32768.0
+            else:
+                audio = audio.astype(np.float32)
+            if audio.ndim > 1:
+                audio = audio.mean(axis=1)
+            if rate != samplerate:
+                audio = resample_poly(audio, samplerate, rate).astype(np.float32)
+            self._audio[key] = audio
+        return self._audio[key]
+
+    def open_input(self, device: int, channels: int, samplerate: int, blocksize: int):
+        name = list(self.files)[device]
+        audio = self._load(name, samplerate)
+
+        def generate(start: int, frames: int) -> np.ndarray:
+            if len(audio) == 0:
+                return np.zeros(frames, dtype=np.float32)
+            if self.loop:
+                return np.take(audio, np.arange(start, start + frames), mode='wrap')
+            block = audio[start:start + frames]
+            if len(block) < frames:
+                block = np.concatenate([block, np.zeros(frames - len(block), dtype=np.float32)])
+            return block
+
+        return _GeneratedStream(generate, channels, samplerate, self.realtime)
+
+
+def speech_like(samplerate: int, seed: int = 0):
+    """Generator for voiced-harmonic bursts at a syllable rate, plus a noise floor."""
+    rng = np.random.default_rng(seed)
+
+    def generate(start: int, frames: int) -> np.ndarray:
+        t = np.arange(start, start + frames) / samplerate
+        voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 8))
+        envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+        return (0.2 * voiced * envelope + rng.normal(0, 0.005, frames)).astype(np.float32)
+    return generate
+
+
+def ringback(samplerate: int, seed: int = 0):
+    """Generator for the 440 + 480 Hz calling tone (2 s on, 4 s off) over light noise."""
+    rng = np.random.default_rng(seed)
+
+    def generate(start: int, frames: int) -> np.ndarray:
+        t = np.arange(start, start + frames) / samplerate
+        tone = 0.1 * (np.sin(2 * np.pi * 440 * t) + np.sin(2 * np.pi * 480 * t))
+        tone *= (t % 6.0) < 2.0
+        return (tone + rng.normal(0, 0.002, frames)).astype(np.float32)
+    return generate
+
+
+class SyntheticBackend(AudioBackend):
+    """Generated input devices for tests and throughput runs.
+
+    By default exposes a speech-like "Synthetic Microphone" and a
+    "Synthetic Stereo Mix" playing the calling tone cadence. Pass
+    generators={name: factory(samplerate) -> generate(start, frames)} to
+    define other devices.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, generators: dict = None, realtime: bool = True):
+        self.generators = generators or {
+            "Synthetic Microphone": speech_like,
+            "Synthetic Stereo Mix": ringback,
+        }
+        self.realtime = realtime
+
+    def _devices(self) -> list[dict]:
+        return [{'name': name, 'max_input_channels': 1} for name in self.generators]
+
+    def open_input(self, device: int, channels: int, samplerate: int, blocksize: int):
+        factory = list(self.generators.values())[device]
+        return _GeneratedStream(factory(samplerate), channels, samplerate, self.realtime)
+
+
+class _SharedCapture:
+    """One open input stream and the subscribers it feeds."""
+
+    def __init__(self, hub: "CaptureHub", device: int):
+        self.hub = hub
+        self.device = device
+        self.subscribers = {}  # token -> callback(block)
+        # Held while a block is dispatched, so subscribe(prime=...) and
+        # unsubscribe() are atomic with respect to the block stream. Reentrant
+        # so a callback can unsubscribe itself.
+        self.dispatch_lock = threading.RLock()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        hub = self.hub
+        try:
+            info = hub.backend.query_devices(self.device)
+            channels = max(1, min(info['max_input_channels'], 2))
+            with hub.backend.open_input(
+                self.device, channels=channels,
+                samplerate=hub.samplerate, blocksize=hub.blocksize
+            ) as stream:
+                while self.running:
+                    data, _ = stream.read(hub.blocksize)
+                    # Streams hand out a fresh array per read, so the mono block
+                    # is never overwritten and can be shared without copying
+                    block = data.mean(axis=1) if channels > 1 else data[:, 0]
+                    block.flags.writeable = False
+                    with self.dispatch_lock:
+                        for callback in list(self.subscribers.values()):
+                            try:
+                                callback(block)
+                            except Exception as e:
+                                print(f"Capture subscriber error: {e}")
+        except Exception as e:
+            print(f"Capture error (device {self.device}): {e}")
+        finally:
+            self.running = False
+            hub._closed(self)
+
+
+class CaptureHub:
+    """Fans one input stream per device out to many subscribers.
+
+    The first subscribe() on a device opens its stream on a reader thread;
+    the last unsubscribe() closes it. Every subscriber's callback is called
+    from the reader thread with the same read-only mono float32 block, so
+    callbacks must be quick (hand work off to another thread if needed).
+    """
+
+    def __init__(self, backend: AudioBackend, samplerate: int, blocksize: int):
+        self.backend = backend
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self._captures = {}  # device -> _SharedCapture
+        self._lock = threading.Lock()
+        self._next_token = 0
+
+    def subscribe(self, device: int, callback, prime=None) -> tuple:
+        """Start receiving blocks from a device. Returns a token for unsubscribe().
+
+        prime, if given, is called with no arguments while the stream is
+        between blocks and before callback sees its first block. Whatever
+        prime captures (e.g. a pre-roll buffer fed by another subscriber) is
+        therefore followed seamlessly by the first live block.
+        """
+        while True:
+            with self._lock:
+                capture = self._captures.get(device)
+                if capture is None:
+                    capture = _SharedCapture(self, device)
+                    self._captures[device] = capture
+                    capture.thread.start()
+                self._next_token += 1
+                token = (device, self._next_token)
+
+            with capture.dispatch_lock:
+                if capture.running:
+                    if prime is not None:
+                        prime()
+                    capture.subscribers[token] = callback
+                    return token
+
+            # Raced with the last unsubscribe or a stream error; let the old
+            # stream close before opening a new one
+            self._forget(capture)
+
+    def unsubscribe(self, token: tuple):
+        """Stop receiving blocks. No callback runs for this token once this returns.
+
+        Closes the device's stream when its last subscriber leaves.
+        """
+        with self._lock:
+            capture = self._captures.get(token[0])
+        if capture is None:
+            return
+
+        with capture.dispatch_lock:
+            capture.subscribers.pop(token, None)
+            if capture.subscribers:
+                return
+            capture.running = False
+        self._forget(capture)
+
+    def is_open(self, device: int) -> bool:
+        """Whether a stream is currently open on the device."""
+        with self._lock:
+            return device in self._captures
+
+    def _forget(self, capture: _SharedCapture):
+        """Drop a stopped capture and wait for its stream to close.
+
+        Waiting lets the device be reopened straight away (exclusive-mode
+        devices refuse a second open).
+        """
+        self._closed(capture)
+        if capture.thread is not threading.current_thread():
+            capture.thread.join(timeout=2)
+
+    def _closed(self, capture: _SharedCapture):
+        """Forget a capture whose reader thread has exited (e.g. on error)."""
+        with self._lock:
+            if self._captures.get(capture.device) is capture:
+                del self._captures[capture.device]
+
+
+BACKENDS = {
+    SoundDeviceBackend.name: SoundDeviceBackend,
+    SoundCardBackend.name: SoundCardBackend,
+    FileReplayBackend.name: FileReplayBackend,
+    SyntheticBackend.name: SyntheticBackend,
+}
+
+
+def create_backend(name: str = None, **kwargs) -> AudioBackend | None:
+    """Create a backend by name.
+
+    Without a name, returns the first available hardware backend
+    (sounddevice, then soundcard), or None if neither is installed.
+    """
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown audio backend: {name} (choose from {', '.join(BACKENDS)})")
+        return BACKENDS[name](**kwargs)
+
+    for backend_class in (SoundDeviceBackend, SoundCardBackend):
+        try:
+            return backend_class()
+        except RuntimeError:
+            continue
+    return None
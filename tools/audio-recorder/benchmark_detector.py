@@ -0,0 +1,253 @@
+"""
+Beep Detector Benchmark
+
+Replays WAV clips through AutoRecordListener's detection pipeline without any
+audio hardware and reports per-block CPU cost, detection latency and the
+false-positive / false-negative rates.
+
+Usage:
+    python benchmark_detector.py --positive fixtures/positive --negative fixtures/negative
+    python benchmark_detector.py --synthetic
+    python benchmark_detector.py --synthetic --realtime --json
+
+Clips in the positive folder must contain a calling beep; clips in the negative
+folder must not. An optional labels.json in the positive folder maps file names
+to the beep onset in seconds ({"call_01.wav": 3.2}) so latency is measured from
+the onset; without it latency is measured from the start of the clip.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.io.wavfile as wav
+from scipy.signal import resample_poly
+
+from recorder import AutoRecordListener, CALLING_BEEP_FILE, CHUNK_SIZE, SAMPLE_RATE
+
+
+def load_clip(path: Path) -> np.ndarray:
+    """Load a WAV file as mono float32 at SAMPLE_RATE."""
+    sample_rate, audio = wav.read(str(path))
+    if audio.dtype == np.int16:
+        audio = audio.astype(np.float32) / 32768.0
+    elif audio.dtype == np.int32:
+        audio = audio.astype(np.float32) / 2147483648.0
+    elif audio.dtype == np.uint8:
+        audio = (audio.astype(np.float32) - 128) / 128.0
+    else:
+        audio = audio.astype(np.float32)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sample_rate != SAMPLE_RATE:
+        audio = resample_poly(audio, SAMPLE_RATE, sample_rate).astype(np.float32)
+    return audio
+
+
+def load_fixtures(folder: Path, positive: bool) -> list[dict]:
+    """Load every WAV in a folder as labelled clips."""
+    labels = {}
+    labels_file = folder / "labels.json"
+    if labels_file.exists():
+        with open(labels_file, 'r') as f:
+            labels = json.load(f)
+
+    clips = []
+    for path in sorted(folder.glob("*.wav")):
+        clips.append({
+            "name": path.name,
+            "audio": load_clip(path),
+            "positive": positive,
+            "onset": float(labels.get(path.name, 0.0)) if positive else None,
+        })
+    return clips
+
+
+def synthetic_fixtures(seed: int = 0) -> list[dict]:
+    """Build labelled clips from the bundled beep plus generated negatives."""
+    rng = np.random.default_rng(seed)
+    beep = load_clip(CALLING_BEEP_FILE)
+    t = np.arange(SAMPLE_RATE * 8) / SAMPLE_RATE
+
+    def noise(level, seconds):
+        return rng.normal(0, level, int(SAMPLE_RATE * seconds)).astype(np.float32)
+
+    clips = []
+    for gain, noise_level in [(1.0, 0.0), (0.3, 0.005), (2.0, 0.02), (1.0, 0.05), (0.5, 0.1)]:
+        lead = 1.0 + rng.random() * 2
+        audio = np.concatenate([noise(noise_level, lead), beep * gain, noise(noise_level, 4.0)])
+        audio = audio + noise(noise_level, len(audio) / SAMPLE_RATE)[:len(audio)]
+        clips.append({
+            "name": f"beep_gain{gain}_noise{noise_level}",
+            "audio": audio.astype(np.float32),
+            "positive": True,
+            "onset": lead,
+        })
+
+    # Speech-like: voiced harmonics with a syllable-rate envelope
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 8))
+    speech = 0.2 * voiced * np.clip(np.sin(2 * np.pi * 4 * t), 0, None) + noise(0.01, 8)
+    # Music-like: a sustained A-major chord (includes 440 Hz with other partials)
+    chord = sum(0.1 * np.sin(2 * np.pi * f * t) for f in (440, 554.4, 659.3, 880))
+    # DTMF "5" (770 + 1336 Hz), 100 ms on / 100 ms off
+    dtmf = (0.2 * (np.sin(2 * np.pi * 770 * t) + np.sin(2 * np.pi * 1336 * t))
+            * ((t * 5) % 1 < 0.5))
+    negatives = {
+        "silence": np.zeros_like(t),
+        "white_noise": noise(0.1, 8),
+        "speech_like": speech,
+        "tone_1khz": 0.3 * np.sin(2 * np.pi * 1000 * t),
+        "music_chord": chord,
+        "dtmf": dtmf,
+    }
+    for name, audio in negatives.items():
+        clips.append({
+            "name": name,
+            "audio": np.asarray(audio, dtype=np.float32),
+            "positive": False,
+            "onset": None,
+        })
+    return clips
+
+
+def run_clip(listener: AutoRecordListener, audio: np.ndarray, realtime: bool = False) -> dict:
+    """Replay one clip block by block through a fresh detector state."""
+    listener.reset_detection()
+    block_times = []
+    detected_at = None
+    block_seconds = CHUNK_SIZE / SAMPLE_RATE
+    start = time.perf_counter()
+
+    # The detector logs every check; keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, offset in enumerate(range(0, len(audio) - CHUNK_SIZE + 1, CHUNK_SIZE)):
+            block = audio[offset:offset + CHUNK_SIZE]
+            t0 = time.perf_counter()
+            confirmed = listener._process_block(block)
+            block_times.append(time.perf_counter() - t0)
+
+            if confirmed and detected_at is None:
+                detected_at = (offset + CHUNK_SIZE) / SAMPLE_RATE
+
+            if realtime:
+                # Pace like a live stream: block i is due at (i + 1) * block_seconds
+                delay = start + (i + 1) * block_seconds - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    return {"detected_at": detected_at, "block_times": block_times}
+
+
+def summarize(results: list[dict], audio_seconds: float) -> dict:
+    """Aggregate per-clip results into the report."""
+    all_blocks = np.concatenate([r["block_times"] for r in results]) * 1000
+    positives = [r for r in results if r["positive"]]
+    negatives = [r for r in results if not r["positive"]]
+    latencies = [r["latency"] for r in positives if r["latency"] is not None]
+
+    return {
+        "clips": len(results),
+        "blocks": int(len(all_blocks)),
+        "block_ms_mean": float(all_blocks.mean()) if len(all_blocks) else 0.0,
+        "block_ms_p50": float(np.percentile(all_blocks, 50)) if len(all_blocks) else 0.0,
+        "block_ms_p95": float(np.percentile(all_blocks, 95)) if len(all_blocks) else 0.0,
+        "block_ms_max": float(all_blocks.max()) if len(all_blocks) else 0.0,
+        "realtime_factor": audio_seconds / (all_blocks.sum() / 1000) if all_blocks.sum() else 0.0,
+        "false_negative_rate": (
+            sum(1 for r in positives if not r["detected"]) / len(positives) if positives else 0.0
+        ),
+        "false_positive_rate": (
+            sum(1 for r in negatives if r["detected"]) / len(negatives) if negatives else 0.0
+        ),
+        "latency_mean_s": float(np.mean(latencies)) if latencies else None,
+        "latency_max_s": float(np.max(latencies)) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the calling-beep detector on labelled WAV clips",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument('--positive', type=Path, help="Folder of clips that contain a beep")
+    parser.add_argument('--negative', type=Path, help="Folder of clips without a beep")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="Add generated clips built from calling_beep.wav")
+    parser.add_argument('--realtime', action='store_true',
+                        help="Pace playback at real time instead of as fast as possible")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    clips = []
+    if args.positive:
+        clips += load_fixtures(args.positive, positive=True)
+    if args.negative:
+        clips += load_fixtures(args.negative, positive=False)
+    if args.synthetic or not clips:
+        clips += synthetic_fixtures()
+
+    listener = AutoRecordListener(None, CALLING_BEEP_FILE)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not listener.load_reference():
+            print(f"Could not load reference beep: {CALLING_BEEP_FILE}", file=sys.stderr)
+            return 1
+
+    results = []
+    audio_seconds = 0.0
+    for clip in clips:
+        run = run_clip(listener, clip["audio"], realtime=args.realtime)
+        detected = run["detected_at"] is not None
+        latency = None
+        if clip["positive"] and detected:
+            latency = run["detected_at"] - clip["onset"]
+        audio_seconds += len(run["block_times"]) * CHUNK_SIZE / SAMPLE_RATE
+        results.append({
+            "name": clip["name"],
+            "positive": clip["positive"],
+            "detected": detected,
+            "latency": latency,
+            "block_times": np.array(run["block_times"]),
+        })
+
+    summary = summarize(results, audio_seconds)
+
+    if args.json:
+        print(json.dumps({
+            "summary": summary,
+            "clips": [
+                {k: v for k, v in r.items() if k != "block_times"}
+                for r in results
+            ],
+        }, indent=2))
+        return 0
+
+    print(f"{'Clip':<32} {'Label':<9} {'Result':<9} {'Latency':>8} {'ms/block':>9}")
+    print("-" * 71)
+    for r in results:
+        label = "beep" if r["positive"] else "no beep"
+        correct = r["detected"] == r["positive"]
+        result = ("ok" if correct else ("MISS" if r["positive"] else "FALSE+"))
+        latency = f"{r['latency']:.2f}s" if r["latency"] is not None else "-"
+        print(f"{r['name'][:32]:<32} {label:<9} {result:<9} {latency:>8} "
+              f"{r['block_times'].mean() * 1000:>9.3f}")
+
+    print("-" * 71)
+    print(f"Blocks: {summary['blocks']}  "
+          f"mean {summary['block_ms_mean']:.3f} ms  p95 {summary['block_ms_p95']:.3f} ms  "
+          f"max {summary['block_ms_max']:.3f} ms  ({summary['realtime_factor']:.0f}x real time)")
+    print(f"False negative rate: {summary['false_negative_rate']:.0%}  "
+          f"False positive rate: {summary['false_positive_rate']:.0%}")
+    if summary["latency_mean_s"] is not None:
+        print(f"Detection latency: mean {summary['latency_mean_s']:.2f}s  "
+              f"max {summary['latency_max_s']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,27 +5,24 @@ Records microphone, desktop audio, or both with a simple UI.
 """
 
 import json
+import math
 import os
+import queue
 import subprocess
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import time
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import NamedTuple
 import numpy as np
 import scipy.io.wavfile as wav
+from scipy.signal import resample_poly
 from pydub import AudioSegment
 
-try:
-    import sounddevice as sd
-except ImportError:
-    sd = None
-
-try:
-    import soundcard as sc
-except (ImportError, OSError):
-    sc = None
+from audio_backends import AudioBackend, CaptureHub, FileReplayBackend, create_backend, BACKENDS
 
 try:
     import keyboard
@@ -39,6 +36,26 @@ CONFIG_FILE = Path(__file__).parent / "config.json"
 DEFAULT_HOTKEY = "alt+r"
 DEFAULT_SAVE_DIR = str(Path(__file__).parent / "recordings")
 
+# Output layouts: "mixed" (mono mixdown), "stereo" (mic left, system right),
+# "stems" (separate mic/system files plus the mixed preview)
+OUTPUT_MODES = ("mixed", "stereo", "stems")
+DEFAULT_OUTPUT_MODE = "mixed"
+
+OUTPUT_MODE_LABELS = {
+    "mixed": "Mixed (mono)",
+    "stereo": "Stereo (mic left, system right)",
+    "stems": "Separate stems + mixed preview",
+}
+
+# Silence handling
+DEFAULT_MIN_SILENCE_SECONDS = 3.0  # Silences longer than this get trimmed
+KEEP_SILENCE_SECONDS = 0.5  # Silence left in place of each trimmed gap
+SILENCE_LEVEL = 0.005  # Lowest silence threshold, for digitally quiet sources
+NOISE_FLOOR_CEILING = 0.01  # -40 dBFS: only frames below this are treated as noise
+MAX_SILENCE_THRESHOLD = 0.03  # ~-30 dBFS: frames louder than this are never silence
+NOISE_WINDOW_SECONDS = 10.0  # Auto-stop estimates each source's noise floor over this window
+NOISE_PERCENTILE = 20  # Quietest fifth of recent blocks: the floor without pauses in speech
+
 
 def get_resource_path(relative_path: str) -> Path:
     """Get absolute path to resource, works for dev and PyInstaller."""
@@ -63,6 +80,11 @@ def load_config() -> dict:
         "hotkey": DEFAULT_HOTKEY,
         "save_mode": "default",  # "default" (recordings folder), "ask" or "auto"
         "save_dir": DEFAULT_SAVE_DIR,
+        "output_mode": DEFAULT_OUTPUT_MODE,
+        "audio_backend": "sounddevice",
+        "trim_silence": False,
+        "min_silence_seconds": DEFAULT_MIN_SILENCE_SECONDS,
+        "auto_stop_silence_seconds": 0,  # 0 = never auto-stop
         "auto_record_enabled": False
     }
 
@@ -76,6 +98,92 @@ def save_config(config: dict):
         print(f"Failed to save config: {e}")
 
 
+def normalize_audio(audio: np.ndarray, peak: float = 0.95) -> np.ndarray:
+    """Scale audio so its loudest sample sits at the given peak."""
+    max_val = np.abs(audio).max() if len(audio) else 0
+    if max_val > 0:
+        return audio / max_val * peak
+    return audio
+
+
+def detect_voice_activity(audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                          frame_seconds: float = 0.02,
+                          hangover_seconds: float = 0.3) -> np.ndarray:
+    """Energy / zero-crossing voice activity detection.
+
+    Returns one boolean per frame_seconds frame, computed for the whole signal
+    at once. The energy threshold adapts to the noise floor of the frames that
+    are actually quiet, so a steady loud track (hold music, a tone) is never
+    mistaken for silence.
+    """
+    frame = int(sample_rate * frame_seconds)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool)
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+
+    # Noise floor from the quiet frames only; a track with none has no noise to adapt to
+    quiet = energy[energy < NOISE_FLOOR_CEILING]
+    noise_floor = np.median(quiet) if len(quiet) else 0.0
+    # A few times the noise floor, between digital near-silence and the absolute cap
+    threshold = min(max(noise_floor * 3, SILENCE_LEVEL), MAX_SILENCE_THRESHOLD)
+    active = energy > threshold
+    # Quieter frames with many zero crossings are likely unvoiced consonants;
+    # this only ever adds activity, it never marks a loud frame silent
+    active |= (energy > threshold / 2) & (zcr > 0.25)
+
+    # Hangover: keep frames next to speech so word edges aren't clipped
+    hang = int(hangover_seconds / frame_seconds)
+    if hang:
+        active = np.convolve(active, np.ones(2 * hang + 1), mode='same') > 0
+    return active
+
+
+def find_silences(tracks: list[np.ndarray], min_silence: float,
+                  keep_silence: float = KEEP_SILENCE_SECONDS,
+                  sample_rate: int = SAMPLE_RATE,
+                  frame_seconds: float = 0.02) -> list[tuple[int, int]]:
+    """Sample ranges to cut where every track is silent for at least min_silence.
+
+    keep_silence seconds of each gap are left in place (split between both
+    ends) so the result still sounds natural.
+    """
+    tracks = [t for t in tracks if t is not None and len(t)]
+    if not tracks:
+        return []
+
+    masks = [detect_voice_activity(t, sample_rate, frame_seconds) for t in tracks]
+    n_frames = min(len(m) for m in masks)
+    active = np.zeros(n_frames, dtype=bool)
+    for mask in masks:
+        active |= mask[:n_frames]
+
+    # Runs of inactive frames as [start, end) pairs
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], (~active).astype(np.int8), [0]))))
+    frame = int(sample_rate * frame_seconds)
+    min_frames = int(min_silence / frame_seconds)
+    keep_frames = int(keep_silence / frame_seconds / 2)
+
+    cuts = []
+    for start, end in zip(edges[0::2], edges[1::2]):
+        if end - start >= min_frames and end - start > 2 * keep_frames:
+            cuts.append(((start + keep_frames) * frame, (end - keep_frames) * frame))
+    return cuts
+
+
+def remove_ranges(audio: np.ndarray, cuts: list[tuple[int, int]]) -> np.ndarray:
+    """Drop the given sample ranges from a signal."""
+    if not cuts:
+        return audio
+    keep = np.ones(len(audio), dtype=bool)
+    for start, end in cuts:
+        keep[start:end] = False
+    return audio[keep]
+
+
 class HotkeyDialog(tk.Toplevel):
     """Dialog for capturing a new hotkey."""
 
@@ -564,11 +672,165 @@ class CallDetectedDialog(tk.Toplevel):
             self.callback("no_15s")
 
 
+class RingBuffer:
+    """Fixed-size sliding window over a stream of samples.
+
+    Every sample is written twice (at i and i + capacity), so the most recent
+    window is always a single contiguous slice of the backing array. Writes
+    cost O(block) and reads are zero-copy views - no np.roll per chunk.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=dtype)
+        self._pos = 0  # Next write index in [0, capacity)
+        self._energy = 0.0  # Running sum of squares over the window
+        self._since_resync = 0
+        self.total_written = 0
+
+    def write(self, block: np.ndarray):
+        """Append samples, dropping the oldest ones."""
+        n = len(block)
+        if n == 0:
+            return
+        self.total_written += n
+        if n >= self.capacity:
+            block = block[-self.capacity:]
+            n = self.capacity
+
+        # Samples about to fall out of the window
+        outgoing = self.latest(self.capacity)[:n]
+        self._energy += float(np.dot(block, block)) - float(np.dot(outgoing, outgoing))
+
+        cap = self.capacity
+        first = min(n, cap - self._pos)
+        self._data[self._pos:self._pos + first] = block[:first]
+        self._data[self._pos + cap:self._pos + cap + first] = block[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = block[first:]
+            self._data[cap:cap + rest] = block[first:]
+        self._pos = (self._pos + n) % cap
+
+        # Re-sum once per lap so float error in the running energy can't build up
+        self._since_resync += n
+        if self._since_resync >= cap:
+            window = self.view()
+            self._energy = float(np.dot(window, window))
+            self._since_resync = 0
+
+    def latest(self, n: int) -> np.ndarray:
+        """Return a read-only view of the newest n samples, oldest first."""
+        n = min(n, self.capacity)
+        end = self._pos + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def view(self) -> np.ndarray:
+        """Return a read-only view of the whole window, oldest first."""
+        return self.latest(self.capacity)
+
+    def rms(self) -> float:
+        """RMS level of the whole window (kept up to date on each write)."""
+        return float(np.sqrt(max(self._energy, 0.0) / self.capacity))
+
+
+class ToneDetector:
+    """Streaming detector for a narrow tone band (Goertzel-style).
+
+    Evaluates the windowed DFT only at a few probe frequencies spread across
+    the band, using a precomputed window and basis. Each block costs
+    O(block * probes) instead of a full FFT over the analysis window.
+    """
+
+    def __init__(self, frequency: float, tolerance: float, block_size: int,
+                 sample_rate: int = SAMPLE_RATE, probes: int = 5):
+        self.sample_rate = sample_rate
+        self.frequencies = np.linspace(frequency - tolerance, frequency + tolerance, probes)
+        self._bases = {}
+        self._basis_for(block_size)
+
+    def _basis_for(self, block_size: int):
+        """Precompute (basis, window, scale) for a block length."""
+        if block_size not in self._bases:
+            window = np.hanning(block_size)
+            n = np.arange(block_size)
+            basis = np.exp(-2j * np.pi * np.outer(self.frequencies, n) / self.sample_rate) * window
+            # Scale so a pure tone sitting on a probe frequency reads 1.0
+            scale = 2 * np.dot(window, window) / window.sum() ** 2
+            self._bases[block_size] = (
+                basis.astype(np.complex64), window.astype(np.float32), scale
+            )
+        return self._bases[block_size]
+
+    def process(self, block: np.ndarray) -> float:
+        """Return the fraction of the block's energy inside the tone band (0-1)."""
+        basis, window, scale = self._basis_for(len(block))
+        windowed = block * window
+        energy = float(np.dot(windowed, windowed))
+        if energy < 1e-12:
+            return 0.0
+        power = np.abs(basis @ block) ** 2
+        return min(1.0, float(power.max()) * scale / energy)
+
+
+class MatchedFilter:
+    """Streaming normalised cross-correlation against a fixed reference.
+
+    The reference spectrum is computed once. Incoming samples are correlated
+    with overlap-save FFT blocks, and each lag is divided by the reference and
+    local signal energies. The result is a correlation coefficient (0-1) that
+    does not depend on input level.
+    """
+
+    def __init__(self, reference: np.ndarray):
+        ref = reference.astype(np.float64) - reference.mean()
+        self.ref_len = len(ref)
+        self.fft_size = 1 << int(np.ceil(np.log2(2 * self.ref_len)))
+        self.hop = self.fft_size - self.ref_len + 1  # New samples per FFT block
+        self._ref_norm = float(np.linalg.norm(ref))
+        # Conjugate spectrum turns the FFT product into a correlation
+        self._ref_fft = np.conj(np.fft.rfft(ref, self.fft_size))
+        self._segment = np.zeros(self.fft_size, dtype=np.float64)
+        self._filled = self.ref_len - 1  # Overlap from the previous block
+
+    def process(self, block: np.ndarray) -> float | None:
+        """Feed samples. Returns the best coefficient of any completed FFT blocks."""
+        best = None
+        while len(block):
+            take = min(len(block), self.fft_size - self._filled)
+            self._segment[self._filled:self._filled + take] = block[:take]
+            self._filled += take
+            block = block[take:]
+
+            if self._filled == self.fft_size:
+                coeff = self._correlate()
+                best = coeff if best is None else max(best, coeff)
+                # Keep the last ref_len - 1 samples as overlap for the next block
+                self._segment[:self.ref_len - 1] = self._segment[self.hop:]
+                self._filled = self.ref_len - 1
+        return best
+
+    def _correlate(self) -> float:
+        """Peak normalised correlation over the valid lags of the current block."""
+        seg = self._segment
+        corr = np.fft.irfft(np.fft.rfft(seg) * self._ref_fft, self.fft_size)[:self.hop]
+        # Energy of each ref_len-long slice of the input, via a running sum
+        cumsum = np.concatenate(([0.0], np.cumsum(seg * seg)))
+        energy = cumsum[self.ref_len:self.ref_len + self.hop] - cumsum[:self.hop]
+        valid = energy > self.ref_len * 1e-8  # Ignore digital silence
+        if not valid.any() or self._ref_norm == 0:
+            return 0.0
+        coeff = np.abs(corr[valid]) / (self._ref_norm * np.sqrt(energy[valid]))
+        return float(coeff.max())
+
+
 class AutoRecordListener:
     """Listens for calling beep and triggers recording prompt.
     
     Uses a multi-stage detection approach to minimize false positives:
-    1. FFT frequency analysis to detect 440Hz tone presence
+    1. Streaming tone-band analysis to detect 440Hz tone presence
     2. Cross-correlation with reference audio for pattern matching
     3. Requires consecutive detections to confirm
     """
@@ -576,22 +838,57 @@ class AutoRecordListener:
     # Detection parameters
     BEEP_FREQUENCY = 440  # Hz - standard calling beep frequency
     FREQUENCY_TOLERANCE = 50  # Hz tolerance around target frequency
+    TONE_RATIO_THRESHOLD = 0.3  # Share of block energy that must sit in the tone band
+    REFERENCE_SECONDS = 0.25  # Steady-state slice of the reference used as template
+    CORRELATION_THRESHOLD = 0.12  # Minimum normalised correlation coefficient
     CONSECUTIVE_REQUIRED = 2  # Require 2 consecutive detections to confirm
     DETECTION_WINDOW = 2.0  # Seconds within which consecutive detections must occur
+    BUFFER_SECONDS = 2.0  # Sliding analysis window
+    CHECK_EVERY_BLOCKS = 5  # Run detection every ~0.1 seconds at 1024 chunk size
+    PREROLL_SECONDS = 15.0  # Loopback audio kept for prepending to auto-recordings
+    PREROLL_LEAD_SECONDS = 3.0  # Audio kept from before the beep was confirmed
 
-    def __init__(self, app, beep_path: Path):
+    def __init__(self, app, beep_path: Path, recorder: "AudioRecorder" = None):
         self.app = app
         self.beep_path = beep_path
+        # Device list and backend come from the recorder's cache
+        if recorder is None and app is not None:
+            recorder = app.recorder
+        self.recorder = recorder
         self.is_listening = False
         self.cooldown_until = None
         self.reference_audio = None
+        self.matched_filter = None
         self.listener_thread = None
         self.loopback_device = None
+        self._subscription = None
+        self._subscription_lock = threading.Lock()
+        # (block, preroll position after it) from the capture hub, so detection
+        # runs off the capture thread
+        self._blocks = queue.Queue(maxsize=int(self.BUFFER_SECONDS * SAMPLE_RATE / CHUNK_SIZE))
+        self.tone_detector = ToneDetector(self.BEEP_FREQUENCY, self.FREQUENCY_TOLERANCE, CHUNK_SIZE)
+        # Last PREROLL_SECONDS of loopback audio, fed on every block (even in
+        # cooldown) so an accepted call can start from the beep
+        self.preroll = RingBuffer(int(SAMPLE_RATE * self.PREROLL_SECONDS))
+        self.preroll_lock = threading.Lock()
+        self.confirmed_at = None  # preroll.total_written when the last beep was confirmed
+        self.reset_detection()
+
+    def reset_detection(self):
+        """Clear all streaming detector state (buffers, history, filter overlap)."""
         # Track consecutive detections
         self.detection_times = []
+        self.audio_buffer = RingBuffer(int(SAMPLE_RATE * self.BUFFER_SECONDS))
+        self._blocks_since_check = 0
+        # Tone-band ratios for the blocks since the last detection check
+        self._tone_ratios = []
+        # Matched-filter coefficients covering roughly the last BUFFER_SECONDS
+        self._correlations = []
+        if self.reference_audio is not None:
+            self.matched_filter = MatchedFilter(self.reference_audio)
 
     def load_reference(self) -> bool:
-        """Load the reference beep audio for comparison."""
+        """Load the reference beep audio and precompute the matched filter."""
         try:
             if not self.beep_path.exists():
                 print(f"Beep file not found: {self.beep_path}")
@@ -605,8 +902,23 @@ class AutoRecordListener:
             audio = audio.astype(np.float32)
             if audio.max() > 1:
                 audio = audio / 32768.0
+            # Match the capture rate so lags line up sample for sample
+            if sample_rate != SAMPLE_RATE:
+                audio = resample_poly(audio, SAMPLE_RATE, sample_rate).astype(np.float32)
+
+            # Use a short steady-state slice: the tone is periodic, so a longer
+            # template only costs CPU and adds latency
+            active = np.flatnonzero(np.abs(audio) > 0.1 * np.abs(audio).max())
+            if len(active):
+                audio = audio[active[0]:active[-1] + 1]
+            template_len = int(SAMPLE_RATE * self.REFERENCE_SECONDS)
+            if len(audio) > template_len:
+                offset = (len(audio) - template_len) // 2
+                audio = audio[offset:offset + template_len]
+
             self.reference_audio = audio
-            print(f"Loaded reference beep: {len(audio)} samples @ {sample_rate}Hz")
+            self.matched_filter = MatchedFilter(audio)
+            print(f"Loaded reference beep: {len(audio)} samples @ {SAMPLE_RATE}Hz")
             return True
         except Exception as e:
             print(f"Failed to load reference beep: {e}")
@@ -621,124 +933,162 @@ class AutoRecordListener:
             return False
 
         # Get loopback device
-        if sd is None:
-            print("sounddevice not available")
-            return False
-
-        # Find loopback device
-        devices = []
-        try:
-            for i, d in enumerate(sd.query_devices()):
-                if d['max_input_channels'] > 0:
-                    name = d['name'].lower()
-                    if any(kw in name for kw in ['stereo mix', 'loopback', 'what u hear', 'wave out']):
-                        devices.append((i, d['name']))
-        except Exception as e:
-            print(f"Failed to query devices: {e}")
+        if self.recorder is None or self.recorder.hub is None:
+            print("No audio backend available")
             return False
 
-        if not devices:
+        device = self._find_loopback()
+        if device is None:
             print("No loopback device found for auto-record")
             return False
 
-        self.loopback_device = devices[0][0]
-        print(f"Auto-record using device: {devices[0][1]}")
+        self.loopback_device = device[0]
+        print(f"Auto-record using device: {device[1]}")
 
         self.is_listening = True
-        self.detection_times = []  # Reset detection history
+        self.reset_detection()
+        with self.preroll_lock:
+            self.preroll = RingBuffer(int(SAMPLE_RATE * self.PREROLL_SECONDS))
+            self.confirmed_at = None
+        self._blocks = queue.Queue(maxsize=self._blocks.maxsize)
         self.listener_thread = threading.Thread(target=self._listen_loop, daemon=True)
         self.listener_thread.start()
+        # Shares the loopback stream with the recorder instead of opening another
+        with self._subscription_lock:
+            self._subscription = self.recorder.hub.subscribe(self.loopback_device, self._on_block)
+        # Lets the device watcher close the stream for a rescan
+        self.recorder.add_stream_holder(self)
         return True
 
+    def _find_loopback(self) -> tuple[int, str] | None:
+        """(index, name) of the loopback device (stricter keywords than the recorder's list)."""
+        devices = [
+            (i, name) for i, name in self.recorder.get_loopback_devices()
+            if any(kw in name.lower() for kw in ['stereo mix', 'loopback', 'what u hear', 'wave out'])
+        ]
+        return devices[0] if devices else None
+
+    def pause_capture(self):
+        """Release the loopback stream for a device rescan; detection idles meanwhile."""
+        with self._subscription_lock:
+            if self._subscription:
+                self.recorder.hub.unsubscribe(self._subscription)
+                self._subscription = None
+
+    def resume_capture(self):
+        """Reopen the loopback stream after a rescan (the device's index may have moved)."""
+        with self._subscription_lock:
+            if not self.is_listening or self._subscription:
+                return
+            device = self._find_loopback()
+            if device is None:
+                print("Auto-record loopback device disappeared")
+                return
+            self.loopback_device = device[0]
+            self._subscription = self.recorder.hub.subscribe(self.loopback_device, self._on_block)
+
     def stop_listening(self):
         """Stop listening."""
         self.is_listening = False
+        if self.recorder is not None:
+            self.recorder.remove_stream_holder(self)
+        self.pause_capture()
         if self.listener_thread:
             self.listener_thread.join(timeout=2)
             self.listener_thread = None
 
-    def _listen_loop(self):
-        """Main listening loop - captures desktop audio and compares."""
+    def _on_block(self, block: np.ndarray):
+        """Capture hub callback - feed the pre-roll and queue for detection."""
+        # Keep the pre-roll running through cooldowns
+        with self.preroll_lock:
+            self.preroll.write(block)
+            position = self.preroll.total_written
         try:
-            buffer_duration = 2.0  # seconds
-            buffer_size = int(SAMPLE_RATE * buffer_duration)
-            check_interval = 0  # Counter for check interval
-
-            with sd.InputStream(
-                device=self.loopback_device,
-                samplerate=SAMPLE_RATE,
-                channels=1,
-                dtype='float32',
-                blocksize=CHUNK_SIZE
-            ) as stream:
-                audio_buffer = np.zeros(buffer_size, dtype=np.float32)
-
-                while self.is_listening:
-                    # Check cooldown
-                    if self.cooldown_until and datetime.now() < self.cooldown_until:
-                        # Sleep during cooldown
-                        time.sleep(0.5)
-                        continue
-
-                    # Read audio
-                    data, _ = stream.read(CHUNK_SIZE)
-                    data = data.flatten()
-
-                    # Shift buffer and add new data
-                    audio_buffer = np.roll(audio_buffer, -len(data))
-                    audio_buffer[-len(data):] = data
-
-                    check_interval += 1
-                    # Only check every ~5 reads (~0.1 seconds at 1024 chunk size)
-                    if check_interval >= 5:
-                        check_interval = 0
-                        
-                        # Check for beep using multi-stage detection
-                        if self._detect_beep_multistage(audio_buffer):
-                            # Record this detection time
-                            now = datetime.now()
-                            self.detection_times.append(now)
-                            
-                            # Remove old detections outside window
-                            cutoff = now - timedelta(seconds=self.DETECTION_WINDOW)
-                            self.detection_times = [t for t in self.detection_times if t > cutoff]
-                            
-                            # Check if we have enough consecutive detections
-                            if len(self.detection_times) >= self.CONSECUTIVE_REQUIRED:
-                                print(f"Beep confirmed! ({len(self.detection_times)} consecutive detections)")
-                                self._trigger_alert()
-                                # Reset and cooldown
-                                self.detection_times = []
-                                self.cooldown_until = datetime.now() + timedelta(seconds=5)
-
-                    time.sleep(0.02)  # Small delay between reads
+            self._blocks.put_nowait((block, position))
+        except queue.Full:
+            pass  # Detector fell behind; drop rather than stall the capture
 
-        except Exception as e:
-            print(f"Auto-record listener error: {e}")
-            self.is_listening = False
+    def _listen_loop(self):
+        """Detection loop - runs the beep detector on queued loopback blocks."""
+        while self.is_listening:
+            try:
+                block, position = self._blocks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # The detectors see every block, so their history and sample clock
+            # stay current; a cooldown only suppresses the trigger
+            confirmed = self._process_block(block)
+            if self.cooldown_until and datetime.now() < self.cooldown_until:
+                # Detections made during cooldown don't count toward the next call
+                self.detection_times = []
+                continue
+
+            if confirmed:
+                with self.preroll_lock:
+                    self.confirmed_at = position
+                self._trigger_alert()
+                # Cooldown before listening for the next call
+                self.cooldown_until = datetime.now() + timedelta(seconds=5)
+
+    def _process_block(self, block: np.ndarray) -> bool:
+        """Feed one block of loopback audio. Returns True when a beep is confirmed."""
+        self.audio_buffer.write(block)
+        self._tone_ratios.append(self.tone_detector.process(block))
+        if self.matched_filter is not None:
+            coeff = self.matched_filter.process(block)
+            if coeff is not None:
+                self._correlations.append(coeff)
+                keep = max(1, int(self.BUFFER_SECONDS * SAMPLE_RATE / self.matched_filter.hop))
+                del self._correlations[:-keep]
+
+        self._blocks_since_check += 1
+        if self._blocks_since_check < self.CHECK_EVERY_BLOCKS:
+            return False
+        self._blocks_since_check = 0
+        tone_ratios, self._tone_ratios = self._tone_ratios, []
+
+        # Check for beep using multi-stage detection
+        if not self._detect_beep_multistage(tone_ratios):
+            return False
 
-    def _detect_beep_multistage(self, audio_buffer: np.ndarray) -> bool:
+        # Record this detection time on the stream's sample clock, so replaying
+        # audio faster than real time behaves the same as a live stream
+        now = self.audio_buffer.total_written / SAMPLE_RATE
+        self.detection_times.append(now)
+
+        # Remove old detections outside window
+        cutoff = now - self.DETECTION_WINDOW
+        self.detection_times = [t for t in self.detection_times if t > cutoff]
+
+        # Check if we have enough consecutive detections
+        if len(self.detection_times) >= self.CONSECUTIVE_REQUIRED:
+            print(f"Beep confirmed! ({len(self.detection_times)} consecutive detections)")
+            self.detection_times = []
+            return True
+        return False
+
+    def _detect_beep_multistage(self, tone_ratios: list[float]) -> bool:
         """Multi-stage beep detection for high accuracy.
         
         Stage 1: Check if audio has sufficient energy (not silence)
-        Stage 2: FFT frequency analysis to detect target frequency presence
+        Stage 2: Tone-band ratios of the newest blocks (target frequency presence)
         Stage 3: Cross-correlation with reference audio
         """
         if self.reference_audio is None:
             return False
 
         try:
-            # Stage 1: Energy check - reject silence
-            rms = np.sqrt(np.mean(audio_buffer ** 2))
-            if rms < 0.01:  # Too quiet, likely silence
+            # Stage 1: Energy check - reject silence (running RMS, no rescan)
+            if self.audio_buffer.rms() < 0.01:  # Too quiet, likely silence
                 return False
 
             # Stage 2: Frequency analysis
-            if not self._check_frequency(audio_buffer):
+            if not self._check_frequency(tone_ratios):
                 return False
 
             # Stage 3: Cross-correlation check
-            if not self._check_correlation(audio_buffer):
+            if not self._check_correlation():
                 return False
 
             return True
@@ -747,80 +1097,46 @@ class AutoRecordListener:
             print(f"Beep detection error: {e}")
             return False
 
-    def _check_frequency(self, audio_buffer: np.ndarray) -> bool:
-        """Check if the target beep frequency is present in the audio."""
-        try:
-            # Use FFT to analyze frequency content
-            fft = np.fft.rfft(audio_buffer)
-            freqs = np.fft.rfftfreq(len(audio_buffer), 1 / SAMPLE_RATE)
-            magnitudes = np.abs(fft)
-            
-            # Find the dominant frequency
-            peak_idx = np.argmax(magnitudes)
-            peak_freq = freqs[peak_idx]
-            
-            # Also check the magnitude around target frequency
-            target_low = self.BEEP_FREQUENCY - self.FREQUENCY_TOLERANCE
-            target_high = self.BEEP_FREQUENCY + self.FREQUENCY_TOLERANCE
-            target_mask = (freqs >= target_low) & (freqs <= target_high)
-            target_magnitude = magnitudes[target_mask].max() if target_mask.any() else 0
-            
-            # Check if target frequency is strong relative to overall signal
-            total_magnitude = magnitudes.max()
-            if total_magnitude < 1e-10:
-                return False
-                
-            target_ratio = target_magnitude / total_magnitude
-            
-            # The 440Hz tone should be prominent (at least 30% of max)
-            # Or the dominant frequency should be near our target
-            freq_match = abs(peak_freq - self.BEEP_FREQUENCY) < self.FREQUENCY_TOLERANCE
-            strong_target = target_ratio > 0.3
-            
-            if freq_match or strong_target:
-                print(f"  [Freq Pass] Peak: {peak_freq:.1f}Hz, Target Ratio: {target_ratio:.2f}")
-            
-            return freq_match or strong_target
-            
-        except Exception:
+    def _check_frequency(self, tone_ratios: list[float]) -> bool:
+        """Check if the target beep frequency dominates the newest blocks."""
+        if not tone_ratios:
             return False
 
-    def _check_correlation(self, audio_buffer: np.ndarray) -> bool:
-        """Check cross-correlation with reference beep audio."""
-        try:
-            from scipy import signal
+        # Median so a single loud click or dropout can't flip the result
+        ratio = float(np.median(tone_ratios))
+        if ratio > self.TONE_RATIO_THRESHOLD:
+            print(f"  [Freq Pass] Tone Ratio: {ratio:.2f}")
+            return True
+        return False
 
-            # Normalize both signals
-            ref_max = np.abs(self.reference_audio).max()
-            buf_max = np.abs(audio_buffer).max()
-            
-            if ref_max < 1e-10 or buf_max < 1e-10:
-                return False
-                
-            ref = self.reference_audio / ref_max
-            buf = audio_buffer / buf_max
+    def _check_correlation(self) -> bool:
+        """Check the matched-filter correlation with the reference beep."""
+        if not self._correlations:
+            return False
 
-            # Cross-correlate
-            correlation = signal.correlate(buf, ref, mode='valid')
-            max_corr = np.abs(correlation).max()
-            
-            # Normalize by length for consistent threshold
-            norm_corr = max_corr / len(ref)
-            
-            print(f"  [Corr Check] Value: {norm_corr:.3f}")
+        norm_corr = max(self._correlations)
+        print(f"  [Corr Check] Value: {norm_corr:.3f}")
+        return norm_corr > self.CORRELATION_THRESHOLD
 
-            # Threshold based on observed values: beep peaks at ~0.15
-            # Using 0.12 to require strong match while allowing detection
-            threshold = 0.12
-            return norm_corr > threshold
+    def get_preroll(self) -> np.ndarray:
+        """Loopback audio from just before the last confirmed beep until now.
 
-        except Exception:
-            return False
+        Limited to the PREROLL_SECONDS still in the buffer. Returns an empty
+        array if no beep has been confirmed since listening started.
+        """
+        with self.preroll_lock:
+            if self.confirmed_at is None:
+                return np.zeros(0, dtype=np.float32)
+            start = self.confirmed_at - int(SAMPLE_RATE * self.PREROLL_LEAD_SECONDS)
+            n = self.preroll.total_written - max(start, 0)
+            return self.preroll.latest(n).copy()
 
     def _trigger_alert(self):
         """Show alert dialog on main thread."""
         if self.app and hasattr(self.app, 'root'):
             self.app.root.after(0, self._show_dialog)
+        else:
+            print("Call detected (headless - no dialog)")
 
     def _show_dialog(self):
         """Show the call detected dialog."""
@@ -829,7 +1145,9 @@ class AutoRecordListener:
 
         def on_response(result):
             if result == "yes":
-                self.app.start_recording()
+                # Taken when the recorder joins the stream, so it runs
+                # straight into the live blocks
+                self.app.start_recording(preroll=self.get_preroll)
             elif result == "no_15s":
                 self.set_cooldown(15)
 
@@ -842,6 +1160,99 @@ class AutoRecordListener:
 
 
 
+class LevelSnapshot(NamedTuple):
+    peak: float
+    rms: float
+    timestamp: float  # time.monotonic() of the block that produced it
+
+
+class LevelMeter:
+    """Peak/RMS level of a capture stream, published as an immutable snapshot.
+
+    The capture thread calls update() once per block. Readers call read()
+    without any lock: the snapshot is replaced by a single attribute
+    assignment, which is atomic. With release_seconds > 0 levels attack
+    instantly and fall back exponentially (meter ballistics); with 0 they are
+    the raw per-block values.
+    """
+
+    def __init__(self, release_seconds: float = 0.25):
+        self.release_seconds = release_seconds
+        self._snapshot = LevelSnapshot(0.0, 0.0, 0.0)
+
+    def _decay(self, snapshot: LevelSnapshot, now: float) -> float:
+        if self.release_seconds <= 0 or not snapshot.timestamp:
+            return 0.0
+        return math.exp(-(now - snapshot.timestamp) / self.release_seconds)
+
+    def update(self, block: np.ndarray) -> float:
+        """Measure one captured block (called from the capture thread).
+
+        Returns the block's raw RMS.
+        """
+        if len(block) == 0:
+            return 0.0
+        peak = float(np.abs(block).max())
+        rms = math.sqrt(float(np.dot(block, block)) / len(block))
+        now = time.monotonic()
+
+        previous = self._snapshot
+        decay = self._decay(previous, now)
+        self._snapshot = LevelSnapshot(
+            max(peak, previous.peak * decay),
+            max(rms, previous.rms * decay),
+            now
+        )
+        return rms
+
+    def read(self) -> LevelSnapshot:
+        """Current levels; they keep falling if the stream stops delivering."""
+        snapshot = self._snapshot
+        if self.release_seconds <= 0:
+            return snapshot
+        decay = self._decay(snapshot, time.monotonic())
+        return LevelSnapshot(snapshot.peak * decay, snapshot.rms * decay, snapshot.timestamp)
+
+    def reset(self):
+        self._snapshot = LevelSnapshot(0.0, 0.0, 0.0)
+
+
+class NoiseGate:
+    """Running silence threshold for one live capture stream.
+
+    The streaming counterpart of detect_voice_activity's threshold: a few
+    times the source's noise floor, between SILENCE_LEVEL and
+    MAX_SILENCE_THRESHOLD. The floor is a low percentile of the block RMS
+    values of the last NOISE_WINDOW_SECONDS, so a hissing mic or a noisy
+    room counts as silent while quiet speech still counts as sound.
+    """
+
+    def __init__(self, window_seconds: float = NOISE_WINDOW_SECONDS,
+                 update_seconds: float = 0.5):
+        self.window_seconds = window_seconds
+        self.update_seconds = update_seconds
+        self.reset()
+
+    def reset(self):
+        self._recent = deque()  # (time.monotonic(), rms) of blocks quiet enough to be noise
+        self._updated = 0.0
+        self.threshold = SILENCE_LEVEL
+
+    def is_sound(self, rms: float) -> bool:
+        """Record one block's RMS and say whether it is above the noise (capture thread)."""
+        now = time.monotonic()
+        # Frames louder than the cap are never silence, so they are never noise either
+        if rms < MAX_SILENCE_THRESHOLD:
+            self._recent.append((now, rms))
+        while self._recent and now - self._recent[0][0] > self.window_seconds:
+            self._recent.popleft()
+        if self._recent and now - self._updated >= self.update_seconds:
+            floor = float(np.percentile([r for _, r in self._recent], NOISE_PERCENTILE))
+            self.threshold = min(max(floor * 3, SILENCE_LEVEL), MAX_SILENCE_THRESHOLD)
+            self._updated = now
+        return rms > self.threshold
+
+
 class RecordingOverlay(tk.Toplevel):
     """Small always-on-top overlay showing recording status with audio levels."""
 
@@ -981,19 +1392,9 @@ class RecordingOverlay(tk.Toplevel):
             return
 
         if self.recorder:
-            # Get recent audio levels
-            with self.recorder.lock:
-                if self.recorder.mic_data and len(self.recorder.mic_data) > 0:
-                    recent_mic = self.recorder.mic_data[-1] if self.recorder.mic_data else np.array([0])
-                    self.mic_level = min(1.0, np.abs(recent_mic).max() * 3)
-                else:
-                    self.mic_level *= 0.8  # Decay
-
-                if self.recorder.desktop_data and len(self.recorder.desktop_data) > 0:
-                    recent_desk = self.recorder.desktop_data[-1] if self.recorder.desktop_data else np.array([0])
-                    self.desk_level = min(1.0, np.abs(recent_desk).max() * 3)
-                else:
-                    self.desk_level *= 0.8  # Decay
+            # Lock-free snapshots published by the capture threads
+            self.mic_level = min(1.0, self.recorder.mic_meter.read().peak * 3)
+            self.desk_level = min(1.0, self.recorder.desktop_meter.read().peak * 3)
 
         # Update mic bar
         mic_width = int(self.mic_level * 160)
@@ -1028,100 +1429,237 @@ class RecordingOverlay(tk.Toplevel):
 class AudioRecorder:
     """Handles audio recording from different sources."""
 
-    def __init__(self):
+    def __init__(self, backend: AudioBackend = None):
+        # Falls back to the first installed hardware backend
+        self.backend = backend or create_backend()
+        # One stream per device, shared with the auto-record listener
+        self.hub = CaptureHub(self.backend, SAMPLE_RATE, CHUNK_SIZE) if self.backend else None
+        self._device_cache = None
+        self._device_lock = threading.Lock()
+        self._watcher_thread = None
+        self._watcher_stop = threading.Event()
+        # Objects keeping hub streams open between recordings (the auto-record
+        # listener), with pause_capture()/resume_capture() for device rescans
+        self._stream_holders = []
         self.is_recording = False
         self.mic_data = []
         self.desktop_data = []
-        self.mic_thread = None
-        self.desktop_thread = None
+        self._subscriptions = []
         self.lock = threading.Lock()
-
-    def get_input_devices(self) -> list[tuple[int, str, bool]]:
-        """Get all input devices. Returns (index, name, is_loopback)."""
-        if sd is None:
-            return []
+        # Levels computed once per captured block, readable without the lock
+        self.mic_meter = LevelMeter()
+        self.desktop_meter = LevelMeter()
+        # Per-source silence thresholds that follow each source's noise floor
+        self.mic_gate = NoiseGate()
+        self.desktop_gate = NoiseGate()
+        # Last time either source was above its noise gate (for auto-stop)
+        self.last_activity = None
+        # Separate tracks from the last recording (aligned when both exist)
+        self.mic_audio = None
+        self.desktop_audio = None
+
+    def _scan_devices(self) -> dict:
+        """Query the backend once and precompute the device classification."""
         devices = []
-        try:
-            for i, d in enumerate(sd.query_devices()):
-                if d['max_input_channels'] > 0:
-                    name = d['name']
-                    # Skip Windows virtual mappers - they route to default device
-                    if 'sound mapper' in name.lower() or 'primary' in name.lower():
-                        continue
-                    # Check if it's a loopback device
-                    is_loopback = any(kw in name.lower() for kw in
-                        ['stereo mix', 'what u hear', 'loopback', 'wave out', 'output', 'mixage'])
-                    devices.append((i, name, is_loopback))
-        except Exception as e:
-            print(f"Error getting devices: {e}")
-        return devices
-
-    def get_microphones(self) -> list[tuple[int, str]]:
-        """Get microphone devices (non-loopback inputs)."""
-        mics = [(i, name) for i, name, is_loopback in self.get_input_devices() if not is_loopback]
+        info = {}
+        if self.backend is not None:
+            try:
+                for i, d in enumerate(self.backend.query_devices()):
+                    if d['max_input_channels'] > 0:
+                        name = d['name']
+                        # Skip Windows virtual mappers - they route to default device
+                        if 'sound mapper' in name.lower() or 'primary' in name.lower():
+                            continue
+                        # Check if it's a loopback device
+                        is_loopback = any(kw in name.lower() for kw in
+                            ['stereo mix', 'what u hear', 'loopback', 'wave out', 'output', 'mixage'])
+                        devices.append((i, name, is_loopback))
+                        info[i] = d
+            except Exception as e:
+                print(f"Error getting devices: {e}")
+
+        mics = [(i, name) for i, name, is_loopback in devices if not is_loopback]
         # Prioritize actual microphones by keywords
         priority_keywords = ['microphone', 'mic', 'headset', 'webcam', 'usb', 'realtek', 'input']
         mics.sort(key=lambda x: (
             0 if any(kw in x[1].lower() for kw in priority_keywords) else 1,
             x[0]
         ))
-        return mics
+        loopbacks = [(i, name) for i, name, is_loopback in devices if is_loopback]
+
+        # Try to find a real microphone first, else the first non-loopback device
+        default_mic = next(
+            (i for i, name in mics if any(kw in name.lower() for kw in ['microphone', 'mic', 'headset'])),
+            mics[0][0] if mics else None
+        )
+
+        return {
+            "devices": devices,
+            "info": info,
+            "mics": mics,
+            "loopbacks": loopbacks,
+            "default_mic": default_mic,
+            "default_loopback": loopbacks[0][0] if loopbacks else None,
+        }
+
+    def _devices(self) -> dict:
+        """Return the cached device scan, scanning on first use."""
+        with self._device_lock:
+            if self._device_cache is None:
+                self._device_cache = self._scan_devices()
+            return self._device_cache
+
+    def refresh_devices(self, rescan: bool = True) -> bool:
+        """Rescan devices now. Returns True if the device list changed."""
+        if rescan and self.backend is not None:
+            changed = self._rescan_and_refresh()
+            if changed is not None:
+                return changed
+            print("Device rescan deferred - recording")
+        scan = self._scan_devices()
+        with self._device_lock:
+            changed = self._device_cache is None or scan["devices"] != self._device_cache["devices"]
+            self._device_cache = scan
+        return changed
+
+    def get_input_devices(self) -> list[tuple[int, str, bool]]:
+        """Get all input devices. Returns (index, name, is_loopback)."""
+        return self._devices()["devices"]
+
+    def get_microphones(self) -> list[tuple[int, str]]:
+        """Get microphone devices (non-loopback inputs)."""
+        return self._devices()["mics"]
 
     def get_loopback_devices(self) -> list[tuple[int, str]]:
         """Get loopback devices (Stereo Mix, etc.)."""
-        return [(i, name) for i, name, is_loopback in self.get_input_devices() if is_loopback]
+        return self._devices()["loopbacks"]
 
     def get_default_mic(self) -> int | None:
         """Get the best microphone (not loopback)."""
-        mics = self.get_microphones()
-        if not mics:
-            return None
-
-        # Try to find a real microphone first
-        for i, name in mics:
-            name_lower = name.lower()
-            if any(kw in name_lower for kw in ['microphone', 'mic', 'headset']):
-                return i
-
-        # Fall back to first non-loopback device
-        return mics[0][0]
+        return self._devices()["default_mic"]
 
     def get_default_loopback(self) -> int | None:
         """Get the first available loopback device."""
-        loopbacks = self.get_loopback_devices()
-        return loopbacks[0][0] if loopbacks else None
+        return self._devices()["default_loopback"]
+
+    def get_device_info(self, device_id: int) -> dict:
+        """Get a device's info dict, from the cache when possible."""
+        info = self._devices()["info"].get(device_id)
+        if info is None:
+            info = self.backend.query_devices(device_id)
+        return info
 
-    def _record_device(self, device_id: int, data_list: list, name: str):
-        """Record from a device."""
+    def start_device_watcher(self, on_change=None, interval: float = 2.0) -> bool:
+        """Watch for device hot-plug and refresh the cache when it happens.
+
+        Only polls the backend's cheap device signature; the full device scan
+        runs only when the signature changes. on_change is called (from the
+        watcher thread) after a refresh that changed the device list.
+        """
+        if self.backend is None or self.backend.device_signature() is None:
+            return False
+        if self._watcher_thread:
+            return True
+
+        self._watcher_stop.clear()
+        self._watcher_thread = threading.Thread(
+            target=self._watch_devices, args=(on_change, interval), daemon=True
+        )
+        self._watcher_thread.start()
+        return True
+
+    def stop_device_watcher(self):
+        """Stop the hot-plug watcher."""
+        self._watcher_stop.set()
+        if self._watcher_thread:
+            self._watcher_thread.join(timeout=2)
+            self._watcher_thread = None
+
+    def add_stream_holder(self, holder):
+        """Register something that keeps hub streams open between recordings."""
+        if holder not in self._stream_holders:
+            self._stream_holders.append(holder)
+
+    def remove_stream_holder(self, holder):
+        if holder in self._stream_holders:
+            self._stream_holders.remove(holder)
+
+    def _rescan_and_refresh(self) -> bool | None:
+        """Re-enumerate devices and refresh the cache.
+
+        Returns whether the device list changed, or None if devices can't be
+        re-enumerated yet. Streams held between recordings (the auto-record
+        listener) are closed for the rescan and reopened on the refreshed
+        device list; a recording is never interrupted.
+        """
+        if self.backend.rescan():
+            return self.refresh_devices(rescan=False)
+        if self.is_recording:
+            return None
+        holders = list(self._stream_holders)
+        for holder in holders:
+            holder.pause_capture()
         try:
-            device_info = sd.query_devices(device_id)
-            channels = min(device_info['max_input_channels'], 2)
-
-            with sd.InputStream(
-                device=device_id,
-                samplerate=SAMPLE_RATE,
-                channels=channels,
-                dtype='float32',
-                blocksize=CHUNK_SIZE
-            ) as stream:
-                print(f"Recording from: {name} (channels: {channels})")
-                while self.is_recording:
-                    data, _ = stream.read(CHUNK_SIZE)
-                    # Convert to mono if stereo
-                    if channels == 2:
-                        mono = data.mean(axis=1)
-                    else:
-                        mono = data.flatten()
-                    with self.lock:
-                        data_list.append(mono.copy())
-        except Exception as e:
-            print(f"Recording error ({name}): {e}")
+            # Still fails if a recording started in the meantime
+            if not self.backend.rescan():
+                return None
+            return self.refresh_devices(rescan=False)
+        finally:
+            for holder in holders:
+                holder.resume_capture()
+
+    def _watch_devices(self, on_change, interval: float):
+        """Hot-plug watcher loop."""
+        signature = self.backend.device_signature()
+        while not self._watcher_stop.wait(interval):
+            current = self.backend.device_signature()
+            if current == signature:
+                continue
+            changed = self._rescan_and_refresh()
+            # Can't re-enumerate while recording; try again next tick
+            if changed is None:
+                continue
+            signature = current
+            if changed:
+                print("Audio devices changed")
+                if on_change:
+                    try:
+                        on_change()
+                    except Exception as e:
+                        print(f"Device change callback error: {e}")
+
+    def _capture_into(self, data_list: list, meter: LevelMeter, gate: NoiseGate):
+        """Capture hub callback that appends blocks to a track."""
+        def on_block(block: np.ndarray):
+            if gate.is_sound(meter.update(block)):
+                self.last_activity = time.monotonic()
+            # Hub blocks are read-only and never reused, so no copy is needed
+            with self.lock:
+                data_list.append(block)
+        return on_block
+
+    def start(self, mode: str, mic_device: int = None, desktop_device: int = None,
+              preroll=None):
+        """Start recording.
+
+        preroll is desktop audio captured before the call (from the auto-record
+        listener), or a function returning it. A function is called at the
+        moment the desktop device's stream hands over to the recording, so
+        the pre-roll joins the live audio without a gap or overlap. It is
+        prepended to the desktop track, with matching silence on the mic
+        track so both stay aligned.
+        """
+        if self.hub is None:
+            raise RuntimeError("No audio backend available (install sounddevice or soundcard)")
 
-    def start(self, mode: str, mic_device: int = None, desktop_device: int = None):
-        """Start recording."""
         self.is_recording = True
         self.mic_data = []
         self.desktop_data = []
+        self.mic_meter.reset()
+        self.desktop_meter.reset()
+        self.mic_gate.reset()
+        self.desktop_gate.reset()
+        self.last_activity = time.monotonic()
 
         # Get defaults if not specified
         if mic_device is None:
@@ -1134,49 +1672,60 @@ class AudioRecorder:
         print(f"Mode: {mode}")
         if mic_device is not None:
             try:
-                mic_info = sd.query_devices(mic_device)
+                mic_info = self.get_device_info(mic_device)
                 print(f"Mic device: [{mic_device}] {mic_info['name']}")
             except:
                 print(f"Mic device: [{mic_device}] (unknown)")
         if desktop_device is not None:
             try:
-                desk_info = sd.query_devices(desktop_device)
+                desk_info = self.get_device_info(desktop_device)
                 print(f"Desktop device: [{desktop_device}] {desk_info['name']}")
             except:
                 print(f"Desktop device: [{desktop_device}] (unknown)")
         print("=========================\n")
 
-        # Start mic recording
-        if mode in ("mic", "both") and mic_device is not None:
-            self.mic_thread = threading.Thread(
-                target=self._record_device,
-                args=(mic_device, self.mic_data, "Microphone"),
-                daemon=True
-            )
-            self.mic_thread.start()
-        elif mode in ("mic", "both"):
-            print("WARNING: No microphone device found!")
+        self._subscriptions = []
+        preroll_samples = 0
 
-        # Start desktop recording
+        # Start desktop recording (first, so the mic track can be padded to
+        # the pre-roll length before its first block)
         if mode in ("desktop", "both"):
             if desktop_device is not None:
-                self.desktop_thread = threading.Thread(
-                    target=self._record_device,
-                    args=(desktop_device, self.desktop_data, "Desktop Audio"),
-                    daemon=True
-                )
-                self.desktop_thread.start()
+                def prime():
+                    nonlocal preroll_samples
+                    audio = preroll() if callable(preroll) else preroll
+                    if audio is not None and len(audio):
+                        self.desktop_data.append(np.asarray(audio, dtype=np.float32))
+                        preroll_samples = len(audio)
+
+                self._subscriptions.append(self.hub.subscribe(
+                    desktop_device,
+                    self._capture_into(self.desktop_data, self.desktop_meter, self.desktop_gate),
+                    prime=prime if preroll is not None else None
+                ))
+                if preroll_samples:
+                    print(f"Prepended {preroll_samples / SAMPLE_RATE:.1f}s of pre-roll")
             else:
                 print("WARNING: No loopback device found! Enable Stereo Mix in Sound settings.")
 
+        # Start mic recording
+        if mode in ("mic", "both") and mic_device is not None:
+            if preroll_samples:
+                self.mic_data.append(np.zeros(preroll_samples, dtype=np.float32))
+            self._subscriptions.append(self.hub.subscribe(
+                mic_device, self._capture_into(self.mic_data, self.mic_meter, self.mic_gate)
+            ))
+        elif mode in ("mic", "both"):
+            print("WARNING: No microphone device found!")
+
     def stop(self) -> np.ndarray:
         """Stop recording and return audio data."""
         self.is_recording = False
 
-        if self.mic_thread:
-            self.mic_thread.join(timeout=2)
-        if self.desktop_thread:
-            self.desktop_thread.join(timeout=2)
+        # No more blocks arrive for a subscription once it's cancelled
+        for token in self._subscriptions:
+            self.hub.unsubscribe(token)
+        self._subscriptions = []
 
         mic_audio = None
         desktop_audio = None
@@ -1197,15 +1746,49 @@ class AudioRecorder:
             print(f"Desktop audio level: min={desktop_audio.min():.4f}, max={desktop_audio.max():.4f}")
         print("=========================\n")
 
-        # Combine audio
+        # Keep the separate tracks so they can be saved as stereo or stems
         if mic_audio is not None and desktop_audio is not None:
             min_len = min(len(mic_audio), len(desktop_audio))
-            if min_len > 0:
-                combined = (mic_audio[:min_len] * 0.5) + (desktop_audio[:min_len] * 0.5)
-                max_val = np.abs(combined).max()
-                if max_val > 0:
-                    combined = combined / max_val * 0.95
-                return combined
+            mic_audio = mic_audio[:min_len]
+            desktop_audio = desktop_audio[:min_len]
+        self.mic_audio = mic_audio
+        self.desktop_audio = desktop_audio
+
+        return self.mix_tracks()
+
+    def silence_duration(self) -> float:
+        """Seconds since either source last had sound while recording."""
+        if not self.is_recording or self.last_activity is None:
+            return 0.0
+        return time.monotonic() - self.last_activity
+
+    def trim_silence(self, min_silence: float = DEFAULT_MIN_SILENCE_SECONDS,
+                     keep_silence: float = KEEP_SILENCE_SECONDS) -> tuple[np.ndarray, list]:
+        """Cut two-sided silences from the stored tracks.
+
+        Returns the new mixed audio and the removed spans as
+        [start_seconds, end_seconds] pairs on the original timeline.
+        """
+        cuts = find_silences([self.mic_audio, self.desktop_audio], min_silence, keep_silence)
+        if cuts:
+            if self.mic_audio is not None:
+                self.mic_audio = remove_ranges(self.mic_audio, cuts)
+            if self.desktop_audio is not None:
+                self.desktop_audio = remove_ranges(self.desktop_audio, cuts)
+            removed = sum(end - start for start, end in cuts) / SAMPLE_RATE
+            print(f"Trimmed {removed:.1f}s of silence in {len(cuts)} gaps")
+        spans = [[start / SAMPLE_RATE, end / SAMPLE_RATE] for start, end in cuts]
+        return self.mix_tracks(), spans
+
+    def mix_tracks(self) -> np.ndarray:
+        """Mix the stored mic and desktop tracks into one mono signal."""
+        mic_audio = self.mic_audio
+        desktop_audio = self.desktop_audio
+
+        if mic_audio is not None and desktop_audio is not None:
+            if len(mic_audio) > 0:
+                combined = (mic_audio * 0.5) + (desktop_audio * 0.5)
+                return normalize_audio(combined)
         elif mic_audio is not None:
             return mic_audio
         elif desktop_audio is not None:
@@ -1213,19 +1796,68 @@ class AudioRecorder:
 
         return np.array([])
 
-    def save(self, filepath: str, audio: np.ndarray) -> bool:
-        """Save audio to MP3 file."""
+    def save(self, filepath: str, audio: np.ndarray, output_mode: str = DEFAULT_OUTPUT_MODE,
+             silence_spans: list = None) -> bool:
+        """Save audio to MP3 file.
+
+        output_mode "stereo" writes the caller (mic) on the left channel and
+        the recipient (desktop) on the right. "stems" writes the mixed file
+        plus "<name>_mic.mp3" and "<name>_sys.mp3" next to it.
+
+        silence_spans (from trim_silence) are written to "<name>.silence.json"
+        so timestamps in the trimmed file can be mapped back to the call.
+        """
         if len(audio) == 0:
             return False
 
+        if silence_spans:
+            self._write_silence_sidecar(filepath, silence_spans)
+
+        if output_mode == "stereo":
+            if self.mic_audio is not None and self.desktop_audio is not None:
+                stereo = np.column_stack([
+                    normalize_audio(self.mic_audio),
+                    normalize_audio(self.desktop_audio)
+                ])
+                return self._export(filepath, stereo, channels=2)
+            print("Stereo output needs both sources - saving mono instead")
+
+        if not self._export(filepath, audio, channels=1):
+            return False
+
+        if output_mode == "stems":
+            base = Path(filepath)
+            for suffix, track in (("mic", self.mic_audio), ("sys", self.desktop_audio)):
+                if track is None or len(track) == 0:
+                    continue
+                stem_path = base.with_name(f"{base.stem}_{suffix}{base.suffix}")
+                self._export(str(stem_path), normalize_audio(track), channels=1)
+
+        return True
+
+    def _write_silence_sidecar(self, filepath: str, spans: list):
+        """Record trimmed spans next to the recording."""
+        sidecar = Path(filepath).with_suffix(".silence.json")
+        try:
+            with open(sidecar, 'w') as f:
+                json.dump({
+                    "sample_rate": SAMPLE_RATE,
+                    # [start, end] seconds on the original (untrimmed) timeline
+                    "removed": spans,
+                }, f, indent=2)
+        except Exception as e:
+            print(f"Failed to write silence sidecar: {e}")
+
+    def _export(self, filepath: str, audio: np.ndarray, channels: int) -> bool:
+        """Encode float audio (frames x channels) to MP3."""
         # Convert numpy array to pydub AudioSegment
-        # pydub expects audio in milliseconds and 16-bit PCM
+        # pydub expects interleaved 16-bit PCM
         audio_int16 = (audio * 32767).astype(np.int16)
         audio_segment = AudioSegment(
             audio_int16.tobytes(),
             frame_rate=SAMPLE_RATE,
             sample_width=audio_int16.dtype.itemsize,
-            channels=1
+            channels=channels
         )
 
         try:
@@ -1239,14 +1871,17 @@ class AudioRecorder:
 class RecorderApp:
     """Main application window."""
 
-    def __init__(self):
+    def __init__(self, backend_name: str = None, backend: AudioBackend = None):
         self.root = tk.Tk()
         self.root.title("Audio Recorder")
         self.root.geometry("450x520")
         self.root.resizable(False, True)
         self.root.minsize(450, 400)
 
-        self.recorder = AudioRecorder()
+        # Load config
+        self.config = load_config()
+
+        self.recorder = AudioRecorder(backend or self._create_backend(backend_name))
         self.overlay = None
         self.is_recording = False
 
@@ -1255,8 +1890,6 @@ class RecorderApp:
         self._selected_mic = None
         self._selected_desktop = None
 
-        # Load config
-        self.config = load_config()
         self.hotkey = self.config.get("hotkey", DEFAULT_HOTKEY)
         self.hotkey_registered = False
 
@@ -1264,6 +1897,9 @@ class RecorderApp:
         self._load_devices()
         self._check_loopback()
         self._register_hotkey()
+        self.recorder.start_device_watcher(
+            lambda: self.root.after(0, self._on_devices_changed)
+        )
 
         # Initialize auto-record listener
         self.auto_record_listener = AutoRecordListener(self, CALLING_BEEP_FILE)
@@ -1273,10 +1909,30 @@ class RecorderApp:
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
+    def _create_backend(self, name: str = None) -> AudioBackend | None:
+        """Create the configured audio backend, falling back to any available one."""
+        name = name or self.config.get("audio_backend", "sounddevice")
+        try:
+            return create_backend(name)
+        except (RuntimeError, ValueError, TypeError) as e:
+            # TypeError: a backend that needs arguments (replay) named in config.json
+            print(f"Audio backend '{name}' unavailable ({e}) - using default")
+            return create_backend()
+
     def _load_devices(self):
         self._mics = self.recorder.get_microphones()
         self._loopbacks = self.recorder.get_loopback_devices()
 
+    def _on_devices_changed(self):
+        """Refresh device lists after a hot-plug event."""
+        if self.is_recording:
+            return
+        if self.advanced_visible:
+            self._refresh_combos()
+        else:
+            self._load_devices()
+        self._check_loopback()
+
     def _check_loopback(self):
         """Check if loopback device is available and warn if not."""
         if not self._loopbacks:
@@ -1419,6 +2075,25 @@ class RecorderApp:
         )
         auto_record_cb.pack(anchor=tk.W)
 
+        # Silence handling
+        self.trim_silence_var = tk.BooleanVar(value=self.config.get("trim_silence", False))
+        min_silence = self.config.get("min_silence_seconds", DEFAULT_MIN_SILENCE_SECONDS)
+        ttk.Checkbutton(
+            auto_record_frame, text=f"Trim silences longer than {min_silence:g}s",
+            variable=self.trim_silence_var,
+            command=self._on_silence_settings_change
+        ).pack(anchor=tk.W)
+
+        auto_stop = self.config.get("auto_stop_silence_seconds", 0)
+        self.auto_stop_var = tk.BooleanVar(value=auto_stop > 0)
+        self._auto_stop_seconds = auto_stop if auto_stop > 0 else 60
+        ttk.Checkbutton(
+            auto_record_frame,
+            text=f"Auto-stop after {self._auto_stop_seconds:g}s of silence",
+            variable=self.auto_stop_var,
+            command=self._on_silence_settings_change
+        ).pack(anchor=tk.W)
+
         style = ttk.Style()
         style.configure("TButton", font=("Arial", 10))
         style.configure("Small.TButton", font=("Arial", 8))
@@ -1470,6 +2145,24 @@ class RecorderApp:
         # Update browse button state
         self._update_save_dir_state()
 
+        # Output format (mono mix, stereo or separate stems)
+        output_frame = ttk.Frame(parent_frame)
+        output_frame.pack(fill=tk.X, pady=(8, 0))
+
+        ttk.Label(output_frame, text="Output:").pack(side=tk.LEFT)
+        self.output_mode_var = tk.StringVar()
+        self.output_combo = ttk.Combobox(
+            output_frame, textvariable=self.output_mode_var,
+            state="readonly", width=32,
+            values=[OUTPUT_MODE_LABELS[m] for m in OUTPUT_MODES]
+        )
+        self.output_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        current_output = self.config.get("output_mode", DEFAULT_OUTPUT_MODE)
+        if current_output not in OUTPUT_MODES:
+            current_output = DEFAULT_OUTPUT_MODE
+        self.output_combo.current(OUTPUT_MODES.index(current_output))
+        self.output_combo.bind("<<ComboboxSelected>>", self._on_output_mode_change)
+
     def _setup_advanced(self):
         # Device selection only (save settings moved to main UI)
         ttk.Label(self.advanced_frame, text="Microphone:").pack(anchor=tk.W)
@@ -1492,10 +2185,12 @@ class RecorderApp:
 
         ttk.Button(
             self.advanced_frame, text="Refresh Devices",
-            command=self._refresh_combos
+            command=lambda: self._refresh_combos(rescan=True)
         ).pack(anchor=tk.E, pady=(5, 0))
 
-    def _refresh_combos(self):
+    def _refresh_combos(self, rescan: bool = False):
+        if rescan:
+            self.recorder.refresh_devices()
         self._load_devices()
 
         # Mics
@@ -1537,6 +2232,11 @@ class RecorderApp:
         save_config(self.config)
         self._update_save_dir_state()
 
+    def _on_output_mode_change(self, event=None):
+        """Handle output format selection."""
+        self.config["output_mode"] = OUTPUT_MODES[self.output_combo.current()]
+        save_config(self.config)
+
     def _update_save_dir_state(self):
         """Enable/disable folder selection based on save mode."""
         if self.save_mode_var.get() == "auto":
@@ -1582,6 +2282,25 @@ class RecorderApp:
             self.auto_record_listener.stop_listening()
             print("Auto-record listening disabled")
 
+    def _on_silence_settings_change(self):
+        """Handle silence trimming / auto-stop checkbox changes."""
+        self.config["trim_silence"] = self.trim_silence_var.get()
+        self.config["auto_stop_silence_seconds"] = (
+            self._auto_stop_seconds if self.auto_stop_var.get() else 0
+        )
+        save_config(self.config)
+
+    def _check_auto_stop(self):
+        """Stop the recording once both sides have been silent long enough."""
+        if not self.is_recording:
+            return
+        limit = self.config.get("auto_stop_silence_seconds", 0)
+        if limit > 0 and self.recorder.silence_duration() >= limit:
+            print(f"Auto-stopping after {limit}s of silence")
+            self.stop_recording()
+            return
+        self.root.after(1000, self._check_auto_stop)
+
     def show_troubleshoot(self):
         TroubleshootDialog(self.root)
 
@@ -1657,6 +2376,7 @@ class RecorderApp:
     def _on_close(self):
         """Handle window close."""
         self._unregister_hotkey()
+        self.recorder.stop_device_watcher()
         if hasattr(self, 'auto_record_listener'):
             self.auto_record_listener.stop_listening()
         if self.is_recording:
@@ -1685,7 +2405,7 @@ class RecorderApp:
         else:
             self.stop_recording()
 
-    def start_recording(self):
+    def start_recording(self, preroll=None):
         mode = self.mode_var.get()
 
         # Warn if no loopback for desktop modes
@@ -1706,7 +2426,7 @@ class RecorderApp:
             mode = "mic"  # Fall back to mic only
 
         try:
-            self.recorder.start(mode, self._selected_mic, self._selected_desktop)
+            self.recorder.start(mode, self._selected_mic, self._selected_desktop, preroll=preroll)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to start: {e}")
             return
@@ -1719,6 +2439,9 @@ class RecorderApp:
         self.overlay = RecordingOverlay(self.root, self.recorder)
         self.overlay.start_timer()
 
+        if self.config.get("auto_stop_silence_seconds", 0) > 0:
+            self.root.after(1000, self._check_auto_stop)
+
     def _set_controls_enabled(self, enabled: bool):
         state = "normal" if enabled else "disabled"
         for child in self.root.winfo_children():
@@ -1759,6 +2482,8 @@ class RecorderApp:
                 self.mic_combo.config(state="readonly")
             if hasattr(self, 'desktop_combo'):
                 self.desktop_combo.config(state="readonly")
+            if hasattr(self, 'output_combo'):
+                self.output_combo.config(state="readonly")
         except Exception:
             pass
         
@@ -1770,6 +2495,12 @@ class RecorderApp:
             self.status_label.config(text="Ready", foreground="gray")
             return
 
+        silence_spans = None
+        if self.config.get("trim_silence", False):
+            audio, silence_spans = self.recorder.trim_silence(
+                self.config.get("min_silence_seconds", DEFAULT_MIN_SILENCE_SECONDS)
+            )
+
         # Show Save/Approve dialog with error handling
         try:
             dialog = SaveApproveDialog(self.root)
@@ -1818,7 +2549,11 @@ class RecorderApp:
         filepath = save_dir / filename
 
         try:
-            self.recorder.save(str(filepath), audio)
+            self.recorder.save(
+                str(filepath), audio,
+                self.config.get("output_mode", DEFAULT_OUTPUT_MODE),
+                silence_spans=silence_spans
+            )
             status_text = f"{'Approved' if dialog.result == 'approve' else 'Saved'}: {filepath.name}"
             self.status_label.config(text=status_text, foreground="green")
             print(f"Recording saved: {filepath}")
@@ -1830,8 +2565,69 @@ class RecorderApp:
         self.root.mainloop()
 
 
+def run_headless(backend: AudioBackend, seconds: float, mode: str = "both",
+                 output: str = None, output_mode: str = DEFAULT_OUTPUT_MODE,
+                 listen: bool = False) -> np.ndarray:
+    """Record (and optionally run beep detection) without any UI."""
+    recorder = AudioRecorder(backend)
+    listener = None
+    if listen:
+        listener = AutoRecordListener(None, CALLING_BEEP_FILE, recorder)
+        if not listener.start_listening():
+            print("Auto-record listener could not start")
+            listener = None
+
+    recorder.start(mode)
+    time.sleep(seconds)
+    audio = recorder.stop()
+
+    if listener:
+        listener.stop_listening()
+
+    duration = len(audio) / SAMPLE_RATE
+    print(f"Captured {duration:.1f}s of audio in {seconds:.1f}s")
+    if output and recorder.save(output, audio, output_mode):
+        print(f"Recording saved: {output}")
+    return audio
+
+
 def main():
-    if sd is None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Audio recorder")
+    parser.add_argument('--backend', choices=list(BACKENDS),
+                        help="Audio backend (default: from config.json)")
+    parser.add_argument('--headless', type=float, metavar='SECONDS',
+                        help="Record for SECONDS without the UI, then exit")
+    parser.add_argument('--mode', choices=["mic", "desktop", "both"], default="both",
+                        help="Recording source for --headless")
+    parser.add_argument('--output', help="MP3 path to save the --headless recording")
+    parser.add_argument('--output-mode', choices=OUTPUT_MODES, default=DEFAULT_OUTPUT_MODE)
+    parser.add_argument('--listen', action='store_true',
+                        help="Run calling-beep detection during --headless")
+    parser.add_argument('--replay-mic', help="WAV file replayed as the microphone (replay backend)")
+    parser.add_argument('--replay-desktop',
+                        help="WAV file replayed as the desktop loopback (replay backend)")
+    args = parser.parse_args()
+
+    replay = None
+    if args.backend == "replay":
+        files = {}
+        if args.replay_mic:
+            files["Microphone (replay)"] = args.replay_mic
+        if args.replay_desktop:
+            files["Stereo Mix (replay)"] = args.replay_desktop
+        if not files:
+            parser.error("--backend replay needs --replay-mic and/or --replay-desktop")
+        replay = FileReplayBackend(files)
+
+    if args.headless is not None:
+        backend = replay or create_backend(args.backend or "synthetic")
+        run_headless(backend, args.headless, args.mode, args.output,
+                     args.output_mode, args.listen)
+        return
+
+    if args.backend is None and create_backend() is None:
         print("Missing: sounddevice")
         print("Run: pip install sounddevice")
         return
@@ -1840,7 +2636,7 @@ def main():
         print("Warning: keyboard library not installed - hotkeys will be disabled")
         print("To enable hotkeys, run: pip install keyboard")
 
-    app = RecorderApp()
+    app = RecorderApp(backend_name=args.backend, backend=replay)
     app.run()
 
 
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Call Pipeline Benchmark
+
+Runs synthetic calls of several lengths through every stage between the
+recorder and the CRM, offline, and times each one:
+    encode      AudioRecorder.save() writing the MP3 (audio recorder)
+    preprocess  preprocess_audio() making the 16 kHz Opus upload copy
+    transcribe  the fake transcription backend (no network)
+    parse       load_analysis() parsing and repairing the answer
+    persist     save_call() plus the recording upload, against a throwaway
+                local PocketBase server started from the given binary
+
+Usage:
+    python benchmark_pipeline.py --pocketbase ./pocketbase
+    python benchmark_pipeline.py --durations 30,300 --repeat 5 --json
+    python benchmark_pipeline.py --pocketbase ./pocketbase --save-baseline
+    python benchmark_pipeline.py --pocketbase ./pocketbase --baseline benchmark_baseline.json
+
+Stages that can't run here are reported as skipped with the reason: encode
+needs the audio recorder's dependencies and ffmpeg, preprocess needs ffmpeg,
+and persist needs --pocketbase (PocketBase 0.23+). Results are compared with
+the baseline file when it exists. A stage more than --threshold (and at least
+--min-delta milliseconds) slower than the baseline counts as a regression,
+and the exit code is then 1. Baselines
+are only meaningful on the machine that recorded them.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from audio_preprocess import find_ffmpeg, preprocess_audio, processed_path
+from call_analysis import ANALYSIS_SCHEMA, load_analysis
+from pocketbase_service import CRMPocketBase, PhoneIndex, attach_recording, save_call
+from transcribe_calls import TRANSCRIPTION_PROMPT
+from transcription_backends import FakeBackend
+
+RECORDER_DIR = Path(__file__).parent.parent / "audio-recorder"
+SCHEMA_FILE = Path(__file__).parent.parent.parent / "packages" / "pocketbase-client" / "pb_schema_exported.json"
+DEFAULT_BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+
+STAGES = ["encode", "preprocess", "transcribe", "parse", "persist"]
+DEFAULT_DURATIONS = [30, 120, 600]
+SAMPLE_RATE = 44100  # The recorder's capture rate
+
+BENCH_ADMIN_EMAIL = "benchmark@example.com"
+BENCH_ADMIN_PASSWORD = "benchmark-password"
+
+
+def synthetic_call(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Mono float32 audio shaped like a call: alternating voiced turns, pauses and hold silences."""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+    position = 0.0
+    speaker = 0
+    while position < seconds:
+        turn = rng.uniform(1.5, 8.0)
+        start, end = int(position * sample_rate), int(min(seconds, position + turn) * sample_rate)
+        t = np.arange(end - start) / sample_rate
+        pitch = 120.0 if speaker == 0 else 210.0
+        voice = sum(np.sin(2 * np.pi * pitch * h * t) / h for h in range(1, 6))
+        # About four syllables a second
+        syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3.0, 5.0) * t)) ** 2
+        noise = rng.normal(0, 0.02, len(t))
+        audio[start:end] = (0.2 * voice * syllables + noise).astype(np.float32)
+        # Short gap between turns, now and then a long hold
+        position += turn + (rng.uniform(3.0, 6.0) if rng.random() < 0.1 else rng.uniform(0.2, 1.2))
+        speaker = 1 - speaker
+    return np.clip(audio, -1.0, 1.0)
+
+
+def write_wav(path: Path, audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> Path:
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((audio * 32767).astype(np.int16).tobytes())
+    return path
+
+
+def load_recorder():
+    """(AudioRecorder instance, None) or (None, reason it can't be used)."""
+    if not find_ffmpeg():
+        return None, "ffmpeg not found"
+    sys.path.insert(0, str(RECORDER_DIR))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            from recorder import AudioRecorder
+            from audio_backends import FileReplayBackend
+    except ImportError as e:
+        return None, f"audio recorder unavailable ({e})"
+    # No capture device is opened: the recorder only encodes here
+    return AudioRecorder(FileReplayBackend({})), None
+
+
+class LocalPocketBase:
+    """Throwaway PocketBase server with the CRM schema, in a temporary directory."""
+
+    def __init__(self, binary: str):
+        self.binary = str(Path(binary).resolve())
+        self.version = None
+        self.client = None
+        self._dir = None
+        self._process = None
+
+    def _run(self, *args) -> str:
+        result = subprocess.run([self.binary, *args], capture_output=True, text=True, timeout=60)
+        if result.returncode != 0:
+            raise RuntimeError(f"pocketbase {args[0]} failed: {(result.stderr or result.stdout).strip()}")
+        return result.stdout.strip()
+
+    def __enter__(self) -> CRMPocketBase:
+        self._dir = tempfile.mkdtemp(prefix='benchmark_pb_')
+        try:
+            return self._start()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+
+    def _start(self) -> CRMPocketBase:
+        data_dir = f"--dir={self._dir}"
+        self.version = self._run('--version')
+        self._run('superuser', 'upsert', BENCH_ADMIN_EMAIL, BENCH_ADMIN_PASSWORD, data_dir)
+
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        self._process = subprocess.Popen(
+            [self.binary, 'serve', f'--http=127.0.0.1:{port}', data_dir],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+        self.client = CRMPocketBase(f"http://127.0.0.1:{port}")
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{self.client.url}/api/health", timeout=2).raise_for_status()
+                break
+            except Exception:
+                if time.monotonic() > deadline or self._process.poll() is not None:
+                    raise RuntimeError("Local PocketBase didn't start")
+                time.sleep(0.2)
+
+        self.client.auth_as_admin(BENCH_ADMIN_EMAIL, BENCH_ADMIN_PASSWORD)
+        with open(SCHEMA_FILE, 'r') as f:
+            self.client.import_collections(json.load(f))
+        self.client.update_settings({'batch': {'enabled': True, 'maxRequests': 50, 'timeout': 3}})
+        return self.client
+
+    def __exit__(self, *exc):
+        if self.client:
+            self.client.close()
+        if self._process:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def timed(fn, *args, **kwargs):
+    """(result, milliseconds) of one call, with its console output hidden."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = (time.perf_counter() - started) * 1000
+    return result, elapsed
+
+
+def run_call(workdir: Path, seconds: int, iteration: int, recorder, backend: FakeBackend,
+             client: CRMPocketBase = None, index: PhoneIndex = None) -> dict:
+    """Stage timings (ms) for one synthetic call; a stage that can't run is left out."""
+    audio = synthetic_call(seconds, seed=seconds * 1000 + iteration)
+    times = {}
+
+    source = workdir / f"call_{seconds}s_{iteration}.mp3"
+    if recorder is not None:
+        ok, times['encode'] = timed(recorder.save, str(source), audio)
+        if not ok:
+            raise RuntimeError("AudioRecorder.save failed")
+    else:
+        source = write_wav(source.with_suffix('.wav'), audio)
+
+    upload_path = source
+    if find_ffmpeg():
+        target = processed_path(source)
+        if target.exists():
+            target.unlink()
+        upload_path, times['preprocess'] = timed(preprocess_audio, source)
+
+    text, times['transcribe'] = timed(
+        backend.transcribe, upload_path, TRANSCRIPTION_PROMPT, schema=ANALYSIS_SCHEMA
+    )
+    analysis, times['parse'] = timed(load_analysis, text)
+
+    if client is not None:
+        phone = f"+1555{random.randrange(10 ** 7):07d}"
+
+        def persist():
+            company, phone_record, call_log, transcript, follow_up = save_call(
+                client, analysis, phone, model_used=backend.model_name, phone_index=index
+            )
+            attach_recording(client, source, call_log, phone)
+            return call_log
+
+        call_log, times['persist'] = timed(persist)
+        check_saved(client, call_log)
+    return times
+
+
+def check_saved(client: CRMPocketBase, call_log: dict):
+    """Make sure a persisted call has its transcript and recording linked (outside the timing)."""
+    record = client.get_call_log(call_log['id'])
+    if not record.get('has_recording'):
+        raise RuntimeError(f"Call log {call_log['id']} was saved without its recording")
+    transcript = client.get_transcript_for_call_log(call_log['id'])
+    if transcript is None:
+        raise RuntimeError(f"Call log {call_log['id']} was saved without its transcript")
+
+
+def summarize(samples: list) -> dict:
+    return {
+        'runs': len(samples),
+        'median_ms': statistics.median(samples),
+        'mean_ms': statistics.fmean(samples),
+        'min_ms': min(samples),
+        'max_ms': max(samples),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float = 0.0) -> list:
+    """Rows of (duration, stage, baseline ms, current ms, ratio, regressed).
+
+    A slowdown only counts when it is over the threshold and at least
+    min_delta ms, so jitter in millisecond stages isn't reported.
+    """
+    rows = []
+    for duration, stages in results['results'].items():
+        for stage, current in stages.items():
+            before = baseline.get('results', {}).get(duration, {}).get(stage, {})
+            if 'median_ms' not in current or 'median_ms' not in before:
+                continue
+            ratio = current['median_ms'] / before['median_ms'] if before['median_ms'] else math.inf
+            slower = current['median_ms'] - before['median_ms']
+            rows.append((duration, stage, before['median_ms'], current['median_ms'],
+                         ratio, ratio > 1 + threshold and slower >= min_delta))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the call pipeline from recording to CRM record",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument('--durations', default=','.join(map(str, DEFAULT_DURATIONS)),
+                        help="Synthetic call lengths in seconds (default: 30,120,600)")
+    parser.add_argument('--repeat', type=int, default=3, help="Calls per length (default: 3)")
+    parser.add_argument('--pocketbase', metavar='BINARY',
+                        help="PocketBase 0.23+ executable to run the persist stage against")
+    parser.add_argument('--fake-latency', type=float, default=0.0,
+                        help="Simulated transcription latency in seconds (default: 0)")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help=f"Baseline to compare with (default: {DEFAULT_BASELINE.name})")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown counted as a regression (default: 0.2 = 20%%)")
+    parser.add_argument('--min-delta', type=float, default=10.0,
+                        help="Smallest slowdown in ms counted as a regression (default: 10)")
+    parser.add_argument('--output', type=Path, help="Also write the results to this JSON file")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    durations = [int(d) for d in args.durations.split(',') if d.strip()]
+    with contextlib.redirect_stdout(io.StringIO()):
+        recorder, recorder_missing = load_recorder()
+        ffmpeg = find_ffmpeg()
+    backend = FakeBackend(latency=args.fake_latency, latency_per_mb=0, failure_rate=0, seed=0)
+
+    skipped = {}
+    if recorder is None:
+        skipped['encode'] = recorder_missing
+    if not ffmpeg:
+        skipped['preprocess'] = "ffmpeg not found"
+    if not args.pocketbase:
+        skipped['persist'] = "no --pocketbase binary given"
+
+    server = LocalPocketBase(args.pocketbase) if args.pocketbase else contextlib.nullcontext()
+    samples = {d: {stage: [] for stage in STAGES} for d in durations}
+    with server as client, tempfile.TemporaryDirectory(prefix='benchmark_calls_') as tmp:
+        index = PhoneIndex(client) if client else None
+        if index:
+            index.warm()
+        # One untimed call first: the first encode, ffmpeg run and PocketBase
+        # save pay one-off start-up costs that would skew the first samples
+        if not args.json:
+            print("⏱️  Warm-up call...")
+        run_call(Path(tmp), min(durations), -1, recorder, backend, client, index)
+        for seconds in durations:
+            for iteration in range(args.repeat):
+                if not args.json:
+                    print(f"⏱️  {seconds}s call {iteration + 1}/{args.repeat}...")
+                times = run_call(Path(tmp), seconds, iteration, recorder, backend, client, index)
+                for stage, ms in times.items():
+                    samples[seconds][stage].append(ms)
+
+    results = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'ffmpeg': bool(ffmpeg),
+            'pocketbase': server.version if args.pocketbase else None,
+            'repeat': args.repeat,
+        },
+        'results': {
+            f"{seconds}s": {
+                stage: summarize(samples[seconds][stage]) if samples[seconds][stage]
+                else {'skipped': skipped.get(stage, "not run")}
+                for stage in STAGES
+            }
+            for seconds in durations
+        },
+    }
+
+    baseline = None
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold, args.min_delta) if baseline else []
+    regressions = [r for r in rows if r[5]]
+    if baseline:
+        results['comparison'] = {
+            'baseline': str(args.baseline),
+            'baseline_created': baseline.get('meta', {}).get('created'),
+            'threshold': args.threshold,
+            'min_delta_ms': args.min_delta,
+            'stages': [
+                {'duration': d, 'stage': s, 'baseline_ms': b, 'current_ms': c,
+                 'ratio': r, 'regression': bad}
+                for d, s, b, c, r, bad in rows
+            ],
+        }
+
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 1 if regressions else 0
+
+    print(f"\n{'Call':<6} {'Stage':<11} {'median':>10} {'min':>10} {'max':>10}  {'vs baseline':>11}")
+    print("-" * 64)
+    ratios = {(d, s): r for d, s, _, _, r, _ in rows}
+    for duration, stages in results['results'].items():
+        for stage, summary in stages.items():
+            if 'skipped' in summary:
+                print(f"{duration:<6} {stage:<11} {'skipped: ' + summary['skipped']}")
+                continue
+            ratio = ratios.get((duration, stage))
+            change = f"{(ratio - 1):+.0%}" if ratio is not None else "-"
+            print(f"{duration:<6} {stage:<11} {summary['median_ms']:>8.1f}ms "
+                  f"{summary['min_ms']:>8.1f}ms {summary['max_ms']:>8.1f}ms  {change:>11}")
+    print("-" * 64)
+
+    if args.save_baseline:
+        print(f"💾 Baseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline} - run with --save-baseline to record one")
+    elif regressions:
+        print(f"❌ {len(regressions)} stage(s) more than {args.threshold:.0%} slower than the baseline")
+    else:
+        print(f"✅ No stage more than {args.threshold:.0%} slower than the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+CRM-Tableturnerr Call Analysis
+
+The structured answer the transcription model returns for a call: its JSON
+schema (sent to Gemini as response_schema), a fast parser, and repair of the
+usual mistakes (numbers as strings, a list given as one string, missing
+arrays, outcome spelled differently). Fields that can't be fixed locally are
+asked for again in a small text-only request based on the transcript, so a
+bad answer never costs another upload and transcription of the recording.
+"""
+
+import json
+import re
+from typing import Callable, Iterable, List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+CALL_OUTCOMES = ['Interested', 'Not Interested', 'Callback', 'No Answer', 'Wrong Number', 'Other']
+
+# name -> (kind, nullable)
+ANALYSIS_FIELDS = {
+    'company_name': ('string', False),
+    'owner_name': ('string', True),
+    'receptionist_name': ('string', True),
+    'recipients': ('string', True),
+    'call_outcome': ('outcome', False),
+    'interest_level': ('integer', False),
+    'objections': ('list', False),
+    'pain_points': ('list', False),
+    'follow_up_actions': ('list', False),
+    'callback_requested': ('boolean', False),
+    'callback_notes': ('string', True),
+    'call_summary': ('string', False),
+    'call_duration_estimate': ('string', True),
+    # Null when the transcript is stored separately (long calls)
+    'transcript': ('string', True),
+}
+
+# Used in targeted re-asks, so the model knows what a single field means
+FIELD_DESCRIPTIONS = {
+    'company_name': 'Name of the company being called',
+    'call_outcome': f'One of: {", ".join(CALL_OUTCOMES)}',
+    'interest_level': '1-10 integer rating of how interested they seemed',
+    'call_summary': 'Brief 2-3 sentence summary of the call',
+}
+
+# Fields with no safe default: re-asked if missing or unusable
+REASK_FIELDS = tuple(FIELD_DESCRIPTIONS)
+
+# Last resort if a re-ask doesn't help (the values saving used to assume)
+FALLBACKS = {
+    'company_name': 'Unknown Company',
+    'call_outcome': 'Other',
+    'interest_level': 5,
+    'call_summary': '',
+}
+
+SEGMENT_SCHEMA = {
+    'type': 'object',
+    'properties': {'transcript': {'type': 'string'}},
+    'required': ['transcript'],
+}
+
+FIELD_REPAIR_PROMPT = """
+You are given the transcript of a cold call below. Based only on the
+transcript, return a JSON object with exactly these fields:
+{fields}
+
+Return ONLY the JSON object, no additional text.
+"""
+
+JSON_REPAIR_PROMPT = """
+The text below was meant to be a JSON object describing a cold call, but it is
+not valid JSON (it may be cut off, wrapped in other text or have a syntax
+error). Return the same content as one valid JSON object. Do not invent
+anything; use null for values that are missing.
+"""
+
+_NULL_STRINGS = {'', 'null', 'none', 'n/a', '-'}
+_TRUE_STRINGS = {'true', 'yes', 'y', '1'}
+_FALSE_STRINGS = {'false', 'no', 'n', '0', ''}
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+INTEREST_RANGE = (1, 10)  # interest_level, the only integer field
+_BULLET_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s*')
+_OUTCOMES_BY_KEY = {re.sub(r'[^a-z]', '', outcome.lower()): outcome for outcome in CALL_OUTCOMES}
+
+
+def response_schema(fields: Iterable[str] = None) -> dict:
+    """JSON schema for the analysis (or just some of its fields), for response_schema."""
+    names = list(fields or ANALYSIS_FIELDS)
+    properties = {}
+    for name in names:
+        kind, nullable = ANALYSIS_FIELDS[name]
+        if kind == 'list':
+            prop = {'type': 'array', 'items': {'type': 'string'}}
+        elif kind == 'outcome':
+            prop = {'type': 'string', 'format': 'enum', 'enum': CALL_OUTCOMES}
+        else:
+            prop = {'type': kind}
+        if nullable:
+            prop['nullable'] = True
+        properties[name] = prop
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': [name for name in names if not ANALYSIS_FIELDS[name][1]],
+    }
+
+
+ANALYSIS_SCHEMA = response_schema()
+
+
+def _loads(text: str):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def parse_json(text: str) -> dict:
+    """
+    Parse a JSON object answer, using orjson when it is installed.
+
+    Tolerates a Markdown code fence or other text around the object.
+    Raises ValueError if there is no valid JSON object.
+    """
+    try:
+        data = _loads(text)
+    except ValueError:
+        # Both json and orjson decode errors are ValueErrors
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            raise ValueError("Response does not contain a JSON object")
+        data = _loads(text[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    return data
+
+
+def _coerce(kind: str, nullable: bool, value):
+    """(value, ok) for one field; ok is False if the value can't be used."""
+    if kind == 'string':
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        elif isinstance(value, list):
+            value = ', '.join(str(item) for item in value if item is not None)
+        if value is None or (isinstance(value, str) and value.strip().lower() in _NULL_STRINGS):
+            return None, nullable
+        if not isinstance(value, str):
+            return None, False
+        return value.strip(), True
+
+    if kind == 'integer':
+        if isinstance(value, bool):
+            return None, False
+        if isinstance(value, str):
+            match = _NUMBER_RE.search(value)  # "7", "7/10", "about 7"
+            value = float(match.group()) if match else None
+        if not isinstance(value, (int, float)):
+            return None, False
+        low, high = INTEREST_RANGE
+        value = int(round(value))
+        # 0 (or less) means the model couldn't rate it: re-ask or fall back
+        if value < low:
+            return None, False
+        return min(high, value), True
+
+    if kind == 'boolean':
+        if isinstance(value, bool):
+            return value, True
+        if isinstance(value, (int, float)):
+            return bool(value), True
+        if isinstance(value, str):
+            text = value.strip().lower()
+            if text in _TRUE_STRINGS:
+                return True, True
+            if text in _FALSE_STRINGS:
+                return False, True
+        return None, False
+
+    if kind == 'list':
+        if value is None:
+            return [], True
+        if isinstance(value, str):
+            if value.strip().lower() in _NULL_STRINGS:
+                return [], True
+            value = re.split(r'[\n;]', value)
+        if not isinstance(value, list):
+            return [], False
+        items = [_BULLET_RE.sub('', str(item)).strip() for item in value if item is not None]
+        return [item for item in items if item], True
+
+    if kind == 'outcome':
+        if isinstance(value, str):
+            key = re.sub(r'[^a-z]', '', value.lower())
+            if key in _OUTCOMES_BY_KEY:
+                return _OUTCOMES_BY_KEY[key], True
+            if key.startswith('callback') or key.startswith('callmeback'):
+                return 'Callback', True
+        return None, False
+
+    raise ValueError(f"Unknown field kind: {kind}")
+
+
+def coerce_analysis(data: dict, fields: Iterable[str] = None) -> Tuple[dict, List[str]]:
+    """
+    Fix the types of an analysis (or some of its fields).
+
+    Fields with a safe default (lists, optional text, callback_requested) are
+    filled in when missing or unusable. Other bad fields are left out and
+    reported.
+
+    Returns:
+        (analysis, names of fields that still need a value)
+    """
+    names = list(fields or ANALYSIS_FIELDS)
+    analysis = {}
+    problems = []
+    for name in names:
+        kind, nullable = ANALYSIS_FIELDS[name]
+        value, ok = _coerce(kind, nullable, data.get(name))
+        if ok:
+            analysis[name] = value
+        elif name in REASK_FIELDS:
+            problems.append(name)
+        elif kind == 'boolean':
+            # callback_requested: follow the outcome
+            analysis[name] = analysis.get('call_outcome') == 'Callback'
+        else:
+            analysis[name] = [] if kind == 'list' else None
+    return analysis, problems
+
+
+def repair_analysis(data: dict, reask: Callable[[str, str, dict], str] = None,
+                    transcript: str = None) -> dict:
+    """
+    Coerce an analysis and fill any fields that are still unusable.
+
+    Args:
+        data: Analysis as parsed from the model
+        reask: (prompt, text, schema) -> JSON text; a cheap text-only model
+            call, used to ask again for just the broken fields
+        transcript: Transcript to base the re-ask on (default: data's own)
+
+    Returns:
+        dict: Analysis with every field present and correctly typed
+    """
+    analysis, problems = coerce_analysis(data)
+    source = transcript or analysis.get('transcript')
+
+    if problems and reask and source:
+        print(f"🩹 Re-asking for {', '.join(problems)} from the transcript...")
+        fields = '\n'.join(f'- "{name}": {FIELD_DESCRIPTIONS[name]}' for name in problems)
+        try:
+            answer = parse_json(reask(FIELD_REPAIR_PROMPT.format(fields=fields), source,
+                                      response_schema(problems)))
+            fixed, problems = coerce_analysis(answer, problems)
+            analysis.update(fixed)
+        except Exception as e:
+            print(f"⚠️ Re-ask failed: {e}")
+
+    if problems:
+        print(f"⚠️ Using defaults for {', '.join(problems)}")
+        for name in problems:
+            analysis[name] = FALLBACKS[name]
+    return {name: analysis[name] for name in ANALYSIS_FIELDS}
+
+
+def load_analysis(text: str, reask: Callable[[str, str, dict], str] = None,
+                  transcript: str = None) -> dict:
+    """
+    Parse and repair the model's analysis answer.
+
+    If the text isn't valid JSON and reask is given, the model is asked once
+    to return it as valid JSON (text only, no audio).
+    """
+    try:
+        data = parse_json(text)
+    except ValueError:
+        if reask is None:
+            raise
+        print("🩹 Response wasn't valid JSON, asking for a corrected copy...")
+        data = parse_json(reask(JSON_REPAIR_PROMPT, text, ANALYSIS_SCHEMA))
+    return repair_analysis(data, reask, transcript)
@@ -0,0 +1,231 @@
+"""
+CRM-Tableturnerr Chunked Transcription
+
+Long calls are split at silences into overlapping segments, the segments are
+transcribed in parallel, and the transcripts are stitched back together with
+the overlap removed. A final text-only pass turns the merged transcript into
+the usual analysis. Wall-clock time then depends on the segment length rather
+than the call length, and a failed segment is retried on its own instead of
+losing the whole call.
+
+Uses the ffmpeg command line tool to find silences and cut segments.
+"""
+
+import difflib
+import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from audio_preprocess import find_ffmpeg
+
+
+# Calls longer than this are chunked
+CHUNK_THRESHOLD_SECONDS = float(os.getenv('TRANSCRIBER_CHUNK_MINUTES', 10)) * 60
+SEGMENT_SECONDS = 300.0  # Target segment length
+SEARCH_SECONDS = 45.0  # How far from the target a silence may be to cut there
+OVERLAP_SECONDS = 8.0  # Audio repeated at the start of each segment
+SEGMENT_WORKERS = int(os.getenv('TRANSCRIBER_SEGMENT_WORKERS', 4))
+SEGMENT_ATTEMPTS = 3
+
+SILENCE_DB = -40
+SILENCE_MIN_SECONDS = 0.5
+
+# How many lines at a segment boundary are compared when removing overlap
+STITCH_WINDOW_LINES = 12
+STITCH_MATCH_RATIO = 0.8
+
+_DURATION_RE = re.compile(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)')
+_SILENCE_START_RE = re.compile(r'silence_start:\s*(-?\d+(?:\.\d+)?)')
+_SILENCE_END_RE = re.compile(r'silence_end:\s*(\d+(?:\.\d+)?)')
+
+
+def _parse_duration(ffmpeg_output: str) -> Optional[float]:
+    match = _DURATION_RE.search(ffmpeg_output)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def probe_duration(audio_path: Path) -> Optional[float]:
+    """Length of a recording in seconds from its header (no decoding), or None."""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return None
+    # With no output file ffmpeg just prints the input info and exits
+    result = subprocess.run([ffmpeg, '-hide_banner', '-i', str(audio_path)],
+                            capture_output=True, text=True)
+    return _parse_duration(result.stderr)
+
+
+def analyze_silences(audio_path: Path) -> Tuple[Optional[float], List[float]]:
+    """
+    Duration and silence midpoints of a recording (one ffmpeg decode pass).
+
+    Returns:
+        (duration_seconds or None, sorted silence midpoints in seconds)
+    """
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return None, []
+
+    result = subprocess.run(
+        [ffmpeg, '-hide_banner', '-nostats', '-i', str(audio_path),
+         '-af', f'silencedetect=noise={SILENCE_DB}dB:d={SILENCE_MIN_SECONDS}',
+         '-f', 'null', '-'],
+        capture_output=True, text=True
+    )
+    output = result.stderr
+    duration = _parse_duration(output)
+
+    starts = [float(m) for m in _SILENCE_START_RE.findall(output)]
+    ends = [float(m) for m in _SILENCE_END_RE.findall(output)]
+    midpoints = sorted((max(start, 0.0) + end) / 2 for start, end in zip(starts, ends))
+    return duration, midpoints
+
+
+def plan_segments(duration: float, silences: List[float],
+                  segment_seconds: float = SEGMENT_SECONDS,
+                  search_seconds: float = SEARCH_SECONDS,
+                  overlap_seconds: float = OVERLAP_SECONDS) -> List[Tuple[float, float]]:
+    """
+    Choose (start, end) times for the segments of a recording.
+
+    Each cut lands on the silence nearest the target length (or exactly on the
+    target if there is no silence within search_seconds). Every segment after
+    the first starts overlap_seconds before the previous cut.
+    """
+    cuts = []
+    position = 0.0
+    while duration - position > segment_seconds + search_seconds:
+        target = position + segment_seconds
+        nearby = [s for s in silences if abs(s - target) <= search_seconds and s > position + overlap_seconds]
+        cut = min(nearby, key=lambda s: abs(s - target)) if nearby else target
+        cuts.append(cut)
+        position = cut
+
+    segments = []
+    start = 0.0
+    for cut in cuts + [duration]:
+        segments.append((max(0.0, start - overlap_seconds) if segments else 0.0, cut))
+        start = cut
+    return segments
+
+
+def cut_segment(audio_path: Path, start: float, end: float, target: Path) -> Path:
+    """Write one segment of a recording as Opus."""
+    ffmpeg = find_ffmpeg()
+    subprocess.run(
+        [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+         '-ss', f'{start:.3f}', '-t', f'{end - start:.3f}', '-i', str(audio_path),
+         '-c:a', 'libopus', '-b:a', '32k', '-application', 'voip', '-f', 'ogg', str(target)],
+        check=True, capture_output=True
+    )
+    return target
+
+
+def _normalize_line(line: str) -> str:
+    """Lower-case words of a transcript line without its speaker label."""
+    if ':' in line[:20]:
+        line = line.split(':', 1)[1]
+    return ' '.join(re.findall(r"[\w']+", line.lower()))
+
+
+def _lines_match(a: str, b: str) -> bool:
+    if not a or not b:
+        return False
+    # A segment may start or end mid-sentence, so a fragment of a line counts
+    if a in b or b in a:
+        return min(len(a), len(b)) >= 8
+    return difflib.SequenceMatcher(None, a, b).ratio() >= STITCH_MATCH_RATIO
+
+
+def stitch_transcripts(parts: List[str], window: int = STITCH_WINDOW_LINES) -> str:
+    """
+    Join segment transcripts, dropping lines repeated across each overlap.
+
+    The first lines of every segment are compared, in order, with the last
+    lines of the text so far; the run of repeated lines at the start of the
+    segment is dropped. When one side has only a fragment of a repeated line,
+    the longer version is kept.
+    """
+    merged: List[str] = []
+    for part in parts:
+        lines = [line for line in part.splitlines() if line.strip()]
+        if not merged:
+            merged.extend(lines)
+            continue
+
+        tail = merged[-window:]
+        tail_norm = [_normalize_line(line) for line in tail]
+        offset = len(merged) - len(tail)
+        skip = 0
+        last = -1
+        leading_misses = 0
+        for i, line in enumerate(lines[:window]):
+            norm = _normalize_line(line)
+            # Repeated lines appear in the same order, after the previous match
+            j = next((j for j in range(last + 1, len(tail_norm))
+                      if _lines_match(norm, tail_norm[j])), None)
+            if j is None:
+                if skip:
+                    break  # Past the overlap
+                # Allow one unmatched leading fragment before the overlap starts
+                leading_misses += 1
+                if leading_misses > 1:
+                    break
+                continue
+            skip = i + 1
+            last = j
+            # Prefer the more complete of the two versions
+            if len(norm) > len(tail_norm[j]):
+                merged[offset + j] = line
+        merged.extend(lines[skip:])
+    return '\n'.join(merged)
+
+
+def transcribe_long_call(audio_path: Path, transcribe_segment: Callable[[Path, int, int], str],
+                         analyze_transcript: Callable[[str], dict],
+                         workers: int = SEGMENT_WORKERS) -> dict:
+    """
+    Transcribe a long recording segment by segment and analyse the result.
+
+    Args:
+        audio_path: Recording to transcribe
+        transcribe_segment: (segment_path, index, count) -> transcript text
+        analyze_transcript: merged transcript -> analysis dict
+        workers: Segments transcribed at the same time
+
+    Returns:
+        dict: Analysis with the stitched transcript
+    """
+    duration, silences = analyze_silences(audio_path)
+    if duration is None:
+        raise ValueError(f"Could not read the duration of {audio_path.name}")
+    segments = plan_segments(duration, silences)
+    print(f"✂️  Splitting {audio_path.name} ({duration / 60:.1f} min) into {len(segments)} segments")
+
+    with tempfile.TemporaryDirectory(prefix='transcribe_segments_') as tmp:
+        def run(index: int) -> str:
+            start, end = segments[index]
+            path = cut_segment(audio_path, start, end, Path(tmp) / f"segment_{index:03d}.opus")
+            for attempt in range(1, SEGMENT_ATTEMPTS + 1):
+                try:
+                    return transcribe_segment(path, index, len(segments))
+                except Exception as e:
+                    if attempt == SEGMENT_ATTEMPTS:
+                        raise
+                    print(f"⚠️ Segment {index + 1}/{len(segments)} failed ({e}), retrying...")
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            parts = list(executor.map(run, range(len(segments))))
+
+    transcript = stitch_transcripts(parts)
+    print(f"🧵 Stitched {len(parts)} segments, running analysis...")
+    analysis = analyze_transcript(transcript)
+    analysis['transcript'] = transcript
+    return analysis
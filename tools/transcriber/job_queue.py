@@ -0,0 +1,242 @@
+"""
+CRM-Tableturnerr Transcription Job Queue
+
+Persistent SQLite queue of recordings waiting to be transcribed, so the watch
+daemon and batch runs can be stopped or crash without losing or repeating work.
+
+Each job also records how far it got through the pipeline:
+    uploaded     audio handed to the backend (upload_ref kept for reuse)
+    transcribed  analysis stored in the job
+    saved        PocketBase records written (result_id is the call record)
+    linked       recording attached to the call record
+A restarted job resumes after its last completed stage, so paid work
+(transcription) is never repeated and nothing is saved twice. Long calls
+transcribed in segments never reach "uploaded" (segment uploads aren't
+kept), so an interrupted one is transcribed again from the start.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Pipeline stages, in order
+UPLOADED = 'uploaded'
+TRANSCRIBED = 'transcribed'
+SAVED = 'saved'
+LINKED = 'linked'
+STAGES = [UPLOADED, TRANSCRIBED, SAVED, LINKED]
+
+# Columns added after the first release, created on open if missing
+_MIGRATIONS = {
+    'idempotency_key': 'TEXT',
+    'stage': 'TEXT',
+    'upload_ref': 'TEXT',
+    'analysis': 'TEXT',
+    'company_id': 'TEXT',
+}
+
+
+def stage_reached(job: Dict, stage: str) -> bool:
+    """Whether a job has completed a stage (or a later one)."""
+    current = job.get('stage')
+    return current in STAGES and STAGES.index(current) >= STAGES.index(stage)
+
+
+class JobQueue:
+    """Recording jobs stored in a local SQLite database (one row per file)."""
+
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        self.db_path = str(db_path)
+        self.max_attempts = max_attempts
+        # Claims must not interleave between worker threads
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL UNIQUE,
+                    phone_number TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    result_id TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for name, kind in _MIGRATIONS.items():
+                if name not in columns:
+                    conn.execute(f'ALTER TABLE jobs ADD COLUMN {name} {kind}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+            conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_idempotency_key
+                ON jobs (idempotency_key) WHERE idempotency_key IS NOT NULL
+            ''')
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        if job.get('analysis'):
+            job['analysis'] = json.loads(job['analysis'])
+        return job
+
+    def enqueue(self, path: str, phone_number: Optional[str] = None,
+                idempotency_key: Optional[str] = None) -> bool:
+        """
+        Add a recording. Returns False if it was already queued (in any state).
+
+        The idempotency key (the audio's content hash) makes a copied or
+        moved recording count as the same job; an unfinished job follows
+        the file to its new path.
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self._connect() as conn:
+            if idempotency_key:
+                row = conn.execute(
+                    'SELECT id, status FROM jobs WHERE idempotency_key = ?', (idempotency_key,)
+                ).fetchone()
+                if row is not None:
+                    if row['status'] != DONE:
+                        conn.execute(
+                            'UPDATE OR IGNORE jobs SET path = ?, updated_at = ? WHERE id = ?',
+                            (str(path), now, row['id'])
+                        )
+                    return False
+            cursor = conn.execute('''
+                INSERT OR IGNORE INTO jobs (path, phone_number, idempotency_key, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (str(path), phone_number, idempotency_key, now, now))
+            return cursor.rowcount > 0
+
+    def get(self, path: str = None, idempotency_key: str = None) -> Optional[Dict]:
+        """A job by idempotency key or path, or None."""
+        with self._connect() as conn:
+            row = None
+            if idempotency_key:
+                row = conn.execute(
+                    'SELECT * FROM jobs WHERE idempotency_key = ?', (idempotency_key,)
+                ).fetchone()
+            if row is None and path:
+                row = conn.execute('SELECT * FROM jobs WHERE path = ?', (str(path),)).fetchone()
+            return self._job(row) if row else None
+
+    def start(self, job_id: int) -> Dict:
+        """Mark a specific job running (for callers that schedule jobs themselves)."""
+        with self._lock, self._connect() as conn:
+            conn.execute('''
+                UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            ''', (RUNNING, datetime.now().isoformat(), job_id))
+            return self._job(conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone())
+
+    def advance(self, job_id: int, stage: str, analysis: Optional[Dict] = None, **fields):
+        """
+        Record that a job completed a stage, with what that stage produced
+        (upload_ref, analysis, result_id, company_id).
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        updates = {'stage': stage, 'updated_at': datetime.now().isoformat()}
+        if analysis is not None:
+            updates['analysis'] = json.dumps(analysis, ensure_ascii=False)
+        for name, value in fields.items():
+            if name not in ('upload_ref', 'result_id', 'company_id'):
+                raise ValueError(f"Unknown job field: {name}")
+            updates[name] = value
+        assignments = ', '.join(f'{name} = ?' for name in updates)
+        with self._connect() as conn:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*updates.values(), job_id))
+
+    def contains(self, path: str) -> bool:
+        """Whether a recording has ever been queued."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT 1 FROM jobs WHERE path = ?', (str(path),)).fetchone()
+            return row is not None
+
+    def claim(self) -> Optional[Dict]:
+        """Take the oldest pending job and mark it running."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                'SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT 1', (PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('''
+                UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            ''', (RUNNING, datetime.now().isoformat(), row['id']))
+            job = self._job(row)
+            job['status'] = RUNNING
+            job['attempts'] += 1
+            return job
+
+    def complete(self, job_id: int, result_id: Optional[str] = None):
+        """Mark a job done, keeping the id of the record it produced."""
+        with self._connect() as conn:
+            conn.execute('''
+                UPDATE jobs SET status = ?, result_id = ?, error = NULL, updated_at = ?
+                WHERE id = ?
+            ''', (DONE, result_id, datetime.now().isoformat(), job_id))
+
+    def fail(self, job_id: int, error: str) -> bool:
+        """Record a failure. Returns True if the job will be retried."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            retry = row is not None and row['attempts'] < self.max_attempts
+            conn.execute('''
+                UPDATE jobs SET status = ?, error = ?, updated_at = ?
+                WHERE id = ?
+            ''', (PENDING if retry else FAILED, error, datetime.now().isoformat(), job_id))
+            return retry
+
+    def requeue_running(self) -> int:
+        """Return jobs left running by a previous process to the queue."""
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?
+            ''', (PENDING, datetime.now().isoformat(), RUNNING))
+            return cursor.rowcount
+
+    def retry_failed(self) -> int:
+        """Give failed jobs another round of attempts."""
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE jobs SET status = ?, attempts = 0, updated_at = ? WHERE status = ?
+            ''', (PENDING, datetime.now().isoformat(), FAILED))
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+            return {row['status']: row['n'] for row in rows}
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict]:
+        """List jobs, optionally filtered by state."""
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute('SELECT * FROM jobs WHERE status = ? ORDER BY id', (status,))
+            else:
+                rows = conn.execute('SELECT * FROM jobs ORDER BY id')
+            return [self._job(row) for row in rows.fetchall()]
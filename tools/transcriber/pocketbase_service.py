@@ -3,12 +3,23 @@ CRM-Tableturnerr PocketBase Service
 
 Thin wrapper that imports from the shared SDK in packages/pocketbase-client.
 This allows the transcriber to use the same client as other Python apps.
+
+get_client() hands out one long-lived, authenticated client per server and
+admin account, so batch and watch runs reuse the same keep-alive connections
+and admin token instead of logging in again for every recording.
+get_phone_index() adds a local phone -> company map on top of it, so
+matching a caller's number doesn't need a request. attach_recording()
+uploads the call's audio to the recordings collection once it is saved.
 """
 
+import atexit
 import os
 import re
 import sys
+import threading
 from pathlib import Path
+
+import httpx
 from datetime import datetime, timedelta
 
 # Add the shared SDK to path
@@ -19,6 +30,10 @@ sys.path.insert(0, str(SDK_PATH))
 from pocketbase_client import (
     CRMPocketBase,
     create_client,
+    generate_record_id,
+    record_id_for,
+    normalize_phone,
+    PhoneIndex,
     COLLECTIONS,
     # Type definitions
     Company,
@@ -38,28 +53,102 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-def get_authenticated_client() -> CRMPocketBase:
-    """
-    Create and authenticate a PocketBase client using environment variables.
-    
-    Returns:
-        CRMPocketBase: Authenticated client ready for API calls.
-    """
+# Renew the admin token when it has less than this many seconds left
+TOKEN_REFRESH_MARGIN = 300
+
+_clients = {}  # (url, email) -> CRMPocketBase
+_phone_indexes = {}  # (url, email) -> PhoneIndex
+_clients_lock = threading.Lock()
+
+
+def _admin_settings() -> tuple:
+    """(url, email, password) from the environment."""
     url = os.getenv('POCKETBASE_URL', 'http://localhost:8090')
     email = os.getenv('PB_ADMIN_EMAIL')
     password = os.getenv('PB_ADMIN_PASSWORD')
-    
+
     if not email or not password:
         raise ValueError(
             "PB_ADMIN_EMAIL and PB_ADMIN_PASSWORD must be set in environment "
             "or .env file"
         )
-    
+    return url, email, password
+
+
+def get_authenticated_client() -> CRMPocketBase:
+    """
+    Create and authenticate a new PocketBase client using environment variables.
+
+    The caller owns the client and should close it. Prefer get_client() for
+    repeated work in the same process.
+
+    Returns:
+        CRMPocketBase: Authenticated client ready for API calls.
+    """
+    url, email, password = _admin_settings()
     client = create_client(url)
     client.auth_as_admin(email, password)
     return client
 
 
+def get_client() -> CRMPocketBase:
+    """
+    Shared authenticated PocketBase client for this process.
+
+    The client is created on first use and kept open; its token is renewed
+    shortly before it expires (and on a 401). It is safe to use from several
+    threads at once. Don't close it - close_clients() runs at exit.
+
+    Returns:
+        CRMPocketBase: Authenticated client ready for API calls.
+    """
+    url, email, password = _admin_settings()
+    key = (url, email)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = create_client(url)
+            _clients[key] = client
+    client.ensure_admin_auth(email, password, TOKEN_REFRESH_MARGIN)
+    return client
+
+
+def get_phone_index(warm: bool = True) -> PhoneIndex:
+    """
+    Shared phone index for the shared client (see PhoneIndex).
+
+    Args:
+        warm: Load it now if it isn't loaded yet, instead of on first lookup
+
+    Returns:
+        PhoneIndex: Index of every known phone number
+    """
+    client = get_client()
+    url, email, _ = _admin_settings()
+    with _clients_lock:
+        index = _phone_indexes.get((url, email))
+        if index is None:
+            index = PhoneIndex(client)
+            _phone_indexes[(url, email)] = index
+    if warm and not index.is_warm:
+        index.warm()
+        print(f"📇 Loaded {len(index)} phone numbers")
+    return index
+
+
+def close_clients() -> None:
+    """Close every shared client (called automatically at exit)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _phone_indexes.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_clients)
+
+
 def find_or_create_company(
     client: CRMPocketBase,
     company_name: str,
@@ -110,28 +199,17 @@ def find_or_create_company(
     return client.create_company(data)
 
 
-def create_cold_call_with_transcript(
-    client: CRMPocketBase,
+def _cold_call_requests(
     company_id: str,
     transcript_text: str,
     analysis: dict,
-    model_used: str = "gemini-2.5-flash"
-) -> tuple[ColdCall, CallTranscript]:
-    """
-    Create a cold call record with its transcript.
-
-    Args:
-        client: Authenticated PocketBase client
-        company_id: ID of the related company
-        transcript_text: Full transcript text
-        analysis: Dict with extracted call analysis data
-        model_used: AI model used for transcription
-
-    Returns:
-        tuple: (ColdCall record, CallTranscript record)
-    """
-    # Create cold call record
+    model_used: str,
+    call_id: str = None,
+) -> list:
+    """Batch requests for a cold call and its transcript (IDs chosen here)."""
+    cold_call_id = call_id or generate_record_id()
     call_data = {
+        'id': cold_call_id,
         'company': company_id,
         'recipients': analysis.get('recipients', ''),
         'call_outcome': analysis.get('call_outcome', 'Other'),
@@ -145,17 +223,41 @@ def create_cold_call_with_transcript(
         'phone_number': analysis.get('phone_number', ''),
         'owner_name': analysis.get('owner_name', ''),
     }
-
-    cold_call = client.create_cold_call(call_data)
-
-    # Create transcript record linked to the call
+    # Transcript record linked to the call
     transcript_data = {
-        'call': cold_call['id'],
+        'id': generate_record_id(),
+        'call': cold_call_id,
         'transcript': transcript_text,
     }
+    return [
+        CRMPocketBase.batch_create(COLLECTIONS['COLD_CALLS'], call_data),
+        CRMPocketBase.batch_create(COLLECTIONS['CALL_TRANSCRIPTS'], transcript_data),
+    ]
+
 
-    transcript = client.create_transcript(transcript_data)
+def create_cold_call_with_transcript(
+    client: CRMPocketBase,
+    company_id: str,
+    transcript_text: str,
+    analysis: dict,
+    model_used: str = "gemini-2.5-flash"
+) -> tuple[ColdCall, CallTranscript]:
+    """
+    Create a cold call record with its transcript (one batch request).
 
+    Args:
+        client: Authenticated PocketBase client
+        company_id: ID of the related company
+        transcript_text: Full transcript text
+        analysis: Dict with extracted call analysis data
+        model_used: AI model used for transcription
+
+    Returns:
+        tuple: (ColdCall record, CallTranscript record)
+    """
+    cold_call, transcript = client.batch(
+        _cold_call_requests(company_id, transcript_text, analysis, model_used)
+    )
     return cold_call, transcript
 
 
@@ -190,6 +292,8 @@ def find_or_create_phone_number(
             'label': 'Main Line',
         })
 
+    normalized = normalize_phone(phone_number)
+
     # Try to find existing phone number
     existing = client.find_phone_number(clean_phone)
 
@@ -200,6 +304,8 @@ def find_or_create_phone_number(
             updates['receptionist_name'] = receptionist_name
         if location_name and not existing.get('location_name'):
             updates['location_name'] = location_name
+        if normalized and not existing.get('phone_normalized'):
+            updates['phone_normalized'] = normalized
         updates['last_called'] = datetime.utcnow().isoformat() + 'Z'
 
         return client.update_phone_number(existing['id'], updates)
@@ -208,6 +314,7 @@ def find_or_create_phone_number(
     return client.create_phone_number({
         'company': company_id,
         'phone_number': clean_phone,
+        'phone_normalized': normalized,
         'label': 'Main Line',
         'receptionist_name': receptionist_name,
         'location_name': location_name,
@@ -215,81 +322,74 @@ def find_or_create_phone_number(
     })
 
 
-def create_call_log_with_transcript(
-    client: CRMPocketBase,
+def _duration_seconds(analysis: dict):
+    """Parse a "X minutes Y seconds" estimate to seconds, or None."""
+    duration_str = analysis.get('call_duration_estimate', '')
+    if not duration_str:
+        return None
+    minutes_match = re.search(r'(\d+)\s*minute', duration_str, re.IGNORECASE)
+    seconds_match = re.search(r'(\d+)\s*second', duration_str, re.IGNORECASE)
+    minutes = int(minutes_match.group(1)) if minutes_match else 0
+    seconds = int(seconds_match.group(1)) if seconds_match else 0
+    return minutes * 60 + seconds if minutes or seconds else None
+
+
+def _call_log_requests(
     company_id: str,
     phone_number_record_id: str,
     transcript_text: str,
     analysis: dict,
-    model_used: str = "gemini-2.5-flash"
-) -> tuple[CallLog, CallTranscript, FollowUp | None]:
+    call_id: str = None,
+) -> list:
     """
-    Create a call log record with its transcript and optional follow-up.
-
-    This is the NEW workflow that replaces create_cold_call_with_transcript.
-
-    Args:
-        client: Authenticated PocketBase client
-        company_id: ID of the related company
-        phone_number_record_id: ID of the phone_numbers record
-        transcript_text: Full transcript text
-        analysis: Dict with extracted call analysis data
-        model_used: AI model used for transcription
-
-    Returns:
-        tuple: (CallLog record, CallTranscript record, FollowUp record or None)
+    Batch requests for a call log, its transcript, the timeline interaction
+    and (if the call asks for one) a follow-up. IDs are chosen here so the
+    records can reference each other inside the same batch.
     """
-    # Parse duration estimate to seconds if possible
-    duration_seconds = None
-    duration_str = analysis.get('call_duration_estimate', '')
-    if duration_str:
-        # Try to parse "X minutes Y seconds" format
-        import re
-        minutes_match = re.search(r'(\d+)\s*minute', duration_str, re.IGNORECASE)
-        seconds_match = re.search(r'(\d+)\s*second', duration_str, re.IGNORECASE)
-        minutes = int(minutes_match.group(1)) if minutes_match else 0
-        seconds = int(seconds_match.group(1)) if seconds_match else 0
-        if minutes or seconds:
-            duration_seconds = minutes * 60 + seconds
-
-    # Create call log record
+    now = datetime.utcnow().isoformat() + 'Z'
+    call_log_id = call_id or generate_record_id()
+
     call_log_data = {
+        'id': call_log_id,
         'company': company_id,
         'phone_number_record': phone_number_record_id,
-        'call_time': datetime.utcnow().isoformat() + 'Z',
-        'duration': duration_seconds,
+        'call_time': now,
+        'duration': _duration_seconds(analysis),
         'call_outcome': analysis.get('call_outcome', 'Other'),
         'owner_name_found': analysis.get('owner_name', ''),
         'receptionist_name': analysis.get('receptionist_name', ''),
         'post_call_notes': analysis.get('call_summary', ''),
         'interest_level': analysis.get('interest_level', 5),
-        'has_recording': False,  # Will be updated if recording is linked
+        'has_recording': False,  # Set by attach_recording() once the audio is uploaded
     }
 
-    call_log = client.create_call_log(call_log_data)
-
-    # Create transcript record linked to the call (reusing cold_calls transcript structure)
+    # Transcript record linked to the call log
     transcript_data = {
-        'call': call_log['id'],  # Note: This uses the call_transcripts collection which links to cold_calls
+        'id': generate_record_id(),
+        'call_log': call_log_id,
         'transcript': transcript_text,
     }
 
-    transcript = client.create_transcript(transcript_data)
-
-    # Create interaction record for unified timeline
-    client.create_interaction({
+    # Interaction record for unified timeline
+    interaction_data = {
+        'id': generate_record_id(),
         'company': company_id,
         'channel': 'phone',
         'direction': 'outbound',
-        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'timestamp': now,
         'summary': analysis.get('call_summary', ''),
-        'call_log': call_log['id'],
-    })
+        'call_log': call_log_id,
+    }
+
+    requests = [
+        CRMPocketBase.batch_create(COLLECTIONS['CALL_LOGS'], call_log_data),
+        CRMPocketBase.batch_create(COLLECTIONS['CALL_TRANSCRIPTS'], transcript_data),
+        CRMPocketBase.batch_create(COLLECTIONS['INTERACTIONS'], interaction_data),
+    ]
 
     # Auto-create follow-up if callback outcome detected
-    follow_up = None
-    call_outcome = analysis.get('call_outcome', '').lower()
-    follow_up_actions = analysis.get('follow_up_actions', [])
+    call_outcome = (analysis.get('call_outcome') or '').lower()
+    follow_up_actions = analysis.get('follow_up_actions') or []
     callback_requested = analysis.get('callback_requested', False)
 
     if call_outcome == 'callback' or callback_requested or any('call' in action.lower() for action in follow_up_actions):
@@ -302,13 +402,302 @@ def create_call_log_with_transcript(
         if not follow_up_notes and follow_up_actions:
             follow_up_notes = '; '.join(follow_up_actions)
 
-        follow_up = client.create_follow_up({
-            'call_log': call_log['id'],
+        requests.append(CRMPocketBase.batch_create(COLLECTIONS['FOLLOW_UPS'], {
+            'id': generate_record_id(),
+            'call_log': call_log_id,
             'company': company_id,
             'scheduled_time': follow_up_time.isoformat() + 'Z',
             'client_timezone': 'America/New_York',  # Default, can be updated later
             'notes': follow_up_notes,
             'status': 'pending',
-        })
+        }))
+
+    return requests
+
+
+def create_call_log_with_transcript(
+    client: CRMPocketBase,
+    company_id: str,
+    phone_number_record_id: str,
+    transcript_text: str,
+    analysis: dict,
+    model_used: str = "gemini-2.5-flash"
+) -> tuple[CallLog, CallTranscript, FollowUp | None]:
+    """
+    Create a call log record with its transcript and optional follow-up.
+
+    This is the NEW workflow that replaces create_cold_call_with_transcript.
+    All records are written in one batch request, so a failure leaves none
+    of them behind.
+
+    Args:
+        client: Authenticated PocketBase client
+        company_id: ID of the related company
+        phone_number_record_id: ID of the phone_numbers record
+        transcript_text: Full transcript text
+        analysis: Dict with extracted call analysis data
+        model_used: AI model used for transcription
+
+    Returns:
+        tuple: (CallLog record, CallTranscript record, FollowUp record or None)
+    """
+    results = client.batch(
+        _call_log_requests(company_id, phone_number_record_id, transcript_text, analysis)
+    )
+    follow_up = results[3] if len(results) > 3 else None
+    return results[0], results[1], follow_up
+
 
-    return call_log, transcript, follow_up
+def _save_call_requests(
+    company: Company,
+    phone_record: PhoneNumber,
+    analysis: dict,
+    phone_number: str,
+    model_used: str,
+    use_legacy: bool,
+    call_id: str = None,
+) -> tuple:
+    """
+    Batch requests for save_call(), given what the lookup found.
+
+    Returns:
+        (requests, company request index or None, phone request index or None,
+         index of the first call record request)
+    """
+    clean_phone = re.sub(r'\D', '', phone_number) if phone_number else ''
+    normalized = normalize_phone(phone_number)
+    now = datetime.utcnow().isoformat() + 'Z'
+    owner_name = analysis.get('owner_name')
+
+    requests = []
+    company_request = phone_request = None
+
+    if company is None:
+        company_data = {
+            'id': generate_record_id(),
+            'company_name': analysis.get('company_name', 'Unknown Company'),
+            'source': 'Cold Call',
+        }
+        if phone_number:
+            company_data['phone_numbers'] = phone_number
+        if owner_name:
+            company_data['owner_name'] = owner_name
+        company_request = len(requests)
+        requests.append(CRMPocketBase.batch_create(COLLECTIONS['COMPANIES'], company_data))
+        company_id = company_data['id']
+    else:
+        company_id = company['id']
+        if owner_name and not company.get('owner_name'):
+            company_request = len(requests)
+            requests.append(CRMPocketBase.batch_update(
+                COLLECTIONS['COMPANIES'], company_id, {'owner_name': owner_name}
+            ))
+
+    if use_legacy:
+        call_request = len(requests)
+        requests += _cold_call_requests(
+            company_id, analysis.get('transcript', ''), analysis, model_used, call_id
+        )
+        return requests, company_request, phone_request, call_request
+
+    receptionist_name = analysis.get('receptionist_name')
+    if phone_record is None:
+        phone_data = {
+            'id': generate_record_id(),
+            'company': company_id,
+            'phone_number': clean_phone or 'Unknown',
+            'label': 'Main Line',
+        }
+        if clean_phone:
+            phone_data.update({
+                'phone_normalized': normalized,
+                'receptionist_name': receptionist_name,
+                'last_called': now,
+            })
+        phone_request = len(requests)
+        requests.append(CRMPocketBase.batch_create(COLLECTIONS['PHONE_NUMBERS'], phone_data))
+        phone_id = phone_data['id']
+    else:
+        phone_id = phone_record['id']
+        updates = {'last_called': now}
+        if receptionist_name and receptionist_name != phone_record.get('receptionist_name'):
+            updates['receptionist_name'] = receptionist_name
+        # Records saved before normalisation get their number filled in
+        if normalized and not phone_record.get('phone_normalized'):
+            updates['phone_normalized'] = normalized
+        phone_request = len(requests)
+        requests.append(CRMPocketBase.batch_update(COLLECTIONS['PHONE_NUMBERS'], phone_id, updates))
+
+    call_request = len(requests)
+    requests += _call_log_requests(
+        company_id, phone_id, analysis.get('transcript', ''), analysis, call_id
+    )
+    return requests, company_request, phone_request, call_request
+
+
+def save_call(
+    client: CRMPocketBase,
+    analysis: dict,
+    phone_number: str = None,
+    model_used: str = "gemini-2.5-flash",
+    use_legacy: bool = False,
+    phone_index: PhoneIndex = None,
+    idempotency_key: str = None,
+) -> tuple:
+    """
+    Save a transcribed call in one or two round trips.
+
+    The company and phone number record are found in the phone index (no
+    request) or with one lookup, then the company / phone number creates or
+    updates and every call record are written in a single transaction. If
+    anything is rejected nothing is saved.
+
+    Args:
+        client: Authenticated PocketBase client
+        analysis: Dict with extracted call analysis data
+        phone_number: Phone number the call was made to
+        model_used: AI model used for transcription
+        use_legacy: Create a cold_calls record instead of a call log
+        phone_index: Optional PhoneIndex to match the number locally
+        idempotency_key: Derive the call record's ID from this key, so the
+            same call can never be saved twice (see find_saved_call)
+
+    Returns:
+        tuple: (Company, PhoneNumber or None, call log / cold call, CallTranscript, FollowUp or None)
+    """
+    clean_phone = re.sub(r'\D', '', phone_number) if phone_number else ''
+
+    company, phone_record = (None, None)
+    from_index = False
+    if clean_phone:
+        match = phone_index.lookup(phone_number) if phone_index else None
+        if match:
+            company, phone_record = match
+            from_index = True
+        else:
+            # A warm index already covers numbers saved before normalisation,
+            # so only the indexed exact match is needed
+            company, phone_record = client.find_company_and_phone_number(
+                phone_number, text_fallback=not (phone_index and phone_index.is_warm)
+            )
+
+    call_id = call_id_for(idempotency_key, use_legacy) if idempotency_key else None
+    requests, company_request, phone_request, call_request = _save_call_requests(
+        company, phone_record, analysis, phone_number, model_used, use_legacy, call_id
+    )
+    try:
+        results = client.batch(requests)
+    except httpx.HTTPStatusError:
+        if not from_index:
+            raise
+        # The index may be stale (record deleted or moved elsewhere): reload it
+        # later and retry this save with a server lookup
+        phone_index.invalidate()
+        return save_call(client, analysis, phone_number, model_used, use_legacy,
+                         idempotency_key=idempotency_key)
+
+    company = results[company_request] if company_request is not None else company
+    phone_record = results[phone_request] if phone_request is not None else phone_record
+    if phone_index:
+        phone_index.add(company, phone_record)
+
+    call_results = results[call_request:]
+    call_record, transcript = call_results[0], call_results[1]
+    follow_up = call_results[3] if len(call_results) > 3 else None
+    return company, phone_record, call_record, transcript, follow_up
+
+
+def call_id_for(idempotency_key: str, use_legacy: bool = False) -> str:
+    """ID the call record of a job gets (see save_call)."""
+    collection = COLLECTIONS['COLD_CALLS'] if use_legacy else COLLECTIONS['CALL_LOGS']
+    return record_id_for(f"{collection}:{idempotency_key}")
+
+
+def find_saved_call(client: CRMPocketBase, idempotency_key: str, use_legacy: bool = False):
+    """
+    The call record an earlier save_call() with this key created, or None.
+
+    Lets a retried job that crashed right after saving skip the save.
+    """
+    call_id = call_id_for(idempotency_key, use_legacy)
+    try:
+        if use_legacy:
+            return client.get_cold_call(call_id)
+        return client.get_call_log(call_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            return None
+        raise
+
+
+def attach_recording(
+    client: CRMPocketBase,
+    audio_path: Path,
+    call_log: dict,
+    phone_number: str = None,
+    idempotency_key: str = None,
+    on_progress=None,
+) -> Recording:
+    """
+    Upload a call's audio to the recordings collection and flag the call log.
+
+    The file is streamed from disk (see CRMPocketBase.upload_recording).
+    With an idempotency key the recording gets a derived ID, so attaching the
+    same call again returns the recording that is already there.
+
+    Args:
+        client: Authenticated PocketBase client
+        audio_path: Original recording
+        call_log: The call log record (company / phone_number_record / duration used)
+        phone_number: Phone number called, stored on the recording
+        idempotency_key: Job key the recording ID is derived from
+        on_progress: Called with (bytes_sent, total_bytes) during the upload
+
+    Returns:
+        Recording: The recording record
+    """
+    audio_path = Path(audio_path)
+    recording = None
+    data = {
+        'call_log': call_log['id'],
+        'company': call_log.get('company'),
+        'phone_number_record': call_log.get('phone_number_record'),
+        'phone_number': phone_number,
+        'recording_date': datetime.utcfromtimestamp(audio_path.stat().st_mtime).isoformat() + 'Z',
+        'duration': call_log.get('duration'),
+        'note': audio_path.name,
+    }
+    if idempotency_key:
+        data['id'] = record_id_for(f"{COLLECTIONS['RECORDINGS']}:{idempotency_key}")
+        try:
+            recording = client.get_recording(data['id'])
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+
+    if recording is None:
+        recording = client.upload_recording(str(audio_path), data, on_progress=on_progress)
+    if not call_log.get('has_recording'):
+        client.update_call_log(call_log['id'], {'has_recording': True})
+    return recording
+
+
+def backfill_phone_normalized(client: CRMPocketBase) -> int:
+    """
+    Fill in phone_normalized on phone_numbers records saved before it existed.
+
+    Returns:
+        int: Number of records updated
+    """
+    records = client.get_all_records(COLLECTIONS['PHONE_NUMBERS'], PhoneIndex.PHONE_FIELDS)
+    requests = []
+    for record in records:
+        normalized = normalize_phone(record.get('phone_number'))
+        if normalized and record.get('phone_normalized') != normalized:
+            requests.append(client.batch_update(
+                COLLECTIONS['PHONE_NUMBERS'], record['id'], {'phone_normalized': normalized}
+            ))
+    # PocketBase caps the number of requests per batch (50 by default)
+    for start in range(0, len(requests), 50):
+        client.batch(requests[start:start + 50])
+    return len(requests)
@@ -0,0 +1,183 @@
+"""
+CRM-Tableturnerr Recording Watcher
+
+Watches the audio recorder's output folders and reports each new recording
+once it has finished being written. Uses filesystem events through watchdog
+(inotify / ReadDirectoryChangesW / FSEvents) when it is installed, and falls
+back to polling the folders otherwise.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+# Sidecar files the recorder writes next to a recording (stems, silence maps)
+IGNORED_SUFFIXES = ('_mic', '_sys')
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards created/modified/moved files to the watcher."""
+
+    def __init__(self, watcher: 'RecordingWatcher'):
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.touch(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.touch(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher.touch(event.dest_path)
+
+
+class RecordingWatcher:
+    """Reports new audio files in a set of folders once they stop changing.
+
+    A file counts as finished when its size and modification time have not
+    changed for settle_seconds, so files still being encoded or copied are
+    never picked up half-written. on_ready(path) is called once per file from
+    the watcher thread.
+    """
+
+    def __init__(self, folders: Iterable[Path], on_ready: Callable[[Path], None],
+                 extensions: Iterable[str], settle_seconds: float = 5.0,
+                 poll_interval: float = 2.0, include_existing: bool = False,
+                 seen: Optional[Callable[[Path], bool]] = None):
+        self.folders = [Path(f) for f in folders]
+        self.on_ready = on_ready
+        self.extensions = {e.lower() for e in extensions}
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.include_existing = include_existing
+        # Lets the caller skip files it already knows about (e.g. in the job queue)
+        self.seen = seen or (lambda path: False)
+
+        self._pending: Dict[Path, Tuple[int, float, float]] = {}  # path -> (size, mtime, stable since)
+        self._reported = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._observer = None
+
+    @property
+    def using_events(self) -> bool:
+        return self._observer is not None
+
+    def start(self):
+        """Start watching in the background."""
+        for folder in self.folders:
+            folder.mkdir(parents=True, exist_ok=True)
+
+        # Files already there when we start are history unless asked for
+        for path in self._scan():
+            if self.include_existing:
+                self.touch(path)
+            else:
+                self._reported.add(path)
+
+        if Observer is not None:
+            self._observer = Observer()
+            handler = _EventHandler(self)
+            for folder in self.folders:
+                self._observer.schedule(handler, str(folder), recursive=False)
+            self._observer.start()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching."""
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def touch(self, path):
+        """Note that a file appeared or changed."""
+        path = Path(path)
+        if not self._is_recording(path):
+            return
+        with self._lock:
+            if path in self._reported:
+                return
+            # Restart the settle timer on every change
+            self._pending[path] = (-1, 0.0, time.monotonic())
+        self._wake.set()
+
+    def _is_recording(self, path: Path) -> bool:
+        return (path.suffix.lower() in self.extensions
+                and not path.stem.endswith(IGNORED_SUFFIXES))
+
+    def _scan(self):
+        for folder in self.folders:
+            if not folder.exists():
+                continue
+            for path in folder.iterdir():
+                if path.is_file() and self._is_recording(path):
+                    yield path
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Without events, discover new files by listing the folders
+            if self._observer is None:
+                for path in self._scan():
+                    with self._lock:
+                        known = path in self._reported or path in self._pending
+                    if not known:
+                        self.touch(path)
+
+            for path in self._settled():
+                if self.seen(path):
+                    continue
+                try:
+                    self.on_ready(path)
+                except Exception as e:
+                    print(f"⚠️ Watcher callback failed for {path.name}: {e}")
+
+            with self._lock:
+                waiting = bool(self._pending)
+            # Re-check pending files often enough to notice them settle
+            timeout = min(self.poll_interval, self.settle_seconds) if waiting else self.poll_interval
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _settled(self) -> list:
+        """Pending files whose size and mtime held still for settle_seconds."""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, (size, mtime, since) in list(self._pending.items()):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    # Deleted or renamed before it settled
+                    del self._pending[path]
+                    continue
+
+                if (stat.st_size, stat.st_mtime) != (size, mtime):
+                    self._pending[path] = (stat.st_size, stat.st_mtime, now)
+                elif stat.st_size > 0 and now - since >= self.settle_seconds:
+                    del self._pending[path]
+                    self._reported.add(path)
+                    ready.append(path)
+        return ready
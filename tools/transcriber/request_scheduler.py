@@ -0,0 +1,217 @@
+"""
+CRM-Tableturnerr Gemini Request Scheduler
+
+Keeps concurrent transcriptions inside the Gemini quota. Every request waits
+for its turn against two budgets shared by all worker threads:
+    requests per minute   requests are spaced evenly at the allowed rate
+    tokens per minute     input tokens sent in the last 60 seconds
+A request's tokens are estimated before it is sent (audio is about 32 tokens
+per second, text about 4 characters per token) and corrected with the usage
+Gemini reports.
+
+When Gemini answers 429 anyway, both budgets are halved, and everything
+pauses for the delay the error asks for. Each successful request then wins
+back a little of the budget (additive increase, multiplicative decrease),
+so a batch settles at the fastest rate the quota actually sustains. Without
+configured limits the scheduler doesn't throttle until the first 429; it
+then caps the request rate at what it had just been sending.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from chunked_transcription import probe_duration
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:
+    google_exceptions = None
+
+
+# Quota of the Gemini project (0 = not known, learned from 429s)
+GEMINI_RPM = float(os.getenv('GEMINI_RPM', 0))
+GEMINI_TPM = float(os.getenv('GEMINI_TPM', 0))
+
+AUDIO_TOKENS_PER_SECOND = 32  # Gemini's audio tokenisation rate
+CHARS_PER_TOKEN = 4
+# Bitrate assumed when a recording's duration can't be read (128 kbps MP3)
+FALLBACK_BYTES_PER_SECOND = 16000
+
+WINDOW_SECONDS = 60.0
+RATE_LIMIT_PAUSE = 10.0  # Pause after a 429 that doesn't say how long to wait
+MIN_SCALE = 0.05  # Budgets are never cut below this fraction
+RECOVERY_STEP = 0.02  # Budget fraction won back per successful request
+RATE_LIMIT_ATTEMPTS = 5  # Tries per request before a 429 is raised
+
+_RETRY_DELAY_RE = re.compile(r'retry(?:_delay)?[^0-9]{0,20}(\d+(?:\.\d+)?)\s*s', re.IGNORECASE)
+
+
+class RateLimitError(Exception):
+    """The backend rejected a request for exceeding its quota (HTTP 429)."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an exception from a backend is a quota (429) error."""
+    if isinstance(error, RateLimitError):
+        return True
+    if google_exceptions is not None and isinstance(error, google_exceptions.ResourceExhausted):
+        return True
+    return getattr(error, 'code', None) == 429
+
+
+def retry_after(error: Exception):
+    """Seconds a 429 asks the caller to wait, if it says."""
+    if getattr(error, 'retry_after', None):
+        return error.retry_after
+    match = _RETRY_DELAY_RE.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def estimate_audio_tokens(audio_path: Path) -> int:
+    """Input tokens for a recording, from its duration (or its size if ffmpeg is missing)."""
+    duration = probe_duration(audio_path)
+    if duration is None:
+        duration = Path(audio_path).stat().st_size / FALLBACK_BYTES_PER_SECOND
+    return int(duration * AUDIO_TOKENS_PER_SECOND)
+
+
+def estimate_text_tokens(*texts: str) -> int:
+    """Input tokens for prompt and transcript text."""
+    return sum(len(text) for text in texts if text) // CHARS_PER_TOKEN
+
+
+class RequestScheduler:
+    """Shares requests-per-minute and tokens-per-minute budgets between threads.
+
+    Backends call wait(tokens) before each request, then on_success() (with
+    the tokens actually used, if known) or on_rate_limited() after it.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        self.requests_per_minute = GEMINI_RPM if requests_per_minute is None else requests_per_minute
+        self.tokens_per_minute = GEMINI_TPM if tokens_per_minute is None else tokens_per_minute
+        self.scale = 1.0
+        self.rate_limited = 0  # 429s seen
+        self._next = 0.0
+        self._paused_until = 0.0
+        self._requests = deque()  # send times, for the observed rate
+        self._tokens = deque()  # (time, tokens), including usage corrections
+        self._window_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limited(self) -> bool:
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+    def describe(self) -> str:
+        """The budgets in use, for log lines."""
+        parts = []
+        if self.requests_per_minute:
+            parts.append(f"{self.requests_per_minute * self.scale:g} requests/min")
+        if self.tokens_per_minute:
+            parts.append(f"{self.tokens_per_minute * self.scale:,.0f} tokens/min")
+        return ", ".join(parts) or "no limit"
+
+    def _expire(self, now: float):
+        while self._requests and self._requests[0] <= now - WINDOW_SECONDS:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= now - WINDOW_SECONDS:
+            self._window_tokens -= self._tokens.popleft()[1]
+
+    def _start_time(self, now: float, tokens: int) -> float:
+        """Earliest time a request of this size fits both budgets."""
+        start = max(now, self._next, self._paused_until)
+        budget = self.tokens_per_minute * self.scale
+        excess = self._window_tokens + tokens - budget
+        if budget and excess > 0 and self._tokens:
+            # Wait until enough of the window's tokens have aged out
+            freed = 0
+            for sent, count in self._tokens:
+                freed += count
+                if freed >= excess:
+                    break
+            start = max(start, sent + WINDOW_SECONDS)
+        return start
+
+    def wait(self, tokens: int = 0):
+        """Block until a request with this many input tokens may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                start = self._start_time(now, tokens)
+                if start <= now:
+                    rate = self.requests_per_minute * self.scale
+                    self._next = now + (60.0 / rate if rate else 0.0)
+                    self._requests.append(now)
+                    if tokens:
+                        self._tokens.append((now, tokens))
+                        self._window_tokens += tokens
+                    return
+            # Re-checked after waking: a 429 elsewhere may have moved the start
+            time.sleep(min(start - now, 5.0))
+
+    def on_success(self, estimated: int = 0, used: int = None):
+        """Record a completed request, correcting its token estimate."""
+        with self._lock:
+            if used is not None and used != estimated:
+                self._tokens.append((time.monotonic(), used - estimated))
+                self._window_tokens += used - estimated
+            if self.scale < 1.0:
+                self.scale = min(1.0, self.scale + RECOVERY_STEP)
+
+    def on_rate_limited(self, delay: float = None):
+        """Halve the budgets and pause everything after a 429."""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self.rate_limited += 1
+            if not self.limited:
+                # No configured quota: assume what we just sent is the limit
+                self.requests_per_minute = max(1.0, len(self._requests) * 60.0 / WINDOW_SECONDS)
+            # Requests already in flight fail together: one cut per pause
+            if now >= self._paused_until:
+                self.scale = max(MIN_SCALE, self.scale * 0.5)
+            self._paused_until = max(self._paused_until, now + (delay or RATE_LIMIT_PAUSE))
+        print(f"⏳ Gemini quota reached, slowing down to {self.describe()}")
+
+
+def run_with_retries(send, scheduler: RequestScheduler = None, tokens: int = 0,
+                     attempts: int = RATE_LIMIT_ATTEMPTS):
+    """
+    Send one request through the scheduler, retrying it after a 429.
+
+    Args:
+        send: () -> (result, tokens used or None)
+        scheduler: Shared scheduler (None: just back off and retry)
+        tokens: Estimated input tokens of the request
+        attempts: Tries before the 429 is raised
+
+    Returns:
+        The result of send()
+    """
+    for attempt in range(1, attempts + 1):
+        if scheduler:
+            scheduler.wait(tokens)
+        try:
+            result, used = send()
+        except Exception as e:
+            if not is_rate_limited(e) or attempt == attempts:
+                raise
+            delay = retry_after(e)
+            if scheduler:
+                scheduler.on_rate_limited(delay)
+            else:
+                time.sleep(delay or RATE_LIMIT_PAUSE * attempt)
+            continue
+        if scheduler:
+            scheduler.on_success(tokens, used)
+        return result
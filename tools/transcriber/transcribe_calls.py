@@ -3,45 +3,72 @@
 CRM-Tableturnerr Cold Call Transcriber
 
 Transcribes cold call audio files using Google Gemini AI, extracts structured
-analysis data, and saves to PocketBase.
+analysis data, and saves to PocketBase. Set TRANSCRIBER_BACKEND (or pass
+--backend) to "fake" for offline runs, or "whisper" for local speech models.
 
 Usage:
     python transcribe_calls.py <audio_file_path> [--phone PHONE]
+    python transcribe_calls.py <file|folder|glob> ... [--workers N] [--rate RPM] [--tpm TOKENS]
+    python transcribe_calls.py --watch [FOLDER ...] [--workers N]
 
 Examples:
     python transcribe_calls.py recording.mp3
     python transcribe_calls.py call.wav --phone "+1-555-123-4567"
+    python transcribe_calls.py recording_stereo.mp3 --stereo
+    python transcribe_calls.py recordings/Approved --workers 4 --rate 15
+    python transcribe_calls.py "recordings/**/recording_19-10-2026_*.mp3" --dry-run
+    python transcribe_calls.py --watch                  # audio-recorder/recordings (+ Approved)
+    python transcribe_calls.py --watch D:/Calls --workers 3 --backfill
+    python transcribe_calls.py recording.mp3 --from-cache   # retry a failed save, no Gemini call
+    python transcribe_calls.py recordings/ --backend fake --dry-run
 """
 
 import argparse
+import glob
 import json
 import os
+import re
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Local imports
-from pocketbase_service import (
-    get_authenticated_client,
-    find_or_create_company,
-    find_or_create_phone_number,
-    create_cold_call_with_transcript,
-    create_call_log_with_transcript,
+from pocketbase_service import attach_recording, find_saved_call, get_client, get_phone_index, save_call
+from audio_preprocess import preprocess_audio
+from call_analysis import ANALYSIS_SCHEMA, SEGMENT_SCHEMA, load_analysis, parse_json, repair_analysis
+from chunked_transcription import CHUNK_THRESHOLD_SECONDS, probe_duration, transcribe_long_call
+from request_scheduler import RequestScheduler
+from job_queue import DONE, LINKED, SAVED, TRANSCRIBED, UPLOADED, JobQueue, stage_reached
+from transcription_backends import (
+    BACKENDS,
+    TranscriptionBackend,
+    create_backend,
 )
+from transcription_cache import TranscriptionCache, file_sha256
 
 
-# Gemini configuration
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
-
 # Supported audio formats
 SUPPORTED_FORMATS = {'.mp3', '.wav', '.m4a', '.ogg', '.flac', '.webm', '.aac'}
 
+# Parsed analyses keyed by audio hash + model + prompt (see transcription_cache.py)
+CACHE = TranscriptionCache()
+
+# Watch mode: the audio recorder's default output folders and the job database
+RECORDER_DIR = Path(__file__).parent.parent / "audio-recorder" / "recordings"
+DEFAULT_WATCH_DIRS = [RECORDER_DIR, RECORDER_DIR / "Approved"]
+QUEUE_DB = os.getenv('TRANSCRIBER_QUEUE_DB', str(Path(__file__).parent / "transcribe_jobs.db"))
+
+# recording_DD-MM-YYYY_HH-MM-SS_<phone>.mp3 as saved by the audio recorder
+RECORDING_NAME_RE = re.compile(r'^recording_\d{2}-\d{2}-\d{4}_\d{2}-\d{2}-\d{2}_(?P<phone>.+)$')
+
 
 TRANSCRIPTION_PROMPT = """
 You are an expert cold call analyst. Listen to this cold call recording and provide a detailed analysis.
@@ -77,6 +104,35 @@ IMPORTANT RULES:
 Return ONLY the JSON object, no additional text.
 """
 
+# Appended to the prompt for two-channel recordings from the audio recorder
+STEREO_PROMPT_NOTE = """
+This recording is stereo: the LEFT channel is the Caller (our microphone) and
+the RIGHT channel is the Recipient (desktop audio). Use the channel to decide
+who is speaking instead of guessing from voices.
+"""
+
+# Long calls: each segment is transcribed on its own, then analysed as text
+SEGMENT_PROMPT = """
+You are transcribing part {index} of {count} of a longer cold call recording.
+
+Return a JSON object: {{"transcript": "..."}}
+
+RULES:
+1. Transcribe exactly what is said in this part, from its first word to its last,
+   even if it starts or ends mid-sentence
+2. Put each speaker turn on its own line with a "Caller:" or "Recipient:" label
+3. Exclude any side conversations in Urdu/Hindi with teammates
+4. Do not summarise or add anything that is not spoken
+
+Return ONLY the JSON object, no additional text.
+"""
+
+TRANSCRIPT_ANALYSIS_NOTE = """
+You are given the full transcript of the call below instead of the recording.
+Base every field on the transcript, and set "transcript" to null - it is
+stored separately.
+"""
+
 
 def validate_audio_file(file_path: str) -> Path:
     """Validate that the audio file exists and is a supported format."""
@@ -94,56 +150,122 @@ def validate_audio_file(file_path: str) -> Path:
     return path
 
 
-def transcribe_with_gemini(audio_path: Path) -> dict:
+# Backend shared by every transcription in this process (see get_backend)
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> TranscriptionBackend:
+    """The transcription backend in use, created from TRANSCRIBER_BACKEND on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+
+def set_backend(name: str):
+    """Select the transcription backend by name (gemini, fake, whisper)."""
+    global _backend
+    with _backend_lock:
+        _backend = create_backend(name)
+
+
+def reask_with(backend: TranscriptionBackend, rate_limiter: RequestScheduler = None):
+    """Text-only follow-up request used to repair a bad analysis (see call_analysis.py)."""
+    def reask(prompt: str, text: str, schema: dict) -> str:
+        return backend.analyze_text(prompt, text, rate_limiter=rate_limiter, schema=schema)
+    return reask
+
+
+def transcribe_audio(audio_path: Path, stereo: bool = False,
+                     rate_limiter: RequestScheduler = None,
+                     use_cache: bool = True, cache_only: bool = False,
+                     preprocess: bool = True, chunk: bool = True,
+                     uploaded=None, on_upload=None) -> dict:
     """
-    Transcribe and analyze the audio file using Gemini.
+    Transcribe and analyze the audio file with the configured backend.
     
     Args:
         audio_path: Path to the audio file
+        stereo: True if the file has the caller on the left channel and the
+            recipient on the right (recorder "stereo" output)
+        rate_limiter: Optional scheduler shared by concurrent callers; every
+            Gemini request waits for its request and token budget
+        use_cache: Return a cached analysis of the same audio, model and prompt
+            if there is one, and cache new results
+        cache_only: Never call the backend; fail if the analysis isn't cached
+        preprocess: Upload a downmixed, 16 kHz, silence-trimmed Opus copy
+            (cached next to the original) instead of the original file
+        chunk: Split calls longer than CHUNK_THRESHOLD_SECONDS into segments
+            transcribed in parallel (see chunked_transcription.py)
+        uploaded: Name of an earlier upload of this recording (from the job queue)
+        on_upload: Called with the new upload's name after a new upload.
+            Segmented long calls upload each segment separately and never
+            call it, so an interrupted one is transcribed again from the start
         
     Returns:
-        dict: Parsed analysis data from Gemini
+        dict: Parsed analysis data
     """
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY environment variable is not set")
-    
-    # Configure Gemini
-    genai.configure(api_key=GEMINI_API_KEY)
-    
-    # Upload the audio file
-    print(f"📤 Uploading audio file: {audio_path.name}")
-    audio_file = genai.upload_file(path=str(audio_path))
-    
-    # Create model and generate content
-    print(f"🤖 Transcribing with {GEMINI_MODEL}...")
-    model = genai.GenerativeModel(GEMINI_MODEL)
-    
-    response = model.generate_content(
-        [TRANSCRIPTION_PROMPT, audio_file],
-        generation_config=genai.GenerationConfig(
-            response_mime_type="application/json",
-        )
-    )
-    
-    # Parse the JSON response
-    try:
-        result = json.loads(response.text)
-    except json.JSONDecodeError as e:
-        print(f"⚠️ Failed to parse JSON response, attempting cleanup...")
-        # Try to extract JSON from response
-        text = response.text.strip()
-        if text.startswith('```json'):
-            text = text[7:]
-        if text.startswith('```'):
-            text = text[3:]
-        if text.endswith('```'):
-            text = text[:-3]
-        result = json.loads(text.strip())
+    backend = get_backend()
+    prompt = TRANSCRIPTION_PROMPT + STEREO_PROMPT_NOTE if stereo else TRANSCRIPTION_PROMPT
+
+    cache_key = None
+    if use_cache or cache_only:
+        cache_key = CACHE.key_for(audio_path, backend.model_name, prompt)
+        cached = CACHE.get(cache_key)
+        if cached is not None:
+            print(f"♻️  Using cached transcription: {audio_path.name}")
+            return repair_analysis(cached)
+        if cache_only:
+            raise ValueError(
+                f"No cached transcription for {audio_path.name} "
+                f"(model {backend.model_name}, current prompt)"
+            )
+
+    upload_path = preprocess_audio(audio_path, stereo=stereo) if preprocess else audio_path
+
+    duration = probe_duration(upload_path) if chunk else None
+    if duration and duration > CHUNK_THRESHOLD_SECONDS:
+        result = transcribe_in_segments(upload_path, backend, stereo, rate_limiter)
+    else:
+        if not uploaded:
+            uploaded = backend.upload(upload_path)
+            if uploaded and on_upload:
+                # The file itself goes on to transcribe(); its name is kept for resuming
+                on_upload(getattr(uploaded, 'name', uploaded))
+        text = backend.transcribe(upload_path, prompt, rate_limiter=rate_limiter,
+                                  schema=ANALYSIS_SCHEMA, uploaded=uploaded)
+        result = load_analysis(text, reask=reask_with(backend, rate_limiter))
+
+    if cache_key:
+        CACHE.put(cache_key, result, model=backend.model_name, source=audio_path.name)
     
     return result
 
 
-def save_to_pocketbase(analysis: dict, phone_number: str = None, use_legacy: bool = False) -> tuple:
+def transcribe_in_segments(audio_path: Path, backend: TranscriptionBackend,
+                           stereo: bool = False, rate_limiter: RequestScheduler = None) -> dict:
+    """Transcribe a long call in parallel segments, then analyse the stitched transcript."""
+    def transcribe_segment(segment_path: Path, index: int, count: int) -> str:
+        prompt = SEGMENT_PROMPT.format(index=index + 1, count=count)
+        if stereo:
+            prompt += STEREO_PROMPT_NOTE
+        text = backend.transcribe(segment_path, prompt, rate_limiter=rate_limiter, schema=SEGMENT_SCHEMA)
+        return parse_json(text).get('transcript') or ''
+
+    def analyze_transcript(transcript: str) -> dict:
+        text = backend.analyze_text(
+            TRANSCRIPTION_PROMPT + TRANSCRIPT_ANALYSIS_NOTE, transcript,
+            rate_limiter=rate_limiter, schema=ANALYSIS_SCHEMA
+        )
+        return load_analysis(text, reask=reask_with(backend, rate_limiter), transcript=transcript)
+
+    return transcribe_long_call(audio_path, transcribe_segment, analyze_transcript)
+
+
+def save_to_pocketbase(analysis: dict, phone_number: str = None, use_legacy: bool = False,
+                       model_used: str = None, idempotency_key: str = None) -> tuple:
     """
     Save the transcription results to PocketBase.
 
@@ -151,70 +273,443 @@ def save_to_pocketbase(analysis: dict, phone_number: str = None, use_legacy: boo
         analysis: Parsed analysis data from Gemini
         phone_number: Optional phone number override
         use_legacy: If True, use old cold_calls workflow (default: False, uses new call_logs)
+        model_used: Model recorded on the transcript (default: the current backend's)
+        idempotency_key: Job key the call record's ID is derived from, so a
+            retried job can't save the same call twice
 
     Returns:
         tuple: (company, call_log/cold_call, transcript, follow_up) records
     """
     print("💾 Saving to PocketBase...")
+    model_used = model_used or get_backend().model_name
+
+    # Shared client: connection and admin token are reused across saves
+    client = get_client()
+
+    # Add phone to analysis for storage
+    if phone_number:
+        analysis['phone_number'] = phone_number
+
+    # Number matched locally (or with one lookup), then every record in one transaction
+    company, phone_record, call_record, transcript, follow_up = save_call(
+        client=client,
+        analysis=analysis,
+        phone_number=phone_number,
+        model_used=model_used,
+        use_legacy=use_legacy,
+        phone_index=get_phone_index(warm=False),
+        idempotency_key=idempotency_key,
+    )
+    print(f"  ✓ Company: {company['company_name']} (ID: {company['id']})")
+
+    if use_legacy:
+        print(f"  ✓ Cold Call: {call_record['id']}")
+        print(f"  ✓ Transcript: {transcript['id']}")
+        return company, call_record, transcript, None
+
+    print(f"  ✓ Phone Number: {phone_record.get('phone_number', 'Unknown')} (ID: {phone_record['id']})")
+    print(f"  ✓ Call Log: {call_record['id']}")
+    print(f"  ✓ Transcript: {transcript['id']}")
+
+    if follow_up:
+        print(f"  ✓ Follow-Up Created: {follow_up['id']} (scheduled: {follow_up.get('scheduled_time', 'N/A')})")
+
+    return company, call_record, transcript, follow_up
+
+
+def upload_progress(name: str, step: float = 0.25):
+    """Progress callback for a recording upload that prints every 25%."""
+    state = {'sent': 0, 'next': step}
+
+    def report(sent: int, total: int):
+        if sent < state['sent']:
+            state['next'] = step  # Retried from the start
+        state['sent'] = sent
+        if total and sent / total >= state['next']:
+            print(f"  ⬆️  {name}: {sent / total:.0%} of {total / (1024 * 1024):.1f} MB")
+            while state['next'] <= sent / total:
+                state['next'] += step
+    return report
+
+
+def link_recording(audio_path: Path, call_log: dict, phone_number: str = None,
+                   idempotency_key: str = None) -> dict:
+    """Upload the original recording and attach it to its call log."""
+    client = get_client()
+    if 'company' not in call_log:
+        call_log = client.get_call_log(call_log['id'])
+    print(f"📼 Uploading recording: {audio_path.name}")
+    recording = attach_recording(
+        client, audio_path, call_log, phone_number, idempotency_key,
+        on_progress=upload_progress(audio_path.name),
+    )
+    print(f"  ✓ Recording: {recording['id']}")
+    return recording
 
-    # Get authenticated client
-    client = get_authenticated_client()
 
+def warm_phone_index():
+    """Load the phone index up front so the first save doesn't wait for it."""
     try:
-        # Find or create company
-        company = find_or_create_company(
-            client=client,
-            company_name=analysis.get('company_name', 'Unknown Company'),
-            phone_number=phone_number,
-            owner_name=analysis.get('owner_name'),
+        get_phone_index()
+    except Exception as e:
+        print(f"⚠️ Could not load phone numbers from PocketBase: {e}")
+
+
+def parse_phone_from_filename(audio_path: Path):
+    """Phone number embedded in a recorder filename, or None."""
+    match = RECORDING_NAME_RE.match(Path(audio_path).stem)
+    if not match:
+        return None
+    phone = match.group('phone')
+    # Stems and other sidecars share the recording's name
+    for suffix in ('_mic', '_sys'):
+        if phone.endswith(suffix):
+            phone = phone[:-len(suffix)]
+    return phone if any(c.isdigit() for c in phone) else None
+
+
+def process_recording(audio_path, phone_number: str = None, stereo: bool = False,
+                      dry_run: bool = False, use_legacy: bool = False,
+                      rate_limiter: RequestScheduler = None,
+                      use_cache: bool = True, cache_only: bool = False,
+                      preprocess: bool = True, chunk: bool = True,
+                      upload_recording: bool = True,
+                      job: dict = None, queue: JobQueue = None) -> dict:
+    """
+    Run one recording through the whole pipeline: validate, transcribe, save.
+
+    Args:
+        audio_path: Path to the audio file
+        phone_number: Phone number override (defaults to the one in the filename)
+        stereo: Recording has the caller left and the recipient right
+        dry_run: Transcribe only, don't save to PocketBase
+        use_legacy: Use the old cold_calls workflow
+        rate_limiter: Optional scheduler shared with other concurrent jobs
+        use_cache: Reuse / store the analysis in the transcription cache
+        cache_only: Only use a cached analysis, never call Gemini
+        preprocess: Shrink the audio before upload (see audio_preprocess.py)
+        chunk: Transcribe long calls in parallel segments
+        upload_recording: Attach the audio to the call log (recordings collection)
+        job: Job queue entry for this recording; stages it already completed
+            are skipped
+        queue: Queue to record each completed stage in
+
+    Returns:
+        dict: analysis plus the saved company / call record / transcript /
+            follow-up / recording (None when dry_run, or when that step
+            happened in an earlier attempt)
+    """
+    audio_path = validate_audio_file(str(audio_path))
+    if phone_number is None:
+        phone_number = parse_phone_from_filename(audio_path)
+
+    job = job or {}
+    key = job.get('idempotency_key')
+
+    def advance(stage: str, **fields):
+        if queue is not None and job.get('id') is not None:
+            queue.advance(job['id'], stage, **fields)
+
+    if stage_reached(job, TRANSCRIBED) and job.get('analysis'):
+        print(f"⏭️  Already transcribed: {audio_path.name}")
+        analysis = repair_analysis(job['analysis'])
+    else:
+        analysis = transcribe_audio(
+            audio_path, stereo=stereo, rate_limiter=rate_limiter,
+            use_cache=use_cache, cache_only=cache_only, preprocess=preprocess, chunk=chunk,
+            uploaded=job.get('upload_ref'),
+            on_upload=lambda ref: advance(UPLOADED, upload_ref=ref),
         )
-        print(f"  ✓ Company: {company['company_name']} (ID: {company['id']})")
-
-        # Add phone to analysis for storage
-        if phone_number:
-            analysis['phone_number'] = phone_number
-
-        if use_legacy:
-            # Legacy workflow: create cold_call
-            cold_call, transcript = create_cold_call_with_transcript(
-                client=client,
-                company_id=company['id'],
-                transcript_text=analysis.get('transcript', ''),
-                analysis=analysis,
-                model_used=GEMINI_MODEL,
-            )
-            print(f"  ✓ Cold Call: {cold_call['id']}")
-            print(f"  ✓ Transcript: {transcript['id']}")
-            return company, cold_call, transcript, None
+        advance(TRANSCRIBED, analysis=analysis)
+
+    result = {
+        'analysis': analysis,
+        'company': None,
+        'call_record': None,
+        'transcript': None,
+        'follow_up': None,
+        'recording': None,
+    }
+    if dry_run:
+        return result
+
+    if stage_reached(job, SAVED):
+        print(f"⏭️  Already saved: {audio_path.name} (ID: {job['result_id']})")
+        result.update(company={'id': job['company_id']}, call_record={'id': job['result_id']})
+    else:
+        # A retry may follow a crash between the save and recording it
+        existing = None
+        if key and job.get('attempts', 0) > 1:
+            existing = find_saved_call(get_client(), key, use_legacy)
+        if existing:
+            print(f"⏭️  Already saved: {audio_path.name} (ID: {existing['id']})")
+            result.update(company={'id': existing.get('company')}, call_record=existing)
         else:
-            # NEW workflow: create call_log with phone_number record
-            phone_record = find_or_create_phone_number(
-                client=client,
-                company_id=company['id'],
-                phone_number=phone_number or '',
-                receptionist_name=analysis.get('receptionist_name'),
-            )
-            print(f"  ✓ Phone Number: {phone_record.get('phone_number', 'Unknown')} (ID: {phone_record['id']})")
-
-            # Create call log with transcript and potential follow-up
-            call_log, transcript, follow_up = create_call_log_with_transcript(
-                client=client,
-                company_id=company['id'],
-                phone_number_record_id=phone_record['id'],
-                transcript_text=analysis.get('transcript', ''),
-                analysis=analysis,
-                model_used=GEMINI_MODEL,
+            company, call_record, transcript, follow_up = save_to_pocketbase(
+                analysis, phone_number, use_legacy=use_legacy, idempotency_key=key
             )
-            print(f"  ✓ Call Log: {call_log['id']}")
-            print(f"  ✓ Transcript: {transcript['id']}")
+            result.update(company=company, call_record=call_record,
+                          transcript=transcript, follow_up=follow_up)
+        advance(SAVED, result_id=result['call_record']['id'], company_id=result['company']['id'])
+
+    # Recordings link to call logs, which the legacy workflow doesn't create
+    if upload_recording and not use_legacy and not stage_reached(job, LINKED):
+        result['recording'] = link_recording(audio_path, result['call_record'], phone_number, key)
+        advance(LINKED)
+    return result
 
-            if follow_up:
-                print(f"  ✓ Follow-Up Created: {follow_up['id']} (scheduled: {follow_up.get('scheduled_time', 'N/A')})")
 
-            return company, call_log, transcript, follow_up
+def expand_inputs(inputs: list) -> list:
+    """Resolve files, folders and glob patterns into a sorted list of recordings."""
+    paths = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            matches = [p for p in path.iterdir() if p.is_file()]
+        elif glob.has_magic(item):
+            matches = [Path(p) for p in glob.glob(item, recursive=True) if Path(p).is_file()]
+        else:
+            # Plain files go through as-is so validation reports missing ones
+            paths.append(path)
+            continue
+        for match in sorted(matches):
+            # Stems are duplicates of the mixed recording
+            if match.suffix.lower() in SUPPORTED_FORMATS and not match.stem.endswith(('_mic', '_sys')):
+                paths.append(match)
+
+    # Drop duplicates from overlapping inputs, keeping the first occurrence
+    seen = set()
+    unique = []
+    for path in paths:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def run_batch(paths: list, workers: int = 4, rate_per_minute: float = None,
+              tokens_per_minute: float = None,
+              stereo: bool = False, dry_run: bool = False, use_legacy: bool = False,
+              as_json: bool = False, use_cache: bool = True, cache_only: bool = False,
+              preprocess: bool = True, chunk: bool = True, upload_recording: bool = True) -> int:
+    """
+    Transcribe many recordings concurrently and print a status table.
+
+    Up to `workers` recordings are uploaded and generated at once. Gemini
+    requests from all workers share one RequestScheduler, which keeps them
+    under the requests and tokens per minute budgets (default: GEMINI_RPM /
+    GEMINI_TPM) and backs off on quota errors. The phone
+    number for each file comes from its recorder filename.
 
+    Unless dry_run, every file is tracked in the job queue by its content
+    hash: rerunning an interrupted batch resumes each file after its last
+    completed stage and skips files that were already saved.
+
+    Returns:
+        int: process exit code (1 if any file failed)
+    """
+    limiter = RequestScheduler(rate_per_minute, tokens_per_minute)
+    results = []
+    lock = threading.Lock()
+    total = len(paths)
+    queue = None
+    if not dry_run:
+        queue = JobQueue(QUEUE_DB)
+        warm_phone_index()
+
+    def run_one(path: Path) -> dict:
+        started = time.monotonic()
+        row = {'file': str(path), 'status': 'ok', 'seconds': 0.0,
+               'company': None, 'outcome': None, 'record_id': None, 'error': None}
+        job = None
+        try:
+            if queue is not None:
+                key = file_sha256(validate_audio_file(str(path)))
+                queue.enqueue(str(path), parse_phone_from_filename(path), idempotency_key=key)
+                job = queue.get(idempotency_key=key)
+                if job['status'] == DONE:
+                    analysis = job['analysis'] or {}
+                    row.update(status='skipped', company=analysis.get('company_name'),
+                               outcome=analysis.get('call_outcome'), record_id=job['result_id'])
+                    job = None
+                else:
+                    job = queue.start(job['id'])
+            if row['status'] == 'ok':
+                result = process_recording(
+                    path, stereo=stereo, dry_run=dry_run,
+                    use_legacy=use_legacy, rate_limiter=limiter,
+                    use_cache=use_cache, cache_only=cache_only, preprocess=preprocess,
+                    chunk=chunk, upload_recording=upload_recording, job=job, queue=queue,
+                )
+                analysis = result['analysis']
+                row['company'] = analysis.get('company_name')
+                row['outcome'] = analysis.get('call_outcome')
+                if result['call_record']:
+                    row['record_id'] = result['call_record']['id']
+                if job:
+                    queue.complete(job['id'], row['record_id'])
+        except Exception as e:
+            row['status'] = 'failed'
+            row['error'] = str(e)
+            if job:
+                queue.fail(job['id'], str(e))
+        row['seconds'] = time.monotonic() - started
+
+        with lock:
+            results.append(row)
+            icon = {'ok': '✅', 'skipped': '⏭️ '}.get(row['status'], '❌')
+            print(f"{icon} [{len(results)}/{total}] {path.name} ({row['seconds']:.1f}s)")
+        return row
+
+    print(f"🚀 Transcribing {total} recording(s) with {workers} worker(s)"
+          + (f", max {limiter.describe()}" if limiter.limited else ""))
+    batch_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        rows = list(executor.map(run_one, paths))
+    elapsed = time.monotonic() - batch_started
+
+    succeeded = sum(1 for r in rows if r['status'] != 'failed')
+    busy = sum(r['seconds'] for r in rows)
+    audio_mb = sum(Path(r['file']).stat().st_size for r in rows
+                   if Path(r['file']).exists()) / (1024 * 1024)
+    summary = {
+        'files': total,
+        'succeeded': succeeded,
+        'failed': total - succeeded,
+        'wall_seconds': elapsed,
+        'files_per_minute': total / elapsed * 60 if elapsed else 0.0,
+        'audio_mb': audio_mb,
+        # How much faster than doing the same work one file at a time
+        'parallel_speedup': busy / elapsed if elapsed else 0.0,
+        'rate_limited': limiter.rate_limited,
+    }
+
+    if as_json:
+        print(json.dumps({'summary': summary, 'files': rows}, indent=2))
+        return 0 if succeeded == total else 1
+
+    name_width = min(max((len(Path(r['file']).name) for r in rows), default=4), 48)
+    print("\n" + "=" * 60)
+    print(f"{'File':<{name_width}}  {'Status':<7} {'Time':>7}  Result")
+    print("-" * 60)
+    for r in rows:
+        name = Path(r['file']).name[:name_width]
+        if r['status'] != 'failed':
+            detail = f"{r['company'] or 'Unknown'} - {r['outcome'] or 'N/A'}"
+        else:
+            detail = r['error']
+        print(f"{name:<{name_width}}  {r['status']:<7} {r['seconds']:>6.1f}s  {detail}")
+    print("=" * 60)
+    print(f"📊 {succeeded}/{total} succeeded in {elapsed:.1f}s "
+          f"({summary['files_per_minute']:.1f} files/min, {audio_mb:.1f} MB audio, "
+          f"{summary['parallel_speedup']:.1f}x vs serial)")
+    if limiter.rate_limited:
+        print(f"⏳ {limiter.rate_limited} quota error(s); settled at {limiter.describe()}")
+
+    return 0 if succeeded == total else 1
+
+
+def watch_recordings(folders: list, workers: int = 2, stereo: bool = False,
+                     dry_run: bool = False, use_legacy: bool = False,
+                     backfill: bool = False, settle_seconds: float = 5.0,
+                     use_cache: bool = True, preprocess: bool = True, chunk: bool = True,
+                     upload_recording: bool = True, rate_per_minute: float = None,
+                     tokens_per_minute: float = None):
+    """
+    Transcribe new recordings as they appear, until interrupted.
+
+    New files are debounced by the watcher, stored in the persistent job queue
+    and processed by at most `workers` transcriptions at a time. Jobs left
+    unfinished by a previous run are picked up again on start and resume after
+    the last stage they completed. Gemini requests share one RequestScheduler.
+    A dry run uses a throwaway queue, so it never marks files done for later
+    real runs.
+    """
+    from recording_watcher import RecordingWatcher
+
+    scratch = None
+    if dry_run:
+        scratch = tempfile.TemporaryDirectory(prefix='transcribe_dry_run_', ignore_cleanup_errors=True)
+    queue = JobQueue(str(Path(scratch.name) / "jobs.db") if scratch else QUEUE_DB)
+    resumed = queue.requeue_running()
+    if resumed:
+        print(f"↩️  Resuming {resumed} interrupted job(s)")
+
+    wake = threading.Event()
+    limiter = RequestScheduler(rate_per_minute, tokens_per_minute)
+
+    def on_ready(path: Path):
+        try:
+            key = file_sha256(path)
+        except OSError as e:
+            print(f"⚠️ Could not read {path.name}: {e}")
+            return
+        if queue.enqueue(str(path), parse_phone_from_filename(path), idempotency_key=key):
+            print(f"📥 Queued: {path.name}")
+            wake.set()
+
+    watcher = RecordingWatcher(
+        folders, on_ready,
+        extensions=SUPPORTED_FORMATS,
+        settle_seconds=settle_seconds,
+        include_existing=backfill,
+        seen=lambda path: queue.contains(str(path)),
+    )
+    watcher.start()
+
+    if not dry_run:
+        warm_phone_index()
+
+    mode = "filesystem events" if watcher.using_events else "polling"
+    print(f"👀 Watching ({mode}, {workers} worker(s)):")
+    for folder in watcher.folders:
+        print(f"   {folder}")
+
+    slots = threading.Semaphore(workers)
+
+    def run_job(job: dict):
+        name = Path(job['path']).name
+        try:
+            result = process_recording(
+                job['path'], job['phone_number'],
+                stereo=stereo, dry_run=dry_run, use_legacy=use_legacy,
+                rate_limiter=limiter, use_cache=use_cache, preprocess=preprocess, chunk=chunk,
+                upload_recording=upload_recording, job=job, queue=queue,
+            )
+            record = result['call_record']
+            queue.complete(job['id'], record['id'] if record else None)
+            print(f"✅ Done: {name}")
+        except Exception as e:
+            retry = queue.fail(job['id'], str(e))
+            print(f"❌ Failed: {name} ({e}){' - will retry' if retry else ''}")
+        finally:
+            slots.release()
+            wake.set()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                # Timeout keeps Ctrl+C responsive while all workers are busy
+                if not slots.acquire(timeout=1):
+                    continue
+                job = queue.claim()
+                if job is None:
+                    slots.release()
+                    wake.wait(5)
+                    wake.clear()
+                    continue
+                executor.submit(run_job, job)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping watcher (running jobs will finish)...")
     finally:
-        client.close()
+        watcher.stop()
+
+    counts = queue.counts()
+    print("   " + ", ".join(f"{status}: {n}" for status, n in sorted(counts.items())))
+    if scratch:
+        scratch.cleanup()
+    return 0
 
 
 def print_analysis(analysis: dict):
@@ -271,12 +766,18 @@ def main():
     )
     parser.add_argument(
         'audio_file',
-        help="Path to the audio file (mp3, wav, m4a, etc.)"
+        nargs='*',
+        help="Audio file(s) (mp3, wav, m4a, etc.), folders or glob patterns"
     )
     parser.add_argument(
         '--phone',
         help="Phone number of the company called (for matching/creating records)"
     )
+    parser.add_argument(
+        '--stereo',
+        action='store_true',
+        help="Recording is stereo with caller on the left and recipient on the right"
+    )
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -292,29 +793,160 @@ def main():
         action='store_true',
         help="Use legacy cold_calls workflow instead of new call_logs"
     )
+    parser.add_argument(
+        '--backend',
+        choices=sorted(BACKENDS),
+        help="Transcription backend (default: TRANSCRIBER_BACKEND or gemini)"
+    )
+    parser.add_argument(
+        '--no-preprocess',
+        action='store_true',
+        help="Upload the original file instead of a 16 kHz, silence-trimmed Opus copy"
+    )
+    parser.add_argument(
+        '--no-chunking',
+        action='store_true',
+        help="Send long calls as one request instead of parallel segments"
+    )
+    parser.add_argument(
+        '--no-upload',
+        action='store_true',
+        help="Don't attach the audio file to the call log in PocketBase"
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Always call Gemini, ignoring and not updating the transcription cache"
+    )
+    parser.add_argument(
+        '--from-cache',
+        action='store_true',
+        help="Only use cached transcriptions (e.g. to retry a failed PocketBase save)"
+    )
+    parser.add_argument(
+        '--watch',
+        nargs='*',
+        metavar='FOLDER',
+        help="Keep running and transcribe new recordings in these folders "
+             "(default: the audio recorder's recordings and Approved folders)"
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help="Recordings transcribed at the same time (default: 4 for batches, 2 for --watch)"
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=None,
+        metavar='RPM',
+        help="Max Gemini requests per minute across all workers (default: GEMINI_RPM, "
+             "else learned from quota errors)"
+    )
+    parser.add_argument(
+        '--tpm',
+        type=float,
+        default=None,
+        metavar='TOKENS',
+        help="Max Gemini input tokens per minute across all workers (default: GEMINI_TPM)"
+    )
+    parser.add_argument(
+        '--backfill',
+        action='store_true',
+        help="Watch mode: also queue recordings already in the folders"
+    )
 
     args = parser.parse_args()
 
+    if args.no_cache and args.from_cache:
+        parser.error("--no-cache and --from-cache can't be combined")
+
+    if args.backend:
+        try:
+            set_backend(args.backend)
+        except ValueError as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+
+    if args.watch is not None:
+        folders = [Path(f) for f in args.watch] or DEFAULT_WATCH_DIRS
+        return watch_recordings(
+            folders, workers=max(1, args.workers or 2), stereo=args.stereo,
+            dry_run=args.dry_run, use_legacy=args.legacy, backfill=args.backfill,
+            use_cache=not args.no_cache, preprocess=not args.no_preprocess,
+            chunk=not args.no_chunking, upload_recording=not args.no_upload,
+            rate_per_minute=args.rate, tokens_per_minute=args.tpm,
+        )
+
+    if not args.audio_file:
+        parser.error("audio_file is required unless --watch is given")
+
+    # More than one file, or any folder/glob: batch mode
+    single = args.audio_file[0]
+    if len(args.audio_file) > 1 or Path(single).is_dir() or glob.has_magic(single):
+        if args.phone:
+            parser.error("--phone applies to a single file; batch mode reads phones from filenames")
+        paths = expand_inputs(args.audio_file)
+        if not paths:
+            print("❌ Error: no audio files matched", file=sys.stderr)
+            return 1
+        return run_batch(
+            paths, workers=max(1, args.workers or 4),
+            rate_per_minute=args.rate, tokens_per_minute=args.tpm,
+            stereo=args.stereo, dry_run=args.dry_run, use_legacy=args.legacy,
+            as_json=args.json, use_cache=not args.no_cache, cache_only=args.from_cache,
+            preprocess=not args.no_preprocess, chunk=not args.no_chunking,
+            upload_recording=not args.no_upload,
+        )
+
     try:
         # Validate audio file
-        audio_path = validate_audio_file(args.audio_file)
+        audio_path = validate_audio_file(single)
 
-        # Transcribe with Gemini
-        analysis = transcribe_with_gemini(audio_path)
+        # Saves are tracked in the job queue like batch runs, so running the
+        # same file again after a crash never saves the call twice
+        queue = job = None
+        if not args.dry_run:
+            queue = JobQueue(QUEUE_DB)
+            key = file_sha256(audio_path)
+            queue.enqueue(str(audio_path), args.phone or parse_phone_from_filename(audio_path),
+                          idempotency_key=key)
+            job = queue.get(idempotency_key=key)
+
+        if job and job['status'] == DONE:
+            print(f"⏭️  Already saved: {audio_path.name} (ID: {job['result_id']})")
+            result = {'analysis': repair_analysis(job['analysis'] or {}),
+                      'call_record': {'id': job['result_id']}, 'follow_up': None}
+        else:
+            if job:
+                job = queue.start(job['id'])
+            try:
+                # Transcribe with Gemini, then save and attach the recording
+                result = process_recording(
+                    audio_path, args.phone, stereo=args.stereo,
+                    dry_run=args.dry_run, use_legacy=args.legacy,
+                    rate_limiter=RequestScheduler(args.rate, args.tpm),
+                    use_cache=not args.no_cache, cache_only=args.from_cache,
+                    preprocess=not args.no_preprocess, chunk=not args.no_chunking,
+                    upload_recording=not args.no_upload, job=job, queue=queue,
+                )
+            except Exception as e:
+                if job:
+                    queue.fail(job['id'], str(e))
+                raise
+            if job:
+                queue.complete(job['id'], result['call_record']['id'])
 
         # Output results
         if args.json:
-            print(json.dumps(analysis, indent=2))
+            print(json.dumps(result['analysis'], indent=2))
         else:
-            print_analysis(analysis)
+            print_analysis(result['analysis'])
 
-        # Save to PocketBase unless dry-run
+        # Saved to PocketBase unless dry-run
         if not args.dry_run:
-            company, call_record, transcript, follow_up = save_to_pocketbase(
-                analysis,
-                args.phone,
-                use_legacy=args.legacy
-            )
+            call_record, follow_up = result['call_record'], result['follow_up']
             print(f"\n✅ Successfully saved to PocketBase!")
 
             if args.legacy:
@@ -0,0 +1,325 @@
+"""
+CRM-Tableturnerr Transcription Backends
+
+The speech-to-analysis step behind one small interface, so the pipeline can
+run against Gemini, a local stand-in with no network, or a local speech model.
+
+Every backend exposes:
+    model_name                                        -> stored as model_used and in cache keys
+    upload(audio_path)                                -> uploaded file to reuse, or None
+    transcribe(audio_path, prompt, rate_limiter=None, schema=None, uploaded=None) -> raw JSON text
+    analyze_text(prompt, text, rate_limiter=None, schema=None)     -> raw JSON text (no audio)
+
+rate_limiter is the RequestScheduler shared by concurrent jobs (see
+request_scheduler.py); remote backends send every request through it and
+retry after quota errors.
+schema is the JSON schema the answer should follow (see call_analysis.py);
+backends that can't constrain their output ignore it. uploaded is what
+upload() returned, or its .name stored by an earlier run, so a resumed job
+doesn't upload the recording again.
+
+Select one with TRANSCRIBER_BACKEND=gemini|fake|whisper (default: gemini).
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from audio_preprocess import mime_type_for
+from call_analysis import CALL_OUTCOMES, FALLBACKS
+from request_scheduler import (
+    RateLimitError,
+    estimate_audio_tokens,
+    estimate_text_tokens,
+    run_with_retries,
+)
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+
+# Gemini configuration
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+
+
+class TranscriptionBackend:
+    """Base class for transcription backends."""
+
+    name = "base"
+
+    @property
+    def model_name(self) -> str:
+        return self.name
+
+    def upload(self, audio_path: Path):
+        """Send a recording ahead of transcribe(); returns the uploaded file, or None if not needed."""
+        return None
+
+    def transcribe(self, audio_path: Path, prompt: str, rate_limiter=None, schema: dict = None,
+                   uploaded=None) -> str:
+        """Return the analysis for a recording as JSON text."""
+        raise NotImplementedError
+
+    def analyze_text(self, prompt: str, text: str, rate_limiter=None, schema: dict = None) -> str:
+        """Return the analysis of an existing transcript as JSON text."""
+        raise NotImplementedError
+
+
+class GeminiBackend(TranscriptionBackend):
+    """Google Gemini through google-generativeai (upload, then generate)."""
+
+    name = "gemini"
+
+    def __init__(self, model: str = None, api_key: str = None):
+        self.model = model or GEMINI_MODEL
+        self.api_key = api_key or GEMINI_API_KEY
+        self._configured = False
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    def _configure(self):
+        # Checked on first use, so cache-only runs work without a key
+        if genai is None:
+            raise ValueError("google-generativeai is not installed")
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is not set")
+        if not self._configured:
+            genai.configure(api_key=self.api_key)
+            self._configured = True
+
+    def _generation_config(self, schema: dict = None):
+        # With a schema Gemini's output is constrained to it (valid JSON, right types)
+        if schema:
+            return genai.GenerationConfig(response_mime_type="application/json", response_schema=schema)
+        return genai.GenerationConfig(response_mime_type="application/json")
+
+    def _upload_file(self, audio_path: Path):
+        self._configure()
+        print(f"📤 Uploading audio file: {audio_path.name}")
+        return genai.upload_file(path=str(audio_path), mime_type=mime_type_for(audio_path))
+
+    def upload(self, audio_path: Path):
+        """Upload a recording to the Gemini Files API; returns the File (its name is kept for 48 hours)."""
+        return self._upload_file(audio_path)
+
+    def _generate(self, contents: list, tokens: int, rate_limiter=None, schema: dict = None) -> str:
+        model = genai.GenerativeModel(self.model)
+
+        def send():
+            response = model.generate_content(contents, generation_config=self._generation_config(schema))
+            usage = getattr(response, 'usage_metadata', None)
+            return response.text, getattr(usage, 'prompt_token_count', None)
+
+        return run_with_retries(send, rate_limiter, tokens)
+
+    def transcribe(self, audio_path: Path, prompt: str, rate_limiter=None, schema: dict = None,
+                   uploaded=None) -> str:
+        self._configure()
+
+        # A File from upload() in this run is used as is; only a name stored
+        # by an earlier run has to be looked up again
+        audio_file = uploaded
+        if isinstance(uploaded, str):
+            try:
+                audio_file = genai.get_file(uploaded)
+                print(f"♻️  Reusing uploaded file: {audio_path.name}")
+            except Exception:
+                # Expired or deleted: upload again
+                audio_file = None
+        if audio_file is None:
+            audio_file = self._upload_file(audio_path)
+
+        print(f"🤖 Transcribing with {self.model}...")
+        tokens = estimate_audio_tokens(audio_path) + estimate_text_tokens(prompt)
+        return self._generate([prompt, audio_file], tokens, rate_limiter, schema)
+
+    def analyze_text(self, prompt: str, text: str, rate_limiter=None, schema: dict = None) -> str:
+        self._configure()
+        return self._generate([prompt, text], estimate_text_tokens(prompt, text), rate_limiter, schema)
+
+
+class FakeBackend(TranscriptionBackend):
+    """Offline stand-in that returns schema-valid analyses.
+
+    Results are derived from the file's contents, so the same recording always
+    gets the same analysis. Latency and failures can be injected to exercise
+    concurrency, retries and throughput without network access:
+        TRANSCRIBER_FAKE_LATENCY       seconds per call (default 0.5)
+        TRANSCRIBER_FAKE_LATENCY_PER_MB  extra seconds per MB of audio (default 0)
+        TRANSCRIBER_FAKE_FAILURE_RATE  probability a call raises (default 0)
+        TRANSCRIBER_FAKE_RPM_QUOTA     calls per minute before it answers 429 (default: none)
+    """
+
+    name = "fake"
+
+    # Length of the window rpm_quota is counted over
+    quota_window = 60.0
+
+    def __init__(self, latency: float = None, latency_per_mb: float = None,
+                 failure_rate: float = None, seed: int = None, rpm_quota: int = None):
+        self.latency = float(os.getenv('TRANSCRIBER_FAKE_LATENCY', 0.5) if latency is None else latency)
+        self.latency_per_mb = float(
+            os.getenv('TRANSCRIBER_FAKE_LATENCY_PER_MB', 0) if latency_per_mb is None else latency_per_mb
+        )
+        self.failure_rate = float(
+            os.getenv('TRANSCRIBER_FAKE_FAILURE_RATE', 0) if failure_rate is None else failure_rate
+        )
+        self.rpm_quota = int(os.getenv('TRANSCRIBER_FAKE_RPM_QUOTA', 0) if rpm_quota is None else rpm_quota)
+        self._failures = random.Random(seed)
+        self._calls = deque()  # accepted call times, for rpm_quota
+        self._lock = threading.Lock()
+
+    def _simulate(self, name: str, size_mb: float, rate_limiter, tokens: int):
+        def send():
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and self._calls[0] <= now - self.quota_window:
+                    self._calls.popleft()
+                if self.rpm_quota and len(self._calls) >= self.rpm_quota:
+                    raise RateLimitError(f"Injected quota error for {name}",
+                                         retry_after=self._calls[0] + self.quota_window - now)
+                self._calls.append(now)
+            time.sleep(self.latency + self.latency_per_mb * size_mb)
+            return None, None
+
+        run_with_retries(send, rate_limiter, tokens)
+
+        with self._lock:
+            failed = self._failures.random() < self.failure_rate
+        if failed:
+            raise RuntimeError(f"Injected transcription failure for {name}")
+
+    def transcribe(self, audio_path: Path, prompt: str, rate_limiter=None, schema: dict = None,
+                   uploaded=None) -> str:
+        tokens = estimate_audio_tokens(audio_path) + estimate_text_tokens(prompt)
+        self._simulate(audio_path.name, audio_path.stat().st_size / (1024 * 1024), rate_limiter, tokens)
+        return json.dumps(self.fake_analysis(audio_path.read_bytes()))
+
+    def analyze_text(self, prompt: str, text: str, rate_limiter=None, schema: dict = None) -> str:
+        self._simulate("transcript", 0, rate_limiter, estimate_text_tokens(prompt, text))
+        analysis = self.fake_analysis(text.encode('utf-8'))
+        analysis['transcript'] = text
+        return json.dumps(analysis)
+
+    @staticmethod
+    def fake_analysis(content: bytes) -> dict:
+        """A plausible analysis seeded from the recording (or transcript) contents."""
+        digest = hashlib.sha256(content).hexdigest()
+        rng = random.Random(digest)
+        company = f"Test Company {digest[:6].upper()}"
+        outcome = rng.choice(CALL_OUTCOMES)
+        callback = outcome == 'Callback'
+        lines = []
+        for i in range(rng.randint(4, 12)):
+            speaker = "Caller" if i % 2 == 0 else "Recipient"
+            lines.append(f"{speaker}: Line {i + 1} of a generated conversation.")
+
+        return {
+            "company_name": company,
+            "owner_name": rng.choice(["Alex Morgan", "Sam Lee", None]),
+            "receptionist_name": rng.choice(["Jordan", "Taylor", None]),
+            "recipients": rng.choice(["receptionist", "owner", "manager"]),
+            "call_outcome": outcome,
+            "interest_level": rng.randint(1, 10),
+            "objections": rng.sample(["Too expensive", "Already have a provider", "Not now"], rng.randint(0, 2)),
+            "pain_points": rng.sample(["Slow season", "Staffing", "Online reviews"], rng.randint(0, 2)),
+            "follow_up_actions": ["Send pricing email"] if outcome == 'Interested' else [],
+            "callback_requested": callback,
+            "callback_notes": "Call back next week" if callback else None,
+            "call_summary": f"Generated call with {company}. Outcome: {outcome}.",
+            "call_duration_estimate": f"{rng.randint(0, 5)} minutes {rng.randint(0, 59)} seconds",
+            "transcript": "\n".join(lines),
+        }
+
+
+class WhisperBackend(TranscriptionBackend):
+    """Local speech recognition through faster-whisper (transcript only).
+
+    Whisper doesn't analyse the call, so the structured fields are left at
+    neutral values and the transcript carries the content.
+    TRANSCRIBER_WHISPER_MODEL picks the model size (default "base").
+    """
+
+    name = "whisper"
+
+    def __init__(self, model_size: str = None):
+        if WhisperModel is None:
+            raise ValueError("faster-whisper is not installed")
+        self.model_size = model_size or os.getenv('TRANSCRIBER_WHISPER_MODEL', 'base')
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        return f"whisper-{self.model_size}"
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                print(f"🧠 Loading Whisper model: {self.model_size}")
+                self._model = WhisperModel(self.model_size, compute_type="int8")
+            return self._model
+
+    def transcribe(self, audio_path: Path, prompt: str, rate_limiter=None, schema: dict = None,
+                   uploaded=None) -> str:
+        model = self._load()
+        print(f"🤖 Transcribing locally with {self.model_name}...")
+        segments, info = model.transcribe(str(audio_path), vad_filter=True)
+        text = " ".join(segment.text.strip() for segment in segments)
+        return json.dumps(self._neutral_analysis(text, info.duration))
+
+    def analyze_text(self, prompt: str, text: str, rate_limiter=None, schema: dict = None) -> str:
+        return json.dumps(self._neutral_analysis(text))
+
+    @staticmethod
+    def _neutral_analysis(text: str, duration: float = None) -> dict:
+        """Analysis fields Whisper can't fill, around its transcript."""
+        estimate = None
+        if duration is not None:
+            estimate = f"{int(duration // 60)} minutes {int(duration % 60)} seconds"
+        return {
+            "company_name": "Unknown Company",
+            "owner_name": None,
+            "receptionist_name": None,
+            "recipients": None,
+            "call_outcome": "Other",
+            "interest_level": FALLBACKS["interest_level"],  # Neutral, 0 is out of range
+            "objections": [],
+            "pain_points": [],
+            "follow_up_actions": [],
+            "callback_requested": False,
+            "callback_notes": None,
+            "call_summary": text[:280],
+            "call_duration_estimate": estimate,
+            "transcript": text,
+        }
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    FakeBackend.name: FakeBackend,
+    WhisperBackend.name: WhisperBackend,
+}
+
+
+def create_backend(name: str = None, **kwargs) -> TranscriptionBackend:
+    """Create a backend by name (default: TRANSCRIBER_BACKEND, then gemini)."""
+    name = (name or os.getenv('TRANSCRIBER_BACKEND') or GeminiBackend.name).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
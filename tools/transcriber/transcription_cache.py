@@ -0,0 +1,113 @@
+"""
+CRM-Tableturnerr Transcription Cache
+
+Keeps parsed Gemini analyses on disk, keyed by what determines the result:
+the audio content, the model and the prompt. Re-running a file (for example
+after a PocketBase save failed) then costs nothing instead of another upload
+and generation.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".transcription_cache"
+DEFAULT_MAX_MB = 200
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prompt_version(prompt: str) -> str:
+    """Short fingerprint of a prompt, so editing it invalidates old entries."""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+
+
+class TranscriptionCache:
+    """Size-bounded directory of cached analyses (one JSON file per entry).
+
+    Entries are evicted least-recently-used first once the directory grows
+    past max_bytes; a hit refreshes the entry's modification time.
+    """
+
+    def __init__(self, cache_dir: Path = None, max_bytes: int = None):
+        self.cache_dir = Path(cache_dir or os.getenv('TRANSCRIBER_CACHE_DIR', DEFAULT_CACHE_DIR))
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('TRANSCRIBER_CACHE_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def key_for(self, audio_path: Path, model: str, prompt: str) -> str:
+        """Cache key for an audio file transcribed with a model and prompt."""
+        parts = f"{file_sha256(audio_path)}:{model}:{prompt_version(prompt)}"
+        return hashlib.sha256(parts.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Cached analysis for a key, or None."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get('analysis')
+
+    def put(self, key: str, analysis: dict, **meta):
+        """Store an analysis, then evict old entries if over the size limit."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'analysis': analysis,
+            'cached_at': datetime.now().isoformat(),
+            **meta,
+        }
+        path = self._entry_path(key)
+        # Write then rename so concurrent readers never see a partial file
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove least-recently-used entries until under max_bytes. Returns count removed."""
+        with self._lock:
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob('*.json'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            return removed